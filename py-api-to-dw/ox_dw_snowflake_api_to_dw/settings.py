@@ -69,7 +69,7 @@ CSV_KWARGS = {
 }
 
 CREATE_LOCAL_TEMP_STMT = """
-CREATE TEMPORARY TABLE IF NOT EXISTS %s(
+CREATE OR REPLACE TEMPORARY TABLE %s(
     %s,
     updated_date_sid int
 )
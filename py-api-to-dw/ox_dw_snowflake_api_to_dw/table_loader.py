@@ -8,7 +8,7 @@ import subprocess
 import snowflake.connector
 import yaml
 import pid
-from ox_dw_db import OXDB
+from ox_dw_db import OXDBPool
 from ox_dw_load_state import LoadState
 from ox_dw_logger import get_etl_logger
 from .settings import (
@@ -77,9 +77,11 @@ class TableLoader(object):
     def dest_db(self):
         """
         Our database connection to the destination db.
+        Checked out from the process pool so loader workers reuse a warm
+        session across tables and files.
         """
         if self._dest_db is None:
-            self._dest_db = OXDB('SNOWFLAKE')
+            self._dest_db = OXDBPool.get('SNOWFLAKE').acquire()
 
         return self._dest_db
 
@@ -191,10 +193,16 @@ class TableLoader(object):
             self.dest_db.rollback()
             raise Exception(error)
         finally:
-            try:
-                self.dest_db.close()
-            except Exception:
-                pass
+            self.release_dest_db()
+
+    def release_dest_db(self):
+        """
+        Returns the destination db connection to the pool.
+        Anything not committed is rolled back.
+        """
+        if self._dest_db is not None:
+            OXDBPool.get('SNOWFLAKE').release(self._dest_db)
+            self._dest_db = None
 
     def sync_table(self):
         """
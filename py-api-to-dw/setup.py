@@ -15,7 +15,7 @@ setup(
     include_package_data=True,
     install_requires=[
         'msgpack-python>=0.4.8',
-        'ox-dw-db>=0.0.5',
+        'ox-dw-db>=0.0.6',
         'ox-dw-logger>=0.0.1',
         'ox-dw-load-state>=0.0.2',
         'ujson>=1.35,<2.0',
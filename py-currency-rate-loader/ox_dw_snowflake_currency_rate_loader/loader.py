@@ -6,7 +6,7 @@ from datetime import datetime, timedelta
 import pid
 from retrying import retry
 from unicodecsv import writer
-from ox_dw_db import OXDB
+from ox_dw_db import pooled
 from ox_dw_load_state import LoadState
 from ox_dw_logger import get_etl_logger
 from .client import Client
@@ -58,7 +58,7 @@ class Loader(object):
         loaded + one day.
         """
         if self._start_date is None:
-            with OXDB('SNOWFLAKE') as oxdb:
+            with pooled('SNOWFLAKE') as oxdb:
                 self._start_date, = \
                     oxdb.get_executed_cursor("""
                         SELECT DATEADD(day, 1, MAX(date))
@@ -93,7 +93,7 @@ class Loader(object):
         """
         Will run the SQL statements to merge any new data into the DW.
         """
-        with OXDB('SNOWFLAKE') as oxdb:
+        with pooled('SNOWFLAKE') as oxdb:
             for stmt in STATEMENTS:
                 stmt = stmt.format(self.temp_file)
                 self.logger.info("Executing:%s;", stmt)
@@ -50,7 +50,7 @@ BASE_URL = \
         ENV.get('CURRENCY_WS_NAME'))
 
 STATEMENTS = ["""
-CREATE LOCAL TEMPORARY TABLE tmp_currency_rate_table (
+CREATE OR REPLACE TEMPORARY TABLE tmp_currency_rate_table (
     base VARCHAR(12),
     quote VARCHAR(12),
     date DATE,
@@ -1,5 +1,15 @@
 """
 All of our common VARS, Classes and functions.
 """
+from .bulk import BulkResult, execute_many
+from .exceptions import PoolTimeoutError
+from .fetch import iter_batches
+from .instrument import (
+    CSVSink, LoggerSink, QueryEvent, RingBufferSink, SQLiteSink, add_sink,
+    get_counters, remove_sink, tag
+)
 from .oxdb import OXDB
+from .pool import OXDBPool, pooled
+from .query import QueryHandle
+from .retry import RetryPolicy, is_transient
 from .settings import ENV
@@ -0,0 +1,123 @@
+"""
+Bulk execution of one statement over many rows of binds.
+"""
+import re
+import time
+from collections import namedtuple
+from itertools import islice
+from psycopg2.extras import execute_batch, execute_values
+
+BATCH_SIZE = 10000
+VALUES_REGEX = re.compile(
+    r'\bVALUES\s*(\((?:[^()]|\([^()]*\))*\))\s*;?\s*$',
+    re.IGNORECASE | re.DOTALL)
+
+BatchTiming = namedtuple('BatchTiming', ['rows', 'rowcount', 'seconds'])
+
+
+class BulkResult(namedtuple('BulkResult', ['rowcount', 'batches'])):
+    """
+    Total rowcount and the BatchTiming of each batch sent.
+    """
+
+    __slots__ = ()
+
+    @property
+    def seconds(self):
+        """
+        Total seconds spent executing the batches.
+        """
+        return sum(batch.seconds for batch in self.batches)
+
+
+def get_driver(connection):
+    """
+    Returns the DB-API module name the connection came from.
+    An OXDB is unwrapped to the DB-API connection it holds, a LOCAL
+    connection is ox_dw_db itself.
+    """
+    while type(connection).__module__.split('.')[0] == \
+            __name__.split('.')[0] and hasattr(connection, 'connection'):
+        connection = connection.connection
+
+    return type(connection).__module__.split('.')[0]
+
+
+def execute_many(connection, stmt, rows, batch_size=BATCH_SIZE):
+    """
+    Executes the stmt once per row of binds in batches of batch_size rows
+    using the fastest path for the driver:
+        pyodbc: fast_executemany.
+        psycopg2: execute_values for INSERT ... VALUES(...) else execute_batch.
+        snowflake: executemany which uses array binding for qmark/numeric and
+                   multi-row inserts for pyformat.
+    Drivers that cannot report the rowcount for a batch are counted as one per
+    row sent.
+    :param connection: DB-API connection.
+    :param stmt: Statement with the binds for a single row.
+    :param rows: Iterable of bind sequences(or dicts for pyformat).
+    :param batch_size: Max rows sent per round trip.
+    :return BulkResult:
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1!")
+    execute = {
+        'pyodbc': _execute_pyodbc,
+        'psycopg2': _execute_psycopg2
+    }.get(get_driver(connection), _execute_default)
+    rows = iter(rows)
+    batches = []
+    cursor = connection.cursor()
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            start = time.time()
+            rowcount = execute(cursor, stmt, batch)
+            if rowcount is None or rowcount < 0:
+                rowcount = len(batch)
+            batches.append(
+                BatchTiming(len(batch), rowcount, time.time() - start))
+    finally:
+        cursor.close()
+
+    return BulkResult(sum(batch.rowcount for batch in batches), batches)
+
+
+def _execute_default(cursor, stmt, batch):
+    """
+    Snowflake and any other DB-API driver.
+    """
+    cursor.executemany(stmt, batch)
+
+    return cursor.rowcount
+
+
+def _execute_psycopg2(cursor, stmt, batch):
+    """
+    Rewrites a single row VALUES(...) into one multi-row statement.
+    """
+    matcher = VALUES_REGEX.search(stmt)
+    if matcher is None:
+        # rowcount is only of the last statement of the page.
+        execute_batch(cursor, stmt, batch, page_size=len(batch))
+        return None
+    execute_values(
+        cursor,
+        stmt[:matcher.start(1)] + '%s',
+        batch,
+        template=matcher.group(1),
+        page_size=len(batch))
+
+    return cursor.rowcount
+
+
+def _execute_pyodbc(cursor, stmt, batch):
+    """
+    fast_executemany sends the whole batch as a parameter array.
+    """
+    cursor.fast_executemany = True
+    cursor.executemany(stmt, batch)
+
+    return cursor.rowcount
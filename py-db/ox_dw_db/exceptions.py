@@ -0,0 +1,14 @@
+"""
+Exception Classes here.
+"""
+
+
+class PoolTimeoutError(Exception):
+    """
+    When no pooled connection could be checked out in time.
+    """
+
+    def __init__(self, connection_name, max_size, timeout):
+        super(PoolTimeoutError, self).__init__(
+            "Timed out after %s seconds waiting for one of %s pooled "
+            "connection(s) to %s!" % (timeout, max_size, connection_name))
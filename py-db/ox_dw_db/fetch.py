@@ -0,0 +1,74 @@
+"""
+Batched fetching of result sets in bounded memory.
+"""
+from collections import OrderedDict
+from itertools import chain
+
+BATCH_SIZE = 10000
+ROWS = 'rows'
+ARROW = 'arrow'
+NUMPY = 'numpy'
+FORMATS = (ROWS, ARROW, NUMPY)
+
+
+def iter_batches(cursor, batch_size=BATCH_SIZE, fmt=ROWS):
+    """
+    Yields the results of an executed cursor batch_size rows at a time.
+    :param cursor: Executed DB-API cursor.
+    :param batch_size: Max rows per batch.
+    :param fmt: One of FORMATS.
+        rows: list of row tuples using fetchmany.
+        arrow: pyarrow.RecordBatch. Snowflake connector with pyarrow only.
+        numpy: OrderedDict of column name to numpy array. Same as arrow.
+    :raises ValueError: When the cursor cannot fetch the fmt.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1!")
+    if fmt not in FORMATS:
+        raise ValueError("fmt must be one of %s!" % (FORMATS, ))
+    if fmt == ROWS:
+        return _iter_rows(cursor, batch_size)
+    if not hasattr(cursor, 'fetch_arrow_batches'):
+        raise ValueError(
+            "%s batches need the snowflake connector with pyarrow installed, "
+            "pip install ox_dw_db[arrow]!" % fmt)
+    if fmt == ARROW:
+        return _iter_arrow(cursor, batch_size)
+
+    return _iter_numpy(cursor, batch_size)
+
+
+def _iter_rows(cursor, batch_size):
+    """
+    Python tuples fetched batch_size at a time.
+    """
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield rows
+
+
+def _iter_arrow(cursor, batch_size):
+    """
+    The connector returns a table per result chunk from the warehouse so split
+    those into record batches of no more than batch_size rows.
+    """
+    tables = cursor.fetch_arrow_batches()
+    if tables is None:
+        return
+    for record_batch in chain.from_iterable(
+            table.to_batches(max_chunksize=batch_size) for table in tables):
+        if record_batch.num_rows:
+            yield record_batch
+
+
+def _iter_numpy(cursor, batch_size):
+    """
+    Column arrays for each arrow record batch.
+    """
+    for record_batch in _iter_arrow(cursor, batch_size):
+        yield OrderedDict(
+            (name, column.to_numpy(zero_copy_only=False))
+            for name, column in zip(record_batch.schema.names,
+                                    record_batch.columns))
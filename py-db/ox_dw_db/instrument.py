@@ -0,0 +1,294 @@
+"""
+Per statement timing for OXDB.
+Nothing is recorded until a sink is added either in code or in env.yaml:
+    DB_INSTRUMENTATION:
+        LOGGER: oxdb  # Name of the logger to write to at INFO.
+        RING_BUFFER: 1000  # Keep the last n events in memory.
+        SQLITE: /path/to/oxdb_profile.db
+        CSV: /path/to/oxdb_profile.csv
+Counters such as retries and reconnects are always kept, see get_counters.
+"""
+import csv
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter, deque, namedtuple
+from contextlib import contextmanager
+from .settings import ENV
+
+MAX_STMT_LENGTH = 1000
+SKIP_MODULES = (__name__.split('.')[0], 'contextlib')
+
+QueryEvent = namedtuple('QueryEvent', [
+    'tag', 'stmt', 'start_time', 'seconds', 'rowcount', 'query_id', 'error'
+])
+
+SINKS = []
+COUNTERS = Counter()
+_COUNTERS_LOCK = threading.Lock()
+_LOCAL = threading.local()
+
+
+def add_sink(sink):
+    """
+    Adds a callable that receives every QueryEvent.
+    """
+    if sink not in SINKS:
+        SINKS.append(sink)
+
+    return sink
+
+
+def remove_sink(sink):
+    """
+    Stops sending QueryEvents to the sink.
+    """
+    if sink in SINKS:
+        SINKS.remove(sink)
+
+
+def increment(name, value=1):
+    """
+    Adds to a process wide counter such as retries or reconnects.
+    """
+    with _COUNTERS_LOCK:
+        COUNTERS[name] += value
+
+
+def get_counters():
+    """
+    A copy of the counters.
+    """
+    with _COUNTERS_LOCK:
+        return dict(COUNTERS)
+
+
+def reset_counters():
+    """
+    Sets all of the counters back to zero.
+    """
+    with _COUNTERS_LOCK:
+        COUNTERS.clear()
+
+
+def configure(conf):
+    """
+    Adds the sinks defined in the DB_INSTRUMENTATION section of env.yaml.
+    """
+    if not conf:
+        return
+    if conf.get('LOGGER'):
+        add_sink(LoggerSink(logging.getLogger(conf['LOGGER'])))
+    if conf.get('RING_BUFFER'):
+        add_sink(RingBufferSink(int(conf['RING_BUFFER'])))
+    if conf.get('SQLITE'):
+        add_sink(SQLiteSink(conf['SQLITE']))
+    if conf.get('CSV'):
+        add_sink(CSVSink(conf['CSV']))
+
+
+def get_tag():
+    """
+    The current tag if set otherwise the first caller outside of ox_dw_db as
+    module.function:lineno.
+    """
+    tags = getattr(_LOCAL, 'tags', None)
+    if tags:
+        return tags[-1]
+    frame = sys._getframe(1)
+    while frame is not None and \
+            frame.f_globals.get('__name__', '').startswith(SKIP_MODULES):
+        frame = frame.f_back
+    if frame is None:
+        return None
+
+    return "%s.%s:%s" % (frame.f_globals.get('__name__'),
+                         frame.f_code.co_name, frame.f_lineno)
+
+
+@contextmanager
+def tag(name):
+    """
+    Tags all statements executed in the with block on this thread.
+    Example:
+        with tag('ETL_STATEMENT[%s]' % index):
+            oxdb.execute(stmt)
+    """
+    if not hasattr(_LOCAL, 'tags'):
+        _LOCAL.tags = []
+    _LOCAL.tags.append(name)
+    try:
+        yield
+    finally:
+        _LOCAL.tags.pop()
+
+
+def record(event):
+    """
+    Sends the event to all of the sinks.
+    A failing sink never fails the statement.
+    """
+    for sink in list(SINKS):
+        try:
+            sink(event)
+        except Exception:
+            pass
+
+
+@contextmanager
+def timed(stmt, cursor=None):
+    """
+    Records a QueryEvent for the work done in the with block.
+    Yields a dict where rowcount can be set when there is no cursor.
+    """
+    if not SINKS:
+        yield {}
+        return
+    stats = {}
+    event_tag = get_tag()
+    start_time = time.time()
+    error = None
+    try:
+        yield stats
+    except Exception as exc:
+        error = repr(exc)
+        raise
+    finally:
+        seconds = time.time() - start_time
+        rowcount = stats.get('rowcount', getattr(cursor, 'rowcount', None))
+        record(
+            QueryEvent(
+                event_tag, str(stmt)[:MAX_STMT_LENGTH], start_time, seconds,
+                rowcount,
+                stats.get('query_id', getattr(cursor, 'sfqid', None)), error))
+
+
+class LoggerSink(object):
+    """
+    Logs one line per statement.
+    """
+
+    def __init__(self, logger, level=logging.INFO):
+        self.logger = logger
+        self.level = level
+
+    def __call__(self, event):
+        self.logger.log(
+            self.level,
+            "QUERY tag=%s seconds=%.3f rowcount=%s query_id=%s error=%s "
+            "stmt=%s", event.tag, event.seconds, event.rowcount,
+            event.query_id, event.error, ' '.join(event.stmt.split()))
+
+
+class RingBufferSink(object):
+    """
+    Keeps the last size events in memory.
+    """
+
+    def __init__(self, size=1000):
+        self.events = deque(maxlen=size)
+
+    def __call__(self, event):
+        self.events.append(event)
+
+    def clear(self):
+        """
+        Forget all of the events.
+        """
+        self.events.clear()
+
+    def summary(self):
+        """
+        Returns (tag, count, total seconds, max seconds) slowest first.
+        """
+        totals = {}
+        for event in list(self.events):
+            count, total, maximum = totals.get(event.tag, (0, 0.0, 0.0))
+            totals[event.tag] = (count + 1, total + event.seconds,
+                                 max(maximum, event.seconds))
+
+        return sorted(
+            [(key, ) + value for key, value in totals.items()],
+            key=lambda row: row[2],
+            reverse=True)
+
+
+class SQLiteSink(object):
+    """
+    Appends events to a local SQLite table for later analysis.
+    """
+    CREATE = """
+        CREATE TABLE IF NOT EXISTS %s(
+            tag TEXT,
+            stmt TEXT,
+            start_time REAL,
+            seconds REAL,
+            rowcount INT,
+            query_id TEXT,
+            error TEXT,
+            pid INT)"""
+    # Columns are named so tables made with more columns still take inserts.
+    INSERT = """
+        INSERT INTO %s(tag, stmt, start_time, seconds, rowcount, query_id,
+                       error, pid)
+        VALUES(?, ?, ?, ?, ?, ?, ?, ?)"""
+
+    def __init__(self, db_file, table='oxdb_query_log'):
+        self.db_file = db_file
+        self.table = table
+        self._lock = threading.Lock()
+        self._local_db = None
+        self._pid = None
+
+    @property
+    def local_db(self):
+        """
+        One connection per process.
+        """
+        if self._local_db is None or self._pid != os.getpid():
+            self._local_db = sqlite3.connect(
+                self.db_file, check_same_thread=False)
+            self._local_db.execute(self.CREATE % self.table)
+            self._pid = os.getpid()
+
+        return self._local_db
+
+    def __call__(self, event):
+        with self._lock:
+            self.local_db.execute(self.INSERT % self.table,
+                                  tuple(event) + (os.getpid(), ))
+            self.local_db.commit()
+
+
+class CSVSink(object):
+    """
+    Appends events to a csv file.
+    An existing file keeps its own columns.
+    """
+
+    def __init__(self, csv_file):
+        self.csv_file = csv_file
+        self._lock = threading.Lock()
+        self._fields = None
+
+    def __call__(self, event):
+        with self._lock:
+            is_new = not os.path.exists(self.csv_file)
+            if is_new:
+                self._fields = QueryEvent._fields
+            elif self._fields is None:
+                with open(self.csv_file) as in_file:
+                    self._fields = next(csv.reader(in_file),
+                                        QueryEvent._fields)
+            with open(self.csv_file, 'a') as out_file:
+                writer = csv.DictWriter(out_file, self._fields,
+                                        extrasaction='ignore')
+                if is_new:
+                    writer.writeheader()
+                writer.writerow(event._asdict())
+
+
+configure(ENV.get('DB_INSTRUMENTATION'))
@@ -0,0 +1,565 @@
+"""
+SQLite backed stand in for SNOWFLAKE connections to run and benchmark the ETLs
+offline. Emulates the subset of Snowflake used by our applications:
+    CREATE STAGE, PUT, LIST, REMOVE and COPY INTO from a local stage directory.
+    STAGE_FILE_FORMAT on CREATE TABLE for table stages.
+    CREATE SEQUENCE and <sequence>.nextval.
+    <expression>::<type> casts.
+    qmark binds.
+Everything else is passed on to SQLite as is.
+"""
+import codecs
+import csv
+import fnmatch
+import glob
+import gzip
+import hashlib
+import io
+import os
+import re
+import shutil
+import sqlite3
+from datetime import datetime
+from snowflake.connector.errors import ProgrammingError
+from .settings import APP_ROOT
+
+DEFAULT_DATABASE = ':memory:'
+DEFAULT_STAGE_DIR = os.path.join(APP_ROOT, 'output', 'local_stages')
+paramstyle = 'qmark'
+
+OPTION_REGEX = re.compile(
+    r"(\w+)\s*=\s*('(?:[^'\\]|\\.)*'|\([^)]*\)|[^\s()]+)", re.DOTALL)
+STAGE_REGEX = re.compile(r"@([^\s/;]+)((?:/[^\s;']*)?)")
+CAST_REGEX = re.compile(r"(?<=[\w)\]'])::(\w+(?:\(\s*\d+(?:\s*,\s*\d+)?\s*\))?)")
+NEXTVAL_REGEX = re.compile(r"\b([A-Za-z_][\w.$]*)\.nextval\b", re.IGNORECASE)
+CREATE_STAGE_REGEX = re.compile(
+    r"^\s*CREATE\s+(OR\s+REPLACE\s+)?(?:TEMPORARY\s+)?STAGE\s+"
+    r"(IF\s+NOT\s+EXISTS\s+)?([^\s;]+)", re.IGNORECASE)
+CREATE_SEQUENCE_REGEX = re.compile(
+    r"^\s*CREATE\s+(OR\s+REPLACE\s+)?SEQUENCE\s+(IF\s+NOT\s+EXISTS\s+)?"
+    r"([^\s;]+)(.*)$", re.IGNORECASE | re.DOTALL)
+CREATE_TABLE_REGEX = re.compile(
+    r"^\s*CREATE\s+(?:OR\s+REPLACE\s+)?(?:LOCAL\s+)?(?:TEMP(?:ORARY)?\s+)?"
+    r"TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?([^\s(]+)", re.IGNORECASE)
+STAGE_FILE_FORMAT_REGEX = re.compile(
+    r"\bSTAGE_FILE_FORMAT\s*=\s*\(([^)]*)\)", re.IGNORECASE | re.DOTALL)
+PUT_REGEX = re.compile(
+    r"^\s*PUT\s+'?file://([^\s']+)'?\s+(@\S+)(.*)$",
+    re.IGNORECASE | re.DOTALL)
+LIST_REGEX = re.compile(r"^\s*(?:LIST|LS)\s+(@\S+)(.*)$",
+                        re.IGNORECASE | re.DOTALL)
+REMOVE_REGEX = re.compile(r"^\s*(?:REMOVE|RM)\s+(@\S+)(.*)$",
+                          re.IGNORECASE | re.DOTALL)
+COPY_REGEX = re.compile(
+    r"^\s*COPY\s+INTO\s+([^\s(]+)\s*(?:\(([^)]*)\))?\s*FROM\s+(@\S+)(.*)$",
+    re.IGNORECASE | re.DOTALL)
+CREATE_SEQUENCES = """
+CREATE TABLE IF NOT EXISTS _local_sequences(
+    name TEXT PRIMARY KEY,
+    value INT NOT NULL,
+    increment INT NOT NULL
+)"""
+CREATE_FILE_FORMATS = """
+CREATE TABLE IF NOT EXISTS _local_file_formats(
+    table_name TEXT PRIMARY KEY,
+    file_format TEXT NOT NULL
+)"""
+
+
+def connect(database=DEFAULT_DATABASE, stage_dir=DEFAULT_STAGE_DIR, **_):
+    """
+    Returns a LocalConnection. Extra Snowflake KWARGS such as account or
+    warehouse are ignored so the SNOWFLAKE KWARGS can be reused.
+    """
+    return LocalConnection(database, stage_dir)
+
+
+def parse_options(text):
+    """
+    Parses Snowflake style KEY = value options into a dict of upper case
+    keys. Nested FILE_FORMAT = (...) options are parsed into a dict.
+    """
+    options = {}
+    for key, value in OPTION_REGEX.findall(text or ''):
+        if value.startswith('('):
+            value = parse_options(value[1:-1])
+        elif value.startswith("'"):
+            value = codecs.decode(value[1:-1], 'unicode_escape')
+        options[key.upper()] = value
+
+    return options
+
+
+def _is_true(value, default=False):
+    """
+    Snowflake booleans are TRUE/FALSE in any case.
+    """
+    if value is None:
+        return default
+
+    return str(value).upper() in ('TRUE', 'T', 'YES', 'Y', '1', 'ON')
+
+
+class LocalConnection(object):
+    """
+    DB-API connection wrapping SQLite with the Snowflake emulation.
+    """
+
+    def __init__(self, database=DEFAULT_DATABASE,
+                 stage_dir=DEFAULT_STAGE_DIR):
+        self.database = database
+        self.stage_dir = stage_dir
+        self.sqlite = sqlite3.connect(
+            database, detect_types=sqlite3.PARSE_DECLTYPES)
+        self.sqlite.execute(CREATE_SEQUENCES)
+        self.sqlite.execute(CREATE_FILE_FORMATS)
+        self.sqlite.commit()
+        self._sequences = {}
+        self.sqlite.create_function('_local_nextval', 1, self._nextval)
+
+    def close(self):
+        """
+        Closes the SQLite connection.
+        """
+        self.sqlite.close()
+
+    def commit(self):
+        """
+        Commits the SQLite connection.
+        """
+        self.sqlite.commit()
+
+    def cursor(self):
+        """
+        Returns a LocalCursor.
+        """
+        return LocalCursor(self)
+
+    def rollback(self):
+        """
+        Rolls back the SQLite connection.
+        """
+        self.sqlite.rollback()
+
+    def get_stage_path(self, stage_ref):
+        """
+        Local directory for @stage/path.
+        """
+        matcher = STAGE_REGEX.match(stage_ref)
+        if matcher is None:
+            raise ProgrammingError(msg="Invalid stage %s!" % stage_ref)
+        stage_name, path = matcher.groups()
+        stage_name = stage_name.strip('"').lower()
+        stage_root = os.path.join(self.stage_dir, stage_name)
+        # Named stages need to be created first, table stages always exist.
+        if '%' not in stage_name and stage_name != '~' and \
+                not os.path.isdir(stage_root):
+            raise ProgrammingError(
+                msg="Stage '%s' does not exist or not authorized." %
+                stage_name.upper())
+
+        return stage_name, stage_root, path.strip('/')
+
+    def _load_sequence(self, name):
+        """
+        Reads the sequence state into memory for use by _nextval.
+        """
+        for value, increment in self.sqlite.execute(
+                "SELECT value, increment FROM _local_sequences WHERE name = ?",
+                (name, )):
+            self._sequences[name] = [value, increment]
+            return
+        raise ProgrammingError(
+            msg="Sequence '%s' does not exist or not authorized." %
+            name.upper())
+
+    def _nextval(self, name):
+        """
+        SQLite function backing <sequence>.nextval so every row gets its own
+        value within a statement.
+        """
+        sequence = self._sequences[name]
+        value = sequence[0]
+        sequence[0] += sequence[1]
+
+        return value
+
+    def _save_sequences(self):
+        """
+        Writes back the sequences used by the last statement.
+        """
+        for name, (value, _) in self._sequences.items():
+            self.sqlite.execute(
+                "UPDATE _local_sequences SET value = ? WHERE name = ?",
+                (value, name))
+        self._sequences.clear()
+
+
+class LocalCursor(object):
+    """
+    DB-API cursor. Emulated statements have their results held in memory,
+    everything else is run on a SQLite cursor.
+    """
+    arraysize = 1
+    sfqid = None
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._cursor = connection.sqlite.cursor()
+        self._rows = None
+        self.description = None
+        self.rowcount = -1
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        """
+        Closes the SQLite cursor.
+        """
+        self._cursor.close()
+
+    def execute(self, stmt, params=None):
+        """
+        Runs the statement emulating the Snowflake only statements.
+        Returns itself as the Snowflake cursor does.
+        """
+        self._rows = None
+        self.description = None
+        self.rowcount = -1
+        for regex, method in (
+                (CREATE_STAGE_REGEX, self._create_stage),
+                (CREATE_SEQUENCE_REGEX, self._create_sequence),
+                (PUT_REGEX, self._put),
+                (LIST_REGEX, self._list),
+                (REMOVE_REGEX, self._remove),
+                (COPY_REGEX, self._copy)):
+            matcher = regex.match(stmt)
+            if matcher is not None:
+                method(*matcher.groups())
+                return self
+        stmt = self._translate(stmt)
+        try:
+            if params is None:
+                self._cursor.execute(stmt)
+            else:
+                self._cursor.execute(stmt, params)
+        except sqlite3.Error as error:
+            raise ProgrammingError(msg=str(error))
+        finally:
+            self.connection._save_sequences()
+        self.description = self._cursor.description
+        self.rowcount = self._cursor.rowcount
+
+        return self
+
+    def executemany(self, stmt, seq_of_params):
+        """
+        Runs the statement for each set of binds.
+        """
+        self._rows = None
+        self.description = None
+        try:
+            self._cursor.executemany(self._translate(stmt), seq_of_params)
+        except sqlite3.Error as error:
+            raise ProgrammingError(msg=str(error))
+        finally:
+            self.connection._save_sequences()
+        self.rowcount = self._cursor.rowcount
+
+        return self
+
+    def fetchall(self):
+        """
+        All remaining rows.
+        """
+        if self._rows is not None:
+            rows, self._rows = self._rows, []
+            return rows
+
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size=None):
+        """
+        Up to size rows.
+        """
+        size = self.arraysize if size is None else size
+        if self._rows is not None:
+            rows, self._rows = self._rows[:size], self._rows[size:]
+            return rows
+
+        return self._cursor.fetchmany(size)
+
+    def fetchone(self):
+        """
+        Next row or None.
+        """
+        if self._rows is not None:
+            return self._rows.pop(0) if self._rows else None
+
+        return self._cursor.fetchone()
+
+    def _set_results(self, fields, rows):
+        """
+        Results for emulated statements.
+        """
+        self.description = [(field, None, None, None, None, None, None)
+                            for field in fields]
+        self._rows = list(rows)
+        self.rowcount = len(self._rows)
+
+    def _translate(self, stmt):
+        """
+        Rewrites Snowflake only syntax for SQLite.
+        """
+        matcher = CREATE_TABLE_REGEX.match(stmt)
+        if matcher is not None:
+            file_format = STAGE_FILE_FORMAT_REGEX.search(stmt)
+            if file_format is not None:
+                self.connection.sqlite.execute(
+                    "INSERT OR REPLACE INTO _local_file_formats VALUES(?, ?)",
+                    (matcher.group(1).lower(), file_format.group(1)))
+                stmt = stmt[:file_format.start()] + stmt[file_format.end():]
+        for name in set(NEXTVAL_REGEX.findall(stmt)):
+            self.connection._load_sequence(name.lower())
+        stmt = NEXTVAL_REGEX.sub(
+            lambda match: "_local_nextval('%s')" % match.group(1).lower(),
+            stmt)
+
+        return self._translate_casts(stmt)
+
+    @staticmethod
+    def _translate_casts(stmt):
+        """
+        expression::type to CAST(expression AS type) for simple expressions.
+        """
+        while True:
+            matcher = CAST_REGEX.search(stmt)
+            if matcher is None:
+                return stmt
+            start = matcher.start()
+            if stmt[start - 1] == ')':
+                depth = 0
+                for index in range(start - 1, -1, -1):
+                    depth += {')': 1, '(': -1}.get(stmt[index], 0)
+                    if depth == 0:
+                        start = index
+                        break
+            else:
+                token = re.search(r"('[^']*'|[\w.]+)$", stmt[:start])
+                start = token.start()
+            stmt = "%sCAST(%s AS %s)%s" % (
+                stmt[:start], stmt[start:matcher.start()], matcher.group(1),
+                stmt[matcher.end():])
+
+    def _create_stage(self, replace, if_not_exists, stage_name):
+        """
+        A stage is a directory under the stage_dir.
+        """
+        stage_root = os.path.join(self.connection.stage_dir,
+                                  stage_name.strip('"').lower())
+        if os.path.isdir(stage_root):
+            if replace:
+                shutil.rmtree(stage_root)
+            elif not if_not_exists:
+                raise ProgrammingError(
+                    msg="Object '%s' already exists." % stage_name.upper())
+        if not os.path.isdir(stage_root):
+            os.makedirs(stage_root)
+        self._set_results(
+            ['status'],
+            [("Stage area %s successfully created." % stage_name.upper(), )])
+
+    def _create_sequence(self, replace, if_not_exists, name, options):
+        """
+        Sequences are rows in the _local_sequences table.
+        """
+        name = name.lower()
+        options = parse_options(re.sub(r'\bSTART\s+WITH\b', 'START =',
+                                       options, flags=re.IGNORECASE))
+        exists = self.connection.sqlite.execute(
+            "SELECT 1 FROM _local_sequences WHERE name = ?",
+            (name, )).fetchone()
+        if exists and not replace:
+            if if_not_exists:
+                return self._set_results(['status'], [])
+            raise ProgrammingError(
+                msg="Object '%s' already exists." % name.upper())
+        self.connection.sqlite.execute(
+            "INSERT OR REPLACE INTO _local_sequences VALUES(?, ?, ?)",
+            (name, int(options.get('START', 1)),
+             int(options.get('INCREMENT', 1))))
+        self._set_results(
+            ['status'],
+            [("Sequence %s successfully created." % name.upper(), )])
+
+    def _put(self, source, stage_ref, options):
+        """
+        Copies local files into the stage directory.
+        AUTO_COMPRESS(default TRUE) gzips files not already compressed.
+        """
+        options = parse_options(options)
+        _, stage_root, path = self.connection.get_stage_path(stage_ref)
+        target_dir = os.path.join(stage_root, path)
+        if not os.path.isdir(target_dir):
+            os.makedirs(target_dir)
+        auto_compress = _is_true(options.get('AUTO_COMPRESS'), True)
+        rows = []
+        for source_file in sorted(glob.glob(source)):
+            target = os.path.basename(source_file)
+            is_compressed = target.endswith('.gz')
+            if auto_compress and not is_compressed:
+                target += '.gz'
+                with open(source_file, 'rb') as in_file, \
+                        gzip.open(os.path.join(target_dir, target),
+                                  'wb') as out_file:
+                    shutil.copyfileobj(in_file, out_file)
+            else:
+                shutil.copyfile(source_file, os.path.join(target_dir, target))
+            compression = 'GZIP' if is_compressed or auto_compress else 'NONE'
+            rows.append((os.path.basename(source_file), target,
+                         os.path.getsize(source_file),
+                         os.path.getsize(os.path.join(target_dir, target)),
+                         'GZIP' if is_compressed else 'NONE', compression,
+                         'UPLOADED', ''))
+        self._set_results([
+            'source', 'target', 'source_size', 'target_size',
+            'source_compression', 'target_compression', 'status', 'message'
+        ], rows)
+
+    def _staged_files(self, stage_ref, pattern=None):
+        """
+        Yields (name, file path) for the files under @stage/path.
+        """
+        stage_name, stage_root, path = self.connection.get_stage_path(
+            stage_ref)
+        for root, _, files in os.walk(stage_root):
+            for file_name in sorted(files):
+                file_path = os.path.join(root, file_name)
+                relative = os.path.relpath(file_path, stage_root)
+                if path and not relative.startswith(path):
+                    continue
+                if pattern and not re.match(pattern, relative):
+                    continue
+                yield '/'.join([stage_name] + relative.split(os.sep)), \
+                    file_path
+
+    def _list(self, stage_ref, options):
+        """
+        Same columns as the Snowflake LIST.
+        """
+        rows = []
+        for name, file_path in self._staged_files(
+                stage_ref, parse_options(options).get('PATTERN')):
+            md5 = hashlib.md5()
+            with open(file_path, 'rb') as in_file:
+                for chunk in iter(lambda: in_file.read(1048576), b''):
+                    md5.update(chunk)
+            rows.append((name, os.path.getsize(file_path), md5.hexdigest(),
+                         datetime.utcfromtimestamp(
+                             os.path.getmtime(file_path)).strftime(
+                                 '%a, %d %b %Y %H:%M:%S GMT')))
+        self._set_results(['name', 'size', 'md5', 'last_modified'], rows)
+
+    def _remove(self, stage_ref, options):
+        """
+        Deletes staged files.
+        """
+        rows = []
+        for name, file_path in list(
+                self._staged_files(stage_ref,
+                                   parse_options(options).get('PATTERN'))):
+            os.remove(file_path)
+            rows.append((name, 'removed'))
+        self._set_results(['name', 'result'], rows)
+
+    def _copy(self, table_name, columns, stage_ref, options):
+        """
+        Loads delimited files from the stage into the table.
+        Supports the FILE_FORMAT options TYPE = CSV, COMPRESSION,
+        FIELD_DELIMITER, SKIP_HEADER, TRIM_SPACE, NULL_IF,
+        ERROR_ON_COLUMN_COUNT_MISMATCH and the copy options PATTERN and
+        PURGE.
+        Unlike Snowflake there is no load history so files are loaded again
+        if they are still in the stage.
+        """
+        options = parse_options(options)
+        file_format = {}
+        for stored, in self.connection.sqlite.execute(
+                "SELECT file_format FROM _local_file_formats "
+                "WHERE table_name = ?", (table_name.lower(), )):
+            file_format.update(parse_options(stored))
+        file_format.update(options.get('FILE_FORMAT') or {})
+        if columns:
+            columns = [column.strip() for column in columns.split(',')]
+        else:
+            columns = [
+                row[1] for row in self.connection.sqlite.execute(
+                    "PRAGMA table_info(%s)" % table_name)
+            ]
+        if not columns:
+            raise ProgrammingError(
+                msg="Table '%s' does not exist or not authorized." %
+                table_name.upper())
+        insert = "INSERT INTO %s(%s) VALUES(%s)" % (
+            table_name, ', '.join(columns), ', '.join('?' * len(columns)))
+        rows = []
+        for name, file_path in list(
+                self._staged_files(stage_ref, options.get('PATTERN'))):
+            parsed = self._load_file(file_path, insert, len(columns),
+                                     file_format)
+            rows.append((name, 'LOADED', parsed, parsed))
+            if _is_true(options.get('PURGE')):
+                os.remove(file_path)
+        self._set_results(['file', 'status', 'rows_parsed', 'rows_loaded'],
+                          rows)
+        self.rowcount = sum(row[3] for row in rows)
+
+    def _load_file(self, file_path, insert, column_count, file_format):
+        """
+        Inserts the rows of a single staged file. Returns the row count.
+        """
+        compression = str(file_format.get('COMPRESSION', 'AUTO')).upper()
+        if compression == 'GZIP' or (compression == 'AUTO' and
+                                     file_path.endswith('.gz')):
+            in_file = io.TextIOWrapper(
+                gzip.open(file_path, 'rb'), encoding='utf-8', newline='')
+        else:
+            in_file = open(file_path, 'r', encoding='utf-8', newline='')
+        null_if = file_format.get('NULL_IF', '\\N')
+        if isinstance(null_if, dict) or null_if is None:
+            null_if = '\\N'
+        trim_space = _is_true(file_format.get('TRIM_SPACE'))
+        check_count = _is_true(
+            file_format.get('ERROR_ON_COLUMN_COUNT_MISMATCH'), True)
+        skip = int(file_format.get('SKIP_HEADER', 0))
+
+        def _rows():
+            reader = csv.reader(
+                in_file,
+                delimiter=file_format.get('FIELD_DELIMITER', ','),
+                quoting=csv.QUOTE_NONE,
+                escapechar='\\')
+            for index, row in enumerate(reader):
+                if index < skip:
+                    continue
+                if trim_space:
+                    row = [value.strip() for value in row]
+                row = [
+                    None if value == '' or value == null_if else value
+                    for value in row
+                ]
+                if len(row) != column_count:
+                    if check_count:
+                        raise ProgrammingError(
+                            msg="Number of columns in file (%s) does not "
+                            "match that of the corresponding table (%s) in "
+                            "%s line %s" % (len(row), column_count,
+                                            file_path, index + 1))
+                    row = (row + [None] * column_count)[:column_count]
+                yield row
+
+        with in_file:
+            cursor = self.connection.sqlite.executemany(insert, _rows())
+
+        return cursor.rowcount
@@ -4,6 +4,10 @@ Base for db connections for OX.
 import pyodbc
 import psycopg2
 import snowflake.connector
+from .bulk import BATCH_SIZE, execute_many
+from .fetch import ROWS, iter_batches
+from . import instrument, local, query
+from .retry import RetryPolicy, is_read_only, is_transient
 from .settings import ENV
 
 
@@ -11,16 +15,32 @@ class OXDB(object):
     """
     This will return a database connection.
     Supports connecting to pyodbc supporting databases, postgres and snowflake.
+    TYPE LOCAL is a SQLite stand in for snowflake to run ETLs offline.
     Required:
         1) connection_name: A defined DB_CONNECTION in env.yaml
     Optional:.
         1) transactions_support - default is True. For non-transactional
                data sources like Impala, Hive it should be set to False.
+        2) retry_policy - default is from the RETRY section of the
+               DB_CONNECTION. See RetryPolicy.
+    Transient errors such as a dropped session reconnect with backoff.
+    The statement is replayed on the new session when it is read only or
+    executed with idempotent=True and nothing was left uncommitted.
     Examples:
         db = OXDB(connection_name)
         # Iterate over returned rows
         for row in db.get_executed_cursor(query):
             ...
+        # Stream large results a batch at a time
+        for rows in db.iter_batches(query, batch_size=10000):
+            ...
+        # Overlap independent statements on the one session
+        handles = [db.submit(statement) for statement in statements]
+        db.wait(handles)
+        # Replayed on a new session after a transient error
+        db.execute(merge_stmt, idempotent=True)
+        # Many rows of binds in a few round trips
+        db.execute_many(insert_stmt, rows, batch_size=10000).rowcount
         with OXDB(connection_name) as oxdb:
             for statement in statements:
                 oxdb.execute(statement)
@@ -30,22 +50,43 @@ class OXDB(object):
             # Will rollback if an exception is raised within the with block.
     """
 
-    def __init__(self, connection_name, transactions_support=True):
+    def __init__(self, connection_name, transactions_support=True,
+                 retry_policy=None):
         self.connection_name = connection_name
         self.transaction_support = transactions_support
+        if retry_policy is None:
+            retry_policy = RetryPolicy.from_conf(
+                (ENV.get('DB_CONNECTIONS') or {}).get(connection_name,
+                                                      {}).get('RETRY'))
+        self.retry_policy = retry_policy
         self._connection = None
+        self._uncommitted = False
 
     def close(self):
         """
-        Closes the connection.
+        Closes the connection if one was opened.
         """
-        self.connection.close()
+        if self._connection is None:
+            return
+        connection, self._connection = self._connection, None
+        self._uncommitted = False
+        connection.close()
 
     def commit(self):
         """
         Calls commit on the connection.
         """
         self.connection.commit()
+        self._uncommitted = False
+
+    def cursor(self):
+        """
+        Returns a new cursor so OXDB can be passed where a DB-API connection
+        is expected. After a reconnect new cursors are on the new session.
+        Nothing run on it is replayed and once it runs anything that is not
+        read only nothing else is replayed until commit or rollback.
+        """
+        return _TrackedCursor(self, self.connection.cursor())
 
     @property
     def connection(self):
@@ -53,69 +94,233 @@ class OXDB(object):
         Connection is created once for the instance.
         For transactional databases autocommit is set to False and
         for non transactional databases autocommit is set to True.
+        Transient connect errors are retried per the retry_policy.
         """
-        if self._connection is None:
-            conf = ENV['DB_CONNECTIONS'].get(self.connection_name)
-            if conf is None:
-                raise ValueError("Invalid connection name %s!" % self.connection_name)
+        attempt = 0
+        while self._connection is None:
+            try:
+                self._connection = self._connect()
+            except Exception as error:
+                attempt += 1
+                if not is_transient(error) or not self._backoff(attempt):
+                    raise
 
-            if conf['TYPE'] == 'ODBC':
-                """
-                Databases with ODBC connection type use pyodbc to establish connection.
-                """
-                if self.transaction_support:
-                    self._connection = pyodbc.connect(
-                        "DSN=%s" % conf['DSN'], autocommit=False)
-                else:
-                    """
-                    For non transaction databases like Impala autocommit should be explicitly
-                    specified to prevent ODBC error. After connection is made pyodbc
-                    attempts to turn the autocommit feature off by default, hence
-                    pyodbc throws error for non transactional database if autocommit
-                    is not specified.
-                    """
-                    self._connection = pyodbc.connect(
-                        "DSN=%s" % conf['DSN'], autocommit=True)
-            elif conf['TYPE'] == 'POSTGRESQL':
-                """
-                For postgres database use psycopg2 for connection.
-                """
-                self._connection = psycopg2.connect(**conf['KWARGS'])
-            elif conf['TYPE'] == 'SNOWFLAKE':
+        return self._connection
+
+    def _connect(self):
+        """
+        Returns a new DB-API connection for the connection_name.
+        """
+        conf = ENV['DB_CONNECTIONS'].get(self.connection_name)
+        if conf is None:
+            raise ValueError("Invalid connection name %s!" % self.connection_name)
+
+        if conf['TYPE'] == 'ODBC':
+            """
+            Databases with ODBC connection type use pyodbc to establish connection.
+            """
+            if self.transaction_support:
+                return pyodbc.connect(
+                    "DSN=%s" % conf['DSN'], autocommit=False)
+            else:
                 """
-                For snowflake database using python snow connect for database connection.
+                For non transaction databases like Impala autocommit should be explicitly
+                specified to prevent ODBC error. After connection is made pyodbc
+                attempts to turn the autocommit feature off by default, hence
+                pyodbc throws error for non transactional database if autocommit
+                is not specified.
                 """
-                self._connection = snowflake.connector.connect(**conf['KWARGS'])
-            else:
-                raise ValueError("Not configured for type %s!" % conf['TYPE'])
-
-        return self._connection
+                return pyodbc.connect(
+                    "DSN=%s" % conf['DSN'], autocommit=True)
+        elif conf['TYPE'] == 'POSTGRESQL':
+            """
+            For postgres database use psycopg2 for connection.
+            """
+            return psycopg2.connect(**conf['KWARGS'])
+        elif conf['TYPE'] == 'SNOWFLAKE':
+            """
+            For snowflake database using python snow connect for database connection.
+            """
+            return snowflake.connector.connect(**conf['KWARGS'])
+        elif conf['TYPE'] == 'LOCAL':
+            """
+            SQLite emulating the snowflake stages, PUT, LIST and COPY INTO.
+            """
+            return local.connect(**conf.get('KWARGS', {}))
+        else:
+            raise ValueError("Not configured for type %s!" % conf['TYPE'])
 
     def execute(self, *args, **kwargs):
         """
         Executes a statement and returns the row count affected.
+        idempotent=True allows the statement to be replayed on a new session.
         """
-        cursor = self.get_executed_cursor(*args)
+        cursor = self.get_executed_cursor(
+            *args, idempotent=kwargs.get('idempotent', False))
         if 'commit' in kwargs and isinstance(kwargs['commit'], bool) \
                 and kwargs['commit']:
             self.commit()
 
         return cursor.rowcount
 
-    def get_executed_cursor(self, *args):
+    def execute_many(self, stmt, rows, batch_size=BATCH_SIZE, commit=False):
+        """
+        Executes the stmt for every row of binds in batches of batch_size
+        using the fastest bulk path for the driver.
+        Returns a BulkResult with the total rowcount and per batch timings.
+        """
+        with instrument.timed(stmt) as stats:
+            self._uncommitted = self.transaction_support
+            result = execute_many(
+                self.connection, stmt, rows, batch_size=batch_size)
+            stats['rowcount'] = result.rowcount
+        if commit:
+            self.commit()
+
+        return result
+
+    def get_executed_cursor(self, *args, idempotent=False):
         """
         Returns a cursor with the executed statement.
+        Timing is recorded by any instrument sinks.
+        After a transient error the statement is replayed on a new session
+        when it is read only or idempotent and nothing was left uncommitted.
         """
-        cursor = self.connection.cursor()
-        cursor.execute(*args)
+        replayable = idempotent or is_read_only(args[0])
+        attempt = 0
+        while True:
+            uncommitted = self._uncommitted
+            cursor = self.connection.cursor()
+            try:
+                with instrument.timed(args[0], cursor):
+                    cursor.execute(*args)
+            except Exception as error:
+                if not is_transient(error):
+                    raise
+                instrument.increment('transient_errors')
+                attempt += 1
+                if not replayable or uncommitted or \
+                        not self.recover(attempt):
+                    # The session is gone so start a new one on next use.
+                    self._discard_connection()
+                    raise
+                continue
+            if not replayable:
+                self._uncommitted = self.transaction_support
 
-        return cursor
+            return cursor
+
+    def iter_batches(self, *args, batch_size=BATCH_SIZE, fmt=ROWS):
+        """
+        Executes the query and yields the results in batches so large results
+        stream in bounded memory.
+        batch_size: Max rows per batch.
+        fmt: rows(list of tuples), arrow(pyarrow.RecordBatch) or
+             numpy(OrderedDict of column arrays). arrow and numpy need the
+             snowflake connector with pyarrow.
+        """
+        cursor = self.get_executed_cursor(*args)
+        try:
+            for batch in iter_batches(cursor, batch_size=batch_size, fmt=fmt):
+                yield batch
+        finally:
+            cursor.close()
+
+    def result(self, handle, timeout=None, poll_interval=query.POLL_INTERVAL):
+        """
+        Waits on a submitted query and returns the cursor with its results.
+        """
+        return query.result(
+            self.connection, handle, timeout=timeout,
+            poll_interval=poll_interval)
+
+    async def result_async(self, handle, timeout=None,
+                           poll_interval=query.POLL_INTERVAL):
+        """
+        Same as result but polls without blocking the event loop.
+        """
+        return await query.result_async(
+            self.connection, handle, timeout=timeout,
+            poll_interval=poll_interval)
+
+    def submit(self, *args):
+        """
+        Starts a statement on the server and returns a QueryHandle without
+        waiting on it so independent statements can overlap on one session.
+        Drivers without asynchronous support execute it before returning.
+        """
+        return query.submit(self.connection, *args)
+
+    def wait(self, handles, timeout=None, poll_interval=query.POLL_INTERVAL):
+        """
+        Blocks until all of the submitted handles have finished.
+        Raises the error of any query that failed.
+        """
+        return query.wait(
+            self.connection, handles, timeout=timeout,
+            poll_interval=poll_interval)
+
+    async def wait_async(self, handles, timeout=None,
+                         poll_interval=query.POLL_INTERVAL):
+        """
+        Same as wait but polls without blocking the event loop.
+        """
+        return await query.wait_async(
+            self.connection, handles, timeout=timeout,
+            poll_interval=poll_interval)
+
+    def reconnect(self):
+        """
+        Replaces the session with a new one. Anything uncommitted is lost.
+        """
+        self._discard_connection()
+        instrument.increment('reconnects')
+
+        return self.connection
+
+    def recover(self, attempt):
+        """
+        Waits out the backoff for retry number attempt then reconnects.
+        For callers replaying a whole unit of work after a transient error.
+        Returns False without reconnecting when the attempts are used up.
+        """
+        if not self._backoff(attempt):
+            return False
+        self.reconnect()
+
+        return True
 
     def rollback(self):
         """
         Calls rollback() on the connection.
         """
         self.connection.rollback()
+        self._uncommitted = False
+
+    def _backoff(self, attempt):
+        """
+        Sleeps before retry number attempt.
+        Returns False when the retry_policy attempts are used up.
+        """
+        if attempt >= self.retry_policy.max_attempts:
+            instrument.increment('retries_exhausted')
+            return False
+        self.retry_policy.sleep(attempt)
+        instrument.increment('retries')
+
+        return True
+
+    def _discard_connection(self):
+        """
+        Closes the connection ignoring errors as it may already be dead.
+        """
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+        self._connection = None
+        self._uncommitted = False
 
     def __enter__(self):
         """
@@ -143,3 +348,59 @@ class OXDB(object):
             self.close()
         except Exception:
             pass
+
+
+class _TrackedCursor(object):
+    """
+    DB-API cursor from OXDB.cursor that marks the session uncommitted when a
+    statement that is not read only is executed on it and records the timing
+    of each statement with the instrument sinks.
+    """
+
+    def __init__(self, oxdb, cursor):
+        self._oxdb = oxdb
+        self._cursor = cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._cursor, name, value)
+
+    def execute(self, stmt, *args, **kwargs):
+        """
+        Same as the driver cursor's execute.
+        Timing is recorded by any instrument sinks.
+        """
+        self._track(stmt)
+        with instrument.timed(stmt, self._cursor):
+            return self._wrap(self._cursor.execute(stmt, *args, **kwargs))
+
+    def executemany(self, stmt, *args, **kwargs):
+        """
+        Same as the driver cursor's executemany.
+        Timing is recorded by any instrument sinks.
+        """
+        self._track(stmt)
+        with instrument.timed(stmt, self._cursor):
+            return self._wrap(self._cursor.executemany(stmt, *args, **kwargs))
+
+    def _track(self, stmt):
+        if self._oxdb.transaction_support and not is_read_only(stmt):
+            self._oxdb._uncommitted = True
+
+    def _wrap(self, result):
+        # Drivers such as sqlite3 and snowflake return the cursor itself.
+        return self if result is self._cursor else result
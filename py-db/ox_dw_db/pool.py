@@ -0,0 +1,314 @@
+"""
+Pool of warm OXDB connections keyed by connection_name.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from .exceptions import PoolTimeoutError
+from .oxdb import OXDB
+from .settings import ENV
+
+MIN_SIZE = 0
+MAX_SIZE = 5
+MAX_IDLE_SECONDS = 300
+TIMEOUT_SECONDS = 60
+HEALTH_CHECK = 'SELECT 1'
+
+
+class OXDBPool(object):
+    """
+    Thread safe pool of OXDB objects for a single connection_name.
+    Use OXDBPool.get(connection_name) to share one pool per process.
+    Defaults can be overridden in env.yaml per connection:
+        DB_CONNECTIONS:
+            SNOWFLAKE:
+                TYPE: SNOWFLAKE
+                KWARGS: ...
+                POOL:
+                    MIN_SIZE: 1
+                    MAX_SIZE: 5
+                    MAX_IDLE_SECONDS: 300
+                    TIMEOUT_SECONDS: 60
+                    HEALTH_CHECK: SELECT 1
+    Examples:
+        with pooled(connection_name) as oxdb:
+            oxdb.execute(statement)
+            # Will commit on exit if no errors and return to the pool.
+            # Will rollback if an exception is raised within the with block.
+    """
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, connection_name, transactions_support=True, **kwargs):
+        conf = ENV['DB_CONNECTIONS'].get(connection_name)
+        if conf is None:
+            raise ValueError("Invalid connection name %s!" % connection_name)
+        pool_conf = dict(conf.get('POOL') or {})
+        pool_conf.update(
+            (key.upper(), value) for key, value in kwargs.items()
+            if value is not None)
+        self.connection_name = connection_name
+        self.transactions_support = transactions_support
+        self.min_size = int(pool_conf.get('MIN_SIZE', MIN_SIZE))
+        self.max_size = int(pool_conf.get('MAX_SIZE', MAX_SIZE))
+        self.max_idle = float(
+            pool_conf.get('MAX_IDLE_SECONDS', MAX_IDLE_SECONDS))
+        self.timeout = float(pool_conf.get('TIMEOUT_SECONDS', TIMEOUT_SECONDS))
+        self.health_check = pool_conf.get('HEALTH_CHECK', HEALTH_CHECK)
+        if self.max_size < 1 or self.min_size > self.max_size:
+            raise ValueError(
+                "Invalid pool sizes MIN_SIZE(%s) MAX_SIZE(%s) for %s!" %
+                (self.min_size, self.max_size, connection_name))
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._size = 0
+        self._pid = os.getpid()
+
+    @classmethod
+    def get(cls, connection_name, transactions_support=True, **kwargs):
+        """
+        Returns the process wide pool for the connection_name.
+        Options are only used the first time the pool is created.
+        """
+        key = (connection_name, transactions_support)
+        created = False
+        with cls._pools_lock:
+            if key not in cls._pools:
+                cls._pools[key] = cls(
+                    connection_name,
+                    transactions_support=transactions_support,
+                    **kwargs)
+                created = True
+            pool = cls._pools[key]
+        if created:
+            pool.fill()
+
+        return pool
+
+    @classmethod
+    def close_all(cls):
+        """
+        Closes every pool created in this process.
+        """
+        with cls._pools_lock:
+            pools = list(cls._pools.values())
+            cls._pools.clear()
+        for pool in pools:
+            pool.close()
+
+    @property
+    def size(self):
+        """
+        Number of connections owned by the pool, both idle and checked out.
+        """
+        return self._size
+
+    @property
+    def idle(self):
+        """
+        Number of connections waiting in the pool to be checked out.
+        """
+        return len(self._idle)
+
+    def acquire(self):
+        """
+        Checks out a healthy OXDB, opening a new one if none are idle and the
+        pool is not full. Blocks up to the timeout when the pool is full.
+        :raises PoolTimeoutError:
+        """
+        self._check_pid()
+        deadline = time.time() + self.timeout
+        while True:
+            oxdb = None
+            evicted = []
+            try:
+                with self._condition:
+                    evicted.extend(self._evict_idle())
+                    while not self._idle and self._size >= self.max_size:
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            raise PoolTimeoutError(
+                                self.connection_name, self.max_size,
+                                self.timeout)
+                        self._condition.wait(remaining)
+                        evicted.extend(self._evict_idle())
+                    if self._idle:
+                        # Most recently used first as it is the warmest.
+                        oxdb, _ = self._idle.pop()
+                    else:
+                        self._size += 1
+            finally:
+                for stale in evicted:
+                    self._close(stale)
+            if oxdb is None:
+                try:
+                    return self._open()
+                except Exception:
+                    self._discard()
+                    raise
+            if self._is_healthy(oxdb):
+                return oxdb
+            self._close(oxdb)
+            self._discard()
+
+    def release(self, oxdb, discard=False):
+        """
+        Returns the OXDB to the pool after rolling back anything that was not
+        committed. Broken connections should be released with discard=True.
+        """
+        if os.getpid() != self._pid:
+            return
+        if not discard:
+            try:
+                oxdb.rollback()
+            except Exception:
+                discard = True
+        if discard:
+            self._close(oxdb)
+            self._discard()
+            return
+        with self._condition:
+            self._idle.append((oxdb, time.time()))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Checks out an OXDB for the with block.
+        Commits on exit or rolls back if an exception is raised.
+        """
+        oxdb = self.acquire()
+        try:
+            yield oxdb
+        except BaseException:
+            # Release rolls back before returning it to the pool.
+            self.release(oxdb)
+            raise
+        try:
+            oxdb.commit()
+        except Exception:
+            self.release(oxdb, discard=True)
+            raise
+        self.release(oxdb)
+
+    def fill(self):
+        """
+        Opens connections until there are at least MIN_SIZE in the pool.
+        """
+        self._check_pid()
+        while True:
+            with self._condition:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                oxdb = self._open()
+            except Exception:
+                self._discard()
+                raise
+            self.release(oxdb)
+
+    def close(self):
+        """
+        Closes all of the idle connections.
+        Connections still checked out will return to the pool when released.
+        """
+        with self._condition:
+            idle = [oxdb for oxdb, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for oxdb in idle:
+            self._close(oxdb)
+
+    def _check_pid(self):
+        """
+        Connections cannot be shared with a forked child so start fresh in the
+        child without closing the parent's sessions.
+        """
+        if os.getpid() != self._pid:
+            with self._condition:
+                if os.getpid() != self._pid:
+                    for oxdb, _ in self._idle:
+                        # Closing would log out the parent's session.
+                        oxdb._connection = None
+                    self._idle.clear()
+                    self._size = 0
+                    self._condition = threading.Condition()
+                    self._pid = os.getpid()
+
+    def _close(self, oxdb):
+        """
+        Closes ignoring any errors since the connection may already be broken.
+        """
+        try:
+            oxdb.close()
+        except Exception:
+            pass
+        oxdb._connection = None
+
+    def _discard(self):
+        """
+        Frees up a slot in the pool.
+        """
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def _evict_idle(self):
+        """
+        Removes idle connections past MAX_IDLE_SECONDS keeping MIN_SIZE.
+        Needs to be called holding the condition. Returns the evicted ones to
+        be closed once the condition is released.
+        """
+        evicted = []
+        now = time.time()
+        while self._idle and self._size > self.min_size and \
+                now - self._idle[0][1] > self.max_idle:
+            oxdb, _ = self._idle.popleft()
+            self._size -= 1
+            evicted.append(oxdb)
+
+        return evicted
+
+    def _is_healthy(self, oxdb):
+        """
+        Runs the health check on checkout.
+        """
+        if not self.health_check:
+            return True
+        try:
+            cursor = oxdb.get_executed_cursor(self.health_check)
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _open(self):
+        """
+        Opens a new connection.
+        """
+        oxdb = OXDB(
+            self.connection_name,
+            transactions_support=self.transactions_support)
+        # Connect now so authentication errors surface on checkout.
+        oxdb.connection
+
+        return oxdb
+
+
+@contextmanager
+def pooled(connection_name, transactions_support=True, **kwargs):
+    """
+    Checks out an OXDB from the process wide pool for the connection_name.
+    Commits on exit or rolls back if an exception is raised and returns the
+    connection to the pool instead of closing it.
+    """
+    with OXDBPool.get(
+            connection_name,
+            transactions_support=transactions_support,
+            **kwargs).connection() as oxdb:
+        yield oxdb
@@ -0,0 +1,141 @@
+"""
+Fire and poll query execution.
+"""
+import asyncio
+import time
+from collections import namedtuple
+
+POLL_INTERVAL = 1  # seconds
+
+
+class QueryHandle(
+        namedtuple('QueryHandle', ['query_id', 'stmt', 'cursor'])):
+    """
+    Returned by submit. query_id is None when the driver does not support
+    asynchronous execution and the statement already ran on submit.
+    """
+
+    __slots__ = ()
+
+    @property
+    def is_async(self):
+        """
+        Is the statement running on the server side?
+        """
+        return self.query_id is not None
+
+
+def supports_async(connection):
+    """
+    Can the connection submit queries without waiting on them?
+    Snowflake connector>=2.5 only.
+    """
+    return hasattr(connection, 'get_query_status_throw_if_error')
+
+
+def submit(connection, *args):
+    """
+    Starts the statement and returns a QueryHandle without waiting on it.
+    Falls back to executing it right away when not supported.
+    """
+    cursor = connection.cursor()
+    if supports_async(connection):
+        cursor.execute_async(*args)
+        return QueryHandle(cursor.sfqid, args[0], cursor)
+    cursor.execute(*args)
+
+    return QueryHandle(None, args[0], cursor)
+
+
+def is_running(connection, handle):
+    """
+    Is the query still running?
+    :raises: The driver error if the query failed.
+    """
+    if not handle.is_async:
+        return False
+
+    return connection.is_still_running(
+        connection.get_query_status_throw_if_error(handle.query_id))
+
+
+def wait(connection, handles, timeout=None, poll_interval=POLL_INTERVAL):
+    """
+    Blocks until all of the handles have finished.
+    :raises: The driver error from the first failed query.
+    :raises TimeoutError: If timeout seconds passed first.
+    :return list: The handles.
+    """
+    handles = _as_list(handles)
+    deadline = None if timeout is None else time.time() + timeout
+    pending = list(handles)
+    while True:
+        pending = [
+            handle for handle in pending if is_running(connection, handle)
+        ]
+        if not pending:
+            return handles
+        _check_deadline(deadline, pending)
+        time.sleep(poll_interval)
+
+
+async def wait_async(connection, handles, timeout=None,
+                     poll_interval=POLL_INTERVAL):
+    """
+    Same as wait but yields to the event loop between polls.
+    """
+    handles = _as_list(handles)
+    deadline = None if timeout is None else time.time() + timeout
+    pending = list(handles)
+    while True:
+        pending = [
+            handle for handle in pending if is_running(connection, handle)
+        ]
+        if not pending:
+            return handles
+        _check_deadline(deadline, pending)
+        await asyncio.sleep(poll_interval)
+
+
+def result(connection, handle, timeout=None, poll_interval=POLL_INTERVAL):
+    """
+    Waits for the query and returns the cursor with its results.
+    """
+    wait(connection, handle, timeout=timeout, poll_interval=poll_interval)
+    if handle.is_async:
+        handle.cursor.get_results_from_sfqid(handle.query_id)
+
+    return handle.cursor
+
+
+async def result_async(connection, handle, timeout=None,
+                       poll_interval=POLL_INTERVAL):
+    """
+    Same as result but yields to the event loop between polls.
+    """
+    await wait_async(
+        connection, handle, timeout=timeout, poll_interval=poll_interval)
+    if handle.is_async:
+        handle.cursor.get_results_from_sfqid(handle.query_id)
+
+    return handle.cursor
+
+
+def _as_list(handles):
+    """
+    Allow a single handle to be passed in.
+    """
+    if isinstance(handles, QueryHandle):
+        return [handles]
+
+    return list(handles)
+
+
+def _check_deadline(deadline, pending):
+    """
+    :raises TimeoutError: When past the deadline.
+    """
+    if deadline is not None and time.time() >= deadline:
+        raise TimeoutError(
+            "Still waiting on query id(s) %s!" %
+            ', '.join(str(handle.query_id) for handle in pending))
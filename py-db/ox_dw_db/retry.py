@@ -0,0 +1,113 @@
+"""
+Classifying transient errors and backing off between retries.
+"""
+import random
+import re
+import time
+
+MAX_ATTEMPTS = 3
+BASE_DELAY_SECONDS = 1
+MAX_DELAY_SECONDS = 30
+
+# SQLSTATE classes/codes for lost connections, timeouts and serialization.
+TRANSIENT_SQLSTATES = ('08', 'HYT00', 'HYT01', '40001', '57P01', '57P02',
+                       '57P03')
+# Snowflake connector errnos for dropped sessions and network failures.
+TRANSIENT_ERRNOS = (250001, 250003, 251005, 251006, 390111, 390112, 390114)
+TRANSIENT_MESSAGES = re.compile(
+    r'session no longer exists|authentication token has expired|'
+    r'connection (?:reset|refused|aborted|timed out)|'
+    r'connection already closed|server closed the connection|'
+    r'broken pipe|communication link failure|could not connect',
+    re.IGNORECASE)
+READ_ONLY_REGEX = re.compile(
+    r'^\s*(?:SELECT|WITH|SHOW|DESC|DESCRIBE|EXPLAIN|LIST|LS)\b',
+    re.IGNORECASE)
+
+
+def is_read_only(stmt):
+    """
+    Statements that can always be replayed on a fresh session.
+    """
+    return bool(READ_ONLY_REGEX.match(str(stmt)))
+
+
+def is_transient(error):
+    """
+    Did the error come from a dropped session or network blip rather than
+    the statement itself?
+    Works across pyodbc(args[0] is the SQLSTATE), psycopg2(pgcode) and the
+    snowflake connector(errno and sqlstate).
+    """
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if getattr(error, 'errno', None) in TRANSIENT_ERRNOS:
+        return True
+    sqlstates = [
+        getattr(error, 'sqlstate', None),
+        getattr(error, 'pgcode', None)
+    ]
+    if error.args and isinstance(error.args[0], str):
+        sqlstates.append(error.args[0])
+    for sqlstate in sqlstates:
+        if sqlstate and len(sqlstate) == 5 and \
+                str(sqlstate).startswith(TRANSIENT_SQLSTATES):
+            return True
+    if type(error).__name__ in ('OperationalError', 'InterfaceError') and \
+            type(error).__module__.split('.')[0] == 'psycopg2':
+        return True
+
+    return bool(TRANSIENT_MESSAGES.search(str(error)))
+
+
+class RetryPolicy(object):
+    """
+    Jittered exponential backoff. Defaults can be overridden in env.yaml per
+    connection:
+        DB_CONNECTIONS:
+            SNOWFLAKE:
+                TYPE: SNOWFLAKE
+                KWARGS: ...
+                RETRY:
+                    MAX_ATTEMPTS: 3  # 1 turns retries off
+                    BASE_DELAY_SECONDS: 1
+                    MAX_DELAY_SECONDS: 30
+    """
+
+    def __init__(self,
+                 max_attempts=MAX_ATTEMPTS,
+                 base_delay=BASE_DELAY_SECONDS,
+                 max_delay=MAX_DELAY_SECONDS):
+        if max_attempts < 1:
+            raise ValueError("MAX_ATTEMPTS must be at least 1!")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_conf(cls, conf):
+        """
+        From the RETRY section of a DB_CONNECTION.
+        """
+        conf = conf or {}
+
+        return cls(
+            max_attempts=int(conf.get('MAX_ATTEMPTS', MAX_ATTEMPTS)),
+            base_delay=float(
+                conf.get('BASE_DELAY_SECONDS', BASE_DELAY_SECONDS)),
+            max_delay=float(conf.get('MAX_DELAY_SECONDS', MAX_DELAY_SECONDS)))
+
+    def delay(self, attempt):
+        """
+        Seconds to wait before retry number attempt(1 based).
+        Full jitter so many processes losing the same session do not
+        reconnect in lock step.
+        """
+        return random.uniform(
+            0, min(self.max_delay, self.base_delay * 2**(attempt - 1)))
+
+    def sleep(self, attempt):
+        """
+        Waits out the delay for the attempt.
+        """
+        time.sleep(self.delay(attempt))
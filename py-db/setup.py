@@ -14,9 +14,14 @@ setup(
     packages=find_packages(),
     install_requires=[
         'psycopg2==2.7.3.1',
-        'pyodbc>=3.0.10,<4',
-        'snowflake-connector-python>=1.5.2,<2'
+        'pyodbc>=4.0.19,<5',
+        'snowflake-connector-python>=2.5.0,<3'
     ],
+    extras_require={
+        # iter_batches fmt='arrow'/'numpy'. The connector extra brings the
+        # pyarrow its arrow fetching was built against, and numpy with it.
+        'arrow': ['snowflake-connector-python[pandas]>=2.5.0,<3', 'numpy']
+    },
     classifiers=[
         'Development Status :: 3 - Alpha',
         'Operating System :: MacOS :: MacOS X',
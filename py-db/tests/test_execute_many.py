@@ -0,0 +1,85 @@
+import sqlite3
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from ox_dw_db import bulk, local
+from ox_dw_db.oxdb import OXDB
+from ox_dw_db.util import ignore_warnings
+
+SNOWFLAKE_CONNECTION_NAME = 'SNOWFLAKE'
+ROWS = [(index, 'value %s' % index) for index in range(25)]
+
+
+class TestExecuteMany(unittest.TestCase):
+    @ignore_warnings
+    def setUp(self):
+        self.dbh = OXDB(SNOWFLAKE_CONNECTION_NAME)
+        self.dbh.execute(
+            "CREATE TEMPORARY TABLE test_execute_many(id int, name varchar)")
+
+    def tearDown(self):
+        self.dbh.execute("DROP TABLE IF EXISTS test_execute_many")
+        self.dbh.close()
+
+    def test_rowcount(self):
+        result = self.dbh.execute_many(
+            "INSERT INTO test_execute_many(id, name) VALUES(?, ?)", ROWS,
+            batch_size=10)
+        self.assertEqual(result.rowcount, len(ROWS))
+        self.assertEqual([batch.rows for batch in result.batches],
+                         [10, 10, 5])
+        self.assertEqual(
+            self.dbh.get_executed_cursor(
+                "SELECT count(*) FROM test_execute_many").fetchone()[0],
+            len(ROWS))
+
+    def test_no_rows(self):
+        result = self.dbh.execute_many(
+            "INSERT INTO test_execute_many(id, name) VALUES(?, ?)", [])
+        self.assertEqual(result.rowcount, 0)
+        self.assertEqual(result.batches, [])
+
+
+class TestBulkDrivers(unittest.TestCase):
+    def test_get_driver_unwraps_oxdb(self):
+        dbh = OXDB('LOCAL')
+        dbh._connection = sqlite3.connect(':memory:')
+        self.assertEqual(bulk.get_driver(dbh), 'sqlite3')
+        self.assertEqual(bulk.get_driver(dbh.connection), 'sqlite3')
+
+    def test_execute_many_local(self):
+        connection = local.connect(database=':memory:')
+        self.assertEqual(bulk.get_driver(connection), 'ox_dw_db')
+        dbh = OXDB('LOCAL')
+        dbh._connection = connection
+        self.assertEqual(bulk.get_driver(dbh), 'ox_dw_db')
+        dbh.execute("CREATE TABLE test_execute_many(id int, name varchar)")
+        result = dbh.execute_many(
+            "INSERT INTO test_execute_many(id, name) VALUES(?, ?)", ROWS,
+            batch_size=10)
+        self.assertEqual(result.rowcount, len(ROWS))
+        self.assertEqual(
+            dbh.get_executed_cursor(
+                "SELECT count(*) FROM test_execute_many").fetchone()[0],
+            len(ROWS))
+
+    def test_execute_batch_counts_rows_sent(self):
+        """
+        rowcount after execute_batch is only of the last statement.
+        """
+        connection = mock.Mock()
+        connection.cursor.return_value.rowcount = 1
+        with mock.patch.object(bulk, 'get_driver', return_value='psycopg2'), \
+                mock.patch.object(bulk, 'execute_batch') as execute_batch:
+            result = bulk.execute_many(
+                connection, "UPDATE t SET name = %s WHERE id = %s", ROWS,
+                batch_size=10)
+        self.assertEqual(execute_batch.call_count, 3)
+        self.assertEqual(result.rowcount, len(ROWS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import csv
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from ox_dw_db import (CSVSink, QueryEvent, RingBufferSink, SQLiteSink,
+                      add_sink, remove_sink, tag)
+from ox_dw_db.oxdb import OXDB
+from ox_dw_db.util import ignore_warnings
+
+SNOWFLAKE_CONNECTION_NAME = 'SNOWFLAKE'
+
+
+class TestInstrument(unittest.TestCase):
+    @ignore_warnings
+    def setUp(self):
+        self.dbh = OXDB(SNOWFLAKE_CONNECTION_NAME)
+        self.sink = add_sink(RingBufferSink())
+
+    def tearDown(self):
+        remove_sink(self.sink)
+        self.dbh.close()
+
+    def test_event(self):
+        self.dbh.execute("select 1")
+        event, = self.sink.events
+        self.assertEqual(event.rowcount, 1)
+        self.assertTrue(event.query_id)
+        self.assertTrue(event.seconds >= 0)
+        self.assertIn('test_event', event.tag)
+
+    def test_tag(self):
+        with tag('MY_STEP'):
+            self.dbh.execute("select 1")
+        self.assertEqual(self.sink.events[0].tag, 'MY_STEP')
+
+    def test_error(self):
+        with self.assertRaises(Exception):
+            self.dbh.execute("select * from no_such_table_here")
+        self.assertTrue(self.sink.events[0].error)
+
+
+class TestInstrumentSinks(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.event = QueryEvent('TAG', 'select 1', 0.0, 0.5, 1, 'id', None)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_oxdb_event(self):
+        dbh = OXDB('LOCAL')
+        dbh._connection = sqlite3.connect(':memory:')
+        sink = add_sink(RingBufferSink())
+        try:
+            dbh.execute("select 1")
+        finally:
+            remove_sink(sink)
+        event, = sink.events
+        self.assertEqual(sorted(event._asdict()),
+                         sorted(QueryEvent._fields))
+        self.assertIn('test_oxdb_event', event.tag)
+
+    def test_oxdb_cursor_events(self):
+        """
+        Statements run on OXDB.cursor() as the ETLs do are recorded too.
+        """
+        dbh = OXDB('LOCAL')
+        dbh._connection = sqlite3.connect(':memory:')
+        sink = add_sink(RingBufferSink())
+        try:
+            cursor = dbh.cursor()
+            cursor.execute("CREATE TABLE t(a int)")
+            cursor.executemany("INSERT INTO t VALUES(?)", [(1,), (2,)])
+            with self.assertRaises(sqlite3.Error):
+                cursor.execute("select * from no_such_table_here")
+        finally:
+            remove_sink(sink)
+        self.assertEqual([event.stmt for event in sink.events], [
+            "CREATE TABLE t(a int)", "INSERT INTO t VALUES(?)",
+            "select * from no_such_table_here"])
+        self.assertEqual(sink.events[1].rowcount, 2)
+        self.assertTrue(sink.events[2].error)
+        self.assertIn('test_oxdb_cursor_events', sink.events[0].tag)
+
+    def test_sqlite_sink_older_table(self):
+        """
+        Tables made when events had bytes_scanned still take inserts.
+        """
+        db_file = os.path.join(self.tmp_dir, 'profile.db')
+        local_db = sqlite3.connect(db_file)
+        local_db.execute(
+            "CREATE TABLE oxdb_query_log(tag TEXT, stmt TEXT, "
+            "start_time REAL, seconds REAL, rowcount INT, query_id TEXT, "
+            "bytes_scanned INT, error TEXT, pid INT)")
+        local_db.commit()
+        SQLiteSink(db_file)(self.event)
+        self.assertEqual(
+            local_db.execute(
+                "SELECT tag, query_id, bytes_scanned FROM oxdb_query_log"
+            ).fetchall(), [('TAG', 'id', None)])
+        local_db.close()
+
+    def test_csv_sink_keeps_columns(self):
+        csv_file = os.path.join(self.tmp_dir, 'profile.csv')
+        CSVSink(csv_file)(self.event)
+        fields = ['tag', 'seconds', 'bytes_scanned']
+        older_file = os.path.join(self.tmp_dir, 'older.csv')
+        with open(older_file, 'w') as out_file:
+            csv.writer(out_file).writerow(fields)
+        CSVSink(older_file)(self.event)
+        with open(csv_file) as in_file:
+            self.assertEqual(next(csv.reader(in_file)),
+                             list(QueryEvent._fields))
+        with open(older_file) as in_file:
+            self.assertEqual(list(csv.reader(in_file)),
+                             [fields, ['TAG', '0.5', '']])
+
+
+if __name__ == '__main__':
+    unittest.main()
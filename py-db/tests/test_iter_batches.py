@@ -0,0 +1,71 @@
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from ox_dw_db.fetch import iter_batches
+from ox_dw_db.oxdb import OXDB
+from ox_dw_db.util import ignore_warnings
+
+SNOWFLAKE_CONNECTION_NAME = 'SNOWFLAKE'
+QUERY = "SELECT seq4() AS id FROM table(generator(rowcount => 25))"
+
+
+class TestIterBatches(unittest.TestCase):
+    @ignore_warnings
+    def setUp(self):
+        self.dbh = OXDB(SNOWFLAKE_CONNECTION_NAME)
+
+    def tearDown(self):
+        self.dbh.close()
+
+    def test_rows(self):
+        self.assertEqual(
+            [len(rows) for rows in self.dbh.iter_batches(QUERY, batch_size=10)],
+            [10, 10, 5])
+
+    def test_arrow(self):
+        self.assertEqual(
+            sum(batch.num_rows
+                for batch in self.dbh.iter_batches(
+                    QUERY, batch_size=10, fmt='arrow')),
+            25)
+
+    def test_bad_fmt(self):
+        self.assertRaises(
+            ValueError, list, self.dbh.iter_batches(QUERY, fmt='csv'))
+
+
+class TestIterBatchesConnector(unittest.TestCase):
+    """
+    Against the installed connector's cursor API without a connection.
+    """
+
+    def setUp(self):
+        try:
+            import pyarrow
+            from snowflake.connector.cursor import SnowflakeCursor
+        except ImportError:
+            self.skipTest("needs ox_dw_db[arrow]")
+        self.cursor = mock.create_autospec(SnowflakeCursor, instance=True)
+        self.cursor.fetch_arrow_batches.return_value = iter([
+            pyarrow.table({'id': list(range(15))}),
+            pyarrow.table({'id': list(range(15, 25))})
+        ])
+
+    def test_arrow(self):
+        self.assertEqual(
+            [batch.num_rows
+             for batch in iter_batches(self.cursor, batch_size=10,
+                                       fmt='arrow')],
+            [10, 5, 10])
+
+    def test_numpy(self):
+        batches = list(iter_batches(self.cursor, batch_size=10, fmt='numpy'))
+        self.assertEqual([list(batch) for batch in batches], [['id']] * 3)
+        self.assertEqual(sum(len(batch['id']) for batch in batches), 25)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from ox_dw_db.local import connect
+
+ROWS = [(1, 'one', ''), (2, 'two', 'None'), (3, 'three', 'x')]
+
+
+class TestLocal(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.dbh = connect(stage_dir=os.path.join(self.tmp_dir, 'stages'))
+        self.data_file = os.path.join(self.tmp_dir, 'data.txt.gz')
+        with gzip.open(self.data_file, 'wt') as out_file:
+            out_file.write('id|name|other\n')
+            for row in ROWS:
+                out_file.write('|'.join(str(value) for value in row) + '\n')
+
+    def tearDown(self):
+        self.dbh.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_stage_put_list_copy(self):
+        cursor = self.dbh.cursor()
+        cursor.execute("CREATE STAGE test_stage")
+        with self.assertRaises(Exception) as context:
+            cursor.execute("CREATE STAGE test_stage")
+        self.assertIn('already exists', str(context.exception))
+        cursor.execute(
+            "PUT file://%s @test_stage/feed/1 AUTO_COMPRESS = False" %
+            self.data_file)
+        self.assertEqual(
+            [row[0] for row in cursor.execute("LIST @test_stage/feed/1")],
+            ['test_stage/feed/1/data.txt.gz'])
+        cursor.execute(
+            "CREATE TEMPORARY TABLE IF NOT EXISTS test_local("
+            "id int, name varchar, other varchar)")
+        cursor.execute(
+            "COPY INTO test_local FROM @test_stage/feed/1 FILE_FORMAT = ("
+            "TYPE = CSV COMPRESSION = 'GZIP' FIELD_DELIMITER = '|' "
+            "SKIP_HEADER = 1 NULL_IF = 'None') PURGE = TRUE")
+        self.assertEqual(cursor.rowcount, len(ROWS))
+        self.assertEqual(
+            cursor.execute("SELECT id::int, name, other FROM test_local "
+                           "ORDER BY id").fetchall(),
+            [(1, 'one', None), (2, 'two', None), (3, 'three', 'x')])
+        self.assertEqual(cursor.execute("LIST @test_stage").fetchall(), [])
+
+    def test_sequence(self):
+        cursor = self.dbh.cursor()
+        cursor.execute("CREATE SEQUENCE test_seq START WITH 5")
+        self.assertEqual(
+            cursor.execute("SELECT test_seq.nextval").fetchone()[0], 5)
+        self.assertEqual(
+            cursor.execute("SELECT test_seq.nextval").fetchone()[0], 6)
+
+    def test_qmark_binds(self):
+        cursor = self.dbh.cursor()
+        cursor.execute("CREATE TABLE test_binds(id int)")
+        cursor.executemany("INSERT INTO test_binds VALUES(?)", [(1, ), (2, )])
+        self.assertEqual(
+            cursor.execute("SELECT count(*) FROM test_binds WHERE id > ?",
+                           (1, )).fetchone()[0], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
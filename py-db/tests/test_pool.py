@@ -0,0 +1,76 @@
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from ox_dw_db import OXDBPool, PoolTimeoutError, pooled
+from ox_dw_db.oxdb import OXDB
+from ox_dw_db.util import ignore_warnings
+
+SNOWFLAKE_CONNECTION_NAME = 'SNOWFLAKE'
+
+
+class TestOXDBPool(unittest.TestCase):
+    @ignore_warnings
+    def setUp(self):
+        self.pool = OXDBPool(SNOWFLAKE_CONNECTION_NAME, max_size=2, timeout=1)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_reuse(self):
+        oxdb = self.pool.acquire()
+        self.pool.release(oxdb)
+        self.assertIs(self.pool.acquire(), oxdb,
+                      'Released connection should be reused.')
+
+    def test_max_size(self):
+        self.pool.acquire()
+        self.pool.acquire()
+        self.assertRaises(PoolTimeoutError, self.pool.acquire)
+
+    def test_broken_connection_replaced(self):
+        oxdb = self.pool.acquire()
+        oxdb.close()
+        self.pool.release(oxdb)
+        self.assertEqual(self.pool.acquire().execute("select 1"), 1)
+        self.assertEqual(self.pool.size, 1)
+
+    def test_idle_eviction(self):
+        self.pool.max_idle = -1
+        self.pool.release(self.pool.acquire())
+        self.pool.acquire()
+        self.assertEqual(self.pool.idle, 0)
+        self.assertEqual(self.pool.size, 1)
+
+    def test_pooled(self):
+        with pooled(SNOWFLAKE_CONNECTION_NAME) as oxdb:
+            self.assertEqual(oxdb.execute("select 1 = ?", (1,)), 1)
+        with pooled(SNOWFLAKE_CONNECTION_NAME) as same_oxdb:
+            self.assertIs(same_oxdb, oxdb)
+        OXDBPool.close_all()
+
+
+class TestClose(unittest.TestCase):
+    def test_close_does_not_connect(self):
+        """
+        Closing an OXDB whose session was dropped must not log in again.
+        """
+        with mock.patch.object(OXDB, '_connect') as connect:
+            oxdb = OXDB(SNOWFLAKE_CONNECTION_NAME)
+            oxdb.close()
+            connection = oxdb.connection
+            oxdb.close()
+            oxdb.close()
+            oxdb.connection
+            # As the pool does for a forked child's idle connections.
+            oxdb._connection = None
+            oxdb.__del__()
+        connection.close.assert_called_once_with()
+        self.assertEqual(connect.call_count, 2)
+        self.assertIsNone(oxdb._connection)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import sqlite3
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from ox_dw_db import RetryPolicy, is_transient
+from ox_dw_db.oxdb import OXDB
+from ox_dw_db.retry import is_read_only
+
+
+class TestRetry(unittest.TestCase):
+    def test_is_transient(self):
+        self.assertTrue(is_transient(ConnectionError('reset')))
+        self.assertTrue(is_transient(Exception('08S01', 'Link failure')))
+        self.assertTrue(
+            is_transient(Exception('Session no longer exists.')))
+        self.assertFalse(is_transient(Exception('42000', 'Syntax error')))
+        self.assertFalse(is_transient(ValueError('Invalid connection')))
+
+    def test_is_read_only(self):
+        self.assertTrue(is_read_only(' select 1'))
+        self.assertTrue(is_read_only('WITH a AS (SELECT 1) SELECT * FROM a'))
+        self.assertFalse(is_read_only('INSERT INTO a SELECT 1'))
+
+    def test_delay(self):
+        policy = RetryPolicy(max_attempts=5, base_delay=1, max_delay=4)
+        for attempt in range(1, 5):
+            self.assertTrue(
+                0 <= policy.delay(attempt) <= min(4, 2**(attempt - 1)))
+
+    def test_from_conf(self):
+        policy = RetryPolicy.from_conf({'MAX_ATTEMPTS': 1})
+        self.assertEqual(policy.max_attempts, 1)
+        self.assertRaises(ValueError, RetryPolicy, max_attempts=0)
+
+
+class TestReplay(unittest.TestCase):
+    """
+    Replays after a dropped session without a database.
+    """
+
+    def setUp(self):
+        self.dropped = mock.Mock()
+        self.dropped.cursor.return_value.execute.side_effect = [
+            None, ConnectionError('connection reset')
+        ]
+        self.dbh = OXDB('LOCAL', retry_policy=RetryPolicy(
+            max_attempts=2, base_delay=0, max_delay=0))
+        self.dbh._connect = mock.Mock(
+            side_effect=[self.dropped, sqlite3.connect(':memory:')])
+
+    def test_read_only_cursor_replayed(self):
+        """
+        Handing out a cursor and reading on it does not stop a replay.
+        """
+        self.dbh.cursor().execute("SELECT 1")
+        self.assertEqual(
+            self.dbh.get_executed_cursor("SELECT 2").fetchone(), (2, ))
+        self.assertEqual(self.dbh._connect.call_count, 2)
+
+    def test_write_on_cursor_not_replayed(self):
+        self.dbh.cursor().execute("INSERT INTO a VALUES(1)")
+        with self.assertRaises(ConnectionError):
+            self.dbh.get_executed_cursor("SELECT 2")
+        self.assertEqual(self.dbh._connect.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import asyncio
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from snowflake.connector.connection import SnowflakeConnection
+from snowflake.connector.cursor import SnowflakeCursor
+
+from ox_dw_db import query
+from ox_dw_db.oxdb import OXDB
+from ox_dw_db.util import ignore_warnings
+
+SNOWFLAKE_CONNECTION_NAME = 'SNOWFLAKE'
+
+
+class TestSubmit(unittest.TestCase):
+    @ignore_warnings
+    def setUp(self):
+        self.dbh = OXDB(SNOWFLAKE_CONNECTION_NAME)
+
+    def tearDown(self):
+        self.dbh.close()
+
+    def test_wait(self):
+        handles = [self.dbh.submit("select %s" % index) for index in range(3)]
+        self.assertEqual(self.dbh.wait(handles, poll_interval=0.1), handles)
+
+    def test_result(self):
+        handle = self.dbh.submit("select 1 = ?", (1,))
+        self.assertEqual(
+            self.dbh.result(handle, poll_interval=0.1).fetchone(), (True,))
+
+    def test_result_async(self):
+        handle = self.dbh.submit("select 2")
+        cursor = asyncio.get_event_loop().run_until_complete(
+            self.dbh.result_async(handle, poll_interval=0.1))
+        self.assertEqual(cursor.fetchone(), (2,))
+
+    def test_failed_statement(self):
+        with self.assertRaises(Exception):
+            self.dbh.wait(self.dbh.submit("select * from no_such_table_here"))
+
+
+class TestSubmitConnector(unittest.TestCase):
+    """
+    Against the installed connector's API without a connection.
+    """
+
+    def setUp(self):
+        self.connection = mock.create_autospec(SnowflakeConnection,
+                                               instance=True)
+        self.cursor = mock.create_autospec(SnowflakeCursor, instance=True)
+        self.cursor.sfqid = 'query-id'
+        self.connection.cursor.return_value = self.cursor
+
+    def test_supports_async(self):
+        self.assertTrue(query.supports_async(self.connection))
+
+    def test_submit_wait_result(self):
+        self.connection.is_still_running.side_effect = [True, False]
+        handle = query.submit(self.connection, "select 1")
+        self.cursor.execute_async.assert_called_once_with("select 1")
+        self.assertFalse(self.cursor.execute.called)
+        self.assertEqual(handle.query_id, 'query-id')
+        self.assertIs(
+            query.result(self.connection, handle, poll_interval=0),
+            self.cursor)
+        self.connection.get_query_status_throw_if_error.assert_called_with(
+            'query-id')
+        self.cursor.get_results_from_sfqid.assert_called_once_with(
+            'query-id')
+
+
+if __name__ == '__main__':
+    unittest.main()
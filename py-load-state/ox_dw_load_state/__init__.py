@@ -1,4 +1,6 @@
 """
 All of our common VARS, Classes and functions.
 """
-from .load_state import LoadState, parse_date_string
+from .load_state import (
+    LoadState, LoadStateCache, LoadStateSet, parse_date_string
+)
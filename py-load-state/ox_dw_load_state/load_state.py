@@ -1,8 +1,12 @@
 """
 Use for managing the load state.
 """
+import threading
+import time
+import weakref
 from datetime import datetime
 from dateutil.parser import parse as parse_date
+from .util import bind, get_paramstyle
 
 CREATE = """
 CREATE TABLE load_state (
@@ -13,33 +17,119 @@ CREATE TABLE load_state (
 )"""
 
 DELETE = """
-DELETE FROM load_state WHERE variable_name = '%(variable_name)s'"""
+DELETE FROM load_state WHERE variable_name = %(variable_name)s"""
 
 EXISTS = """
-SELECT 1 FROM load_state WHERE variable_name = '%(variable_name)s'"""
+SELECT 1 FROM load_state WHERE variable_name = %(variable_name)s"""
 
 INSERT = """
 INSERT INTO
 load_state(
     variable_value, variable_name, created_datetime, modified_datetime)
-VALUES('%(variable_value)s', '%(variable_name)s',
-       '%(created_datetime)s', '%(modified_datetime)s')"""
+VALUES(%(variable_value)s, %(variable_name)s,
+       %(created_datetime)s, %(modified_datetime)s)"""
 
 SELECT = """
 SELECT variable_value, created_datetime, modified_datetime
 FROM load_state
-where variable_name = '%(variable_name)s'"""
+where variable_name = %(variable_name)s"""
 
 UPDATE = """
 UPDATE load_state
-SET variable_value = '%(variable_value)s',
-    modified_datetime = '%(modified_datetime)s'
-WHERE variable_name = '%(variable_name)s'"""
+SET variable_value = %(variable_value)s,
+    modified_datetime = %(modified_datetime)s
+WHERE variable_name = %(variable_name)s"""
 
+# The sequence name cannot be bound so is formatted in.
 NEXTVAL = """
 SELECT %(seq_name)s.nextval"""
 
-CUSTOM_DATE_STRINGS = ['%Y-%m-%d_%H %Z']
+PROBE = """
+SELECT 1 FROM load_state"""
+
+SELECT_MANY = """
+SELECT variable_name, variable_value, created_datetime, modified_datetime
+FROM load_state
+WHERE variable_name IN (%(variable_names)s)"""
+
+# Numbered per row as %(variable_name_0)s, ... to bind many rows.
+SOURCE_ROW = """
+SELECT %%(variable_name_%(index)s)s AS variable_name,
+       %%(variable_value_%(index)s)s AS variable_value,
+       %%(now)s AS created_datetime,
+       %%(now)s AS modified_datetime"""
+
+MERGE = """
+MERGE INTO load_state t
+USING (%(source)s) s
+ON t.variable_name = s.variable_name
+WHEN MATCHED THEN UPDATE SET
+    variable_value = s.variable_value,
+    modified_datetime = s.modified_datetime
+WHEN NOT MATCHED THEN INSERT(
+    variable_name, variable_value, created_datetime, modified_datetime)
+VALUES(s.variable_name, s.variable_value, s.created_datetime,
+       s.modified_datetime)"""
+
+# For databases without MERGE such as sqlite3.
+UPDATE_MANY = """
+UPDATE load_state
+SET variable_value = (
+        SELECT s.variable_value FROM (%(source)s) s
+        WHERE s.variable_name = load_state.variable_name),
+    modified_datetime = %%(now)s
+WHERE variable_name IN (%(variable_names)s)"""
+
+INSERT_MANY = """
+INSERT INTO
+load_state(
+    variable_name, variable_value, created_datetime, modified_datetime)
+SELECT s.variable_name, s.variable_value, s.created_datetime,
+       s.modified_datetime
+FROM (%(source)s) s
+WHERE NOT EXISTS (
+    SELECT 1 FROM load_state t WHERE t.variable_name = s.variable_name)"""
+
+# Only applied when matched on the expected value or, for an expected value
+# of NULL, inserted when missing.
+MERGE_COMPARE_AND_SET = """
+MERGE INTO load_state t
+USING (
+    SELECT %(variable_name)s AS variable_name,
+           %(variable_value)s AS variable_value,
+           %(expected_value)s AS expected_value,
+           %(now)s AS now) s
+ON t.variable_name = s.variable_name
+WHEN MATCHED AND t.variable_value = s.expected_value THEN UPDATE SET
+    variable_value = s.variable_value,
+    modified_datetime = s.now
+WHEN NOT MATCHED AND s.expected_value IS NULL THEN INSERT(
+    variable_name, variable_value, created_datetime, modified_datetime)
+VALUES(s.variable_name, s.variable_value, s.now, s.now)"""
+
+# For databases without MERGE such as sqlite3.
+UPDATE_COMPARE_AND_SET = """
+UPDATE load_state
+SET variable_value = %(variable_value)s,
+    modified_datetime = %(now)s
+WHERE variable_name = %(variable_name)s
+AND variable_value = %(expected_value)s"""
+
+INSERT_MISSING = """
+INSERT INTO
+load_state(
+    variable_name, variable_value, created_datetime, modified_datetime)
+SELECT %(variable_name)s, %(variable_value)s, %(now)s, %(now)s
+WHERE NOT EXISTS (
+    SELECT 1 FROM load_state WHERE variable_name = %(variable_name)s)"""
+
+CUSTOM_DATE_STRINGS = ['%Y-%m-%d_%H %Z', '%Y-%m-%d_%H']
+# DB-API modules of the databases that run the MERGE statements above.
+# Everything else uses the UPDATE/INSERT fallbacks.
+MERGE_DRIVERS = ('snowflake', )
+CACHE_TTL = 30  # seconds
+ADVANCE_ATTEMPTS = 10  # compare_and_set attempts lost to other writers
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
 
 
 def parse_date_string(date_string):
@@ -62,39 +152,219 @@ def parse_date_string(date_string):
     return parse_date(date_string)
 
 
+class _ConnectionMemo(object):
+    """
+    Per connection values that go away with the connection.
+    Connections that cannot be weak referenced(sqlite3) are never memoized.
+    """
+
+    def __init__(self):
+        self._memo = weakref.WeakKeyDictionary()
+
+    def get(self, dbh):
+        """
+        The memoized value or None.
+        """
+        try:
+            return self._memo.get(dbh)
+        except TypeError:
+            return None
+
+    def set(self, dbh, value):
+        """
+        Memoize the value for the connection if possible.
+        """
+        try:
+            self._memo[dbh] = value
+        except TypeError:
+            pass
+
+
+_CURSORS = _ConnectionMemo()
+_TABLE_EXISTS = _ConnectionMemo()
+
+
+def execute(dbh, stmt, params=None):
+    """
+    Executes the stmt with %(name)s placeholders bound in the paramstyle of
+    the connection's DB-API module.
+    Cursors are kept per connection and statement so the statement is only
+    prepared once by drivers that support it(pyodbc, snowflake qmark).
+    Returns the executed cursor.
+    """
+    connection = getattr(dbh, 'connection', dbh)
+    stmt, args = bind(stmt, params or {}, get_paramstyle(connection))
+    cursors = _CURSORS.get(dbh)
+    if cursors is None:
+        cursors = {}
+        _CURSORS.set(dbh, cursors)
+    cursor = cursors.get(stmt)
+    # A wrapper such as OXDB may have reconnected since.
+    if cursor is None or \
+            getattr(cursor, 'connection', connection) is not connection:
+        cursor = dbh.cursor()
+        cursors[stmt] = cursor
+    if args:
+        cursor.execute(stmt, args)
+    else:
+        cursor.execute(stmt)
+
+    return cursor
+
+
+def supports_merge(dbh):
+    """
+    Does the database run MERGE ... WHEN MATCHED AND ...?
+    Decided from the driver up front so a MERGE that fails for any other
+    reason raises its own error rather than falling back.
+    """
+    connection = getattr(dbh, 'connection', dbh)
+
+    return type(connection).__module__.split('.')[0] in MERGE_DRIVERS
+
+
+def ensure_table(dbh):
+    """
+    Creates the load_state table if it does not exist.
+    Only probes once per connection.
+    """
+    if _TABLE_EXISTS.get(dbh):
+        return
+    try:
+        cursor = dbh.cursor()
+        cursor.execute(PROBE)
+    except Exception as exc:
+        # Broad exception here as it will be connection specific.
+        if 't exist' in str(exc) or 'no such table' in str(exc):
+            cursor.execute(CREATE)
+        else:
+            raise
+    _TABLE_EXISTS.set(dbh, True)
+
+
+class LoadStateCache(object):
+    """
+    Opt in cache of load_state rows for the LoadStates given it.
+    Rows are kept for ttl seconds so read mostly checks such as job
+    dependencies do not query every time. Writes through those LoadStates
+    update or invalidate it so they always see their own changes. Changes
+    made elsewhere are seen once the ttl has passed.
+    Example:
+        cache = LoadStateCache(ttl=30)
+        load_state = LoadState(dbh, variable_name, cache=cache)
+    """
+
+    def __init__(self, ttl=CACHE_TTL):
+        self.ttl = ttl
+        self._rows = {}
+        self._lock = threading.Lock()
+
+    def get(self, variable_name):
+        """
+        Returns (hit, row). The row is
+        (variable_value, created_datetime, modified_datetime) or None when the
+        variable_name is known not to exist.
+        """
+        with self._lock:
+            entry = self._rows.get(variable_name)
+        if entry is None or time.time() - entry[0] > self.ttl:
+            return False, None
+
+        return True, entry[1]
+
+    def set(self, variable_name, row):
+        """
+        Caches the row or None when the variable_name does not exist.
+        """
+        with self._lock:
+            self._rows[variable_name] = (time.time(), row)
+
+    def invalidate(self, variable_name=None):
+        """
+        Forget the variable_name or everything when None.
+        """
+        with self._lock:
+            if variable_name is None:
+                self._rows.clear()
+            else:
+                self._rows.pop(variable_name, None)
+
+
 class LoadState(object):
     """
     For working with the load state.
     Requires valid dbh object.
     variable_name can be set after instantiation.
+    Pass a LoadStateCache as cache to share reads between instances.
     """
     _exists = None
 
-    def __init__(self, dbh, variable_name=None):
+    def __init__(self, dbh, variable_name=None, cache=None):
         self.dbh = dbh
+        self.cache = cache
         self.variable_name = variable_name
         self.variable_value = None
         self.created_datetime = None
         self.modified_datetime = None
-        try:
-            cursor = self.dbh.cursor()
-            cursor.execute("SELECT 1 FROM load_state")
-        except Exception as exc:
-            # Broad exception here as it will be connection specific.
-            if 't exist' in str(exc) or 'no such table' in str(exc):
-                cursor.execute(CREATE)
-            else:
-                raise
+        ensure_table(self.dbh)
         self.select()
 
+    def advance_to(self, new_datetime, commit=False):
+        """
+        Moves the variable_value forward to new_datetime(datetime or
+        parsable string). Inserts it when missing.
+        The stored value is compared as a datetime whatever format it was
+        written in then set with compare_and_set on exactly that value, so it
+        never moves backwards even with concurrent writers. An equal value is
+        still set so the modified_datetime is touched.
+        Returns True when applied and False when already past new_datetime.
+        Raises RuntimeError when other writers change the value between the
+        read and the write ADVANCE_ATTEMPTS times in a row.
+        """
+        if isinstance(new_datetime, str):
+            new_datetime = parse_date_string(new_datetime)
+        new_value = new_datetime.strftime(DATETIME_FORMAT)
+        for _ in range(ADVANCE_ATTEMPTS):
+            row = execute(self.dbh, SELECT,
+                          {'variable_name': self.variable_name}).fetchone()
+            current_value = None if row is None else row[0]
+            if current_value is not None and \
+                    new_datetime < parse_date_string(current_value):
+                if commit:
+                    self.dbh.commit()
+                return False
+            if self.compare_and_set(current_value, new_value, commit=commit):
+                return True
+            # Changed by someone else since it was read.
+
+        raise RuntimeError(
+            "Could not advance %s to %s after %s attempts!" % (
+                self.variable_name, new_value, ADVANCE_ATTEMPTS))
+
+    def compare_and_set(self, expected, new, commit=False):
+        """
+        Sets the variable_value to new in a single statement only when it is
+        currently expected. An expected of None only inserts when missing.
+        Returns True when applied.
+        """
+        if expected is None:
+            return self._apply(
+                MERGE_COMPARE_AND_SET, (INSERT_MISSING, ), new,
+                commit=commit, expected_value=None)
+
+        return self._apply(
+            MERGE_COMPARE_AND_SET, (UPDATE_COMPARE_AND_SET, ), new,
+            commit=commit, expected_value=str(expected))
+
     def delete(self):
         """
         Remove the varible_name from the load_state table.
         """
-        cursor = self.dbh.cursor()
-        cursor.execute(DELETE % {'variable_name': self.variable_name})
+        execute(self.dbh, DELETE, {'variable_name': self.variable_name})
         self.dbh.commit()
         self._exists = None
+        if self.cache is not None:
+            self.cache.invalidate(self.variable_name)
 
     @property
     def exists(self):
@@ -102,8 +372,8 @@ class LoadState(object):
         Does the variable_name already exist in the load_state table?
         """
         if self._exists is None:
-            cursor = self.dbh.cursor()
-            cursor.execute(EXISTS % {'variable_name': self.variable_name})
+            cursor = execute(self.dbh, EXISTS,
+                             {'variable_name': self.variable_name})
             self._exists = bool(cursor.fetchone())
 
         return self._exists
@@ -111,22 +381,30 @@ class LoadState(object):
     def select(self):
         """
         Sets local values to the db values.
+        Uses the cache when it has the variable_name.
         """
-        cursor = self.dbh.cursor()
-        cursor.execute(SELECT % {
-            'variable_name': self.variable_name
-        })
+        if self.cache is not None:
+            hit, row = self.cache.get(self.variable_name)
+            if hit:
+                if row is not None:
+                    (self.variable_value, self.created_datetime,
+                     self.modified_datetime) = row
+                self._exists = row is not None
+                return
+        cursor = execute(self.dbh, SELECT,
+                         {'variable_name': self.variable_name})
         row = cursor.fetchone()
         if row is not None:
             (self.variable_value, self.created_datetime,
              self.modified_datetime) = [item for item in row]
             self._exists = True
+        if self.cache is not None:
+            self.cache.set(self.variable_name,
+                           None if row is None else tuple(row))
 
     def increment_by_seq(self, seq_name, commit=False):
         self.upsert(
-            self.dbh.cursor().execute(
-                NEXTVAL % {'seq_name': seq_name}
-            ).fetchone()[0])
+            execute(self.dbh, NEXTVAL % {'seq_name': seq_name}).fetchone()[0])
 
     def update_variable_datetime(self,
                                  variable_value=None,
@@ -142,14 +420,11 @@ class LoadState(object):
             if isinstance(new_value, str):
                 new_value = parse_date_string(new_value)
             if new_value is not None:
-                if not force and self.variable_value is not None:
-                    current_value = parse_date_string(self.variable_value)
-                    if current_value is not None and new_value < current_value:
-                        if commit:
-                            self.dbh.commit()
-                        return
+                if not force:
+                    self.advance_to(new_value, commit=commit)
+                    return
                 self.upsert(
-                    new_value.strftime('%Y-%m-%d %H:%M:%S'), commit=commit)
+                    new_value.strftime(DATETIME_FORMAT), commit=commit)
 
     def update_variable_intrvl(self, variable_value, commit=False,
                                force=False):
@@ -169,21 +444,210 @@ class LoadState(object):
         """
         Update the load_state. Insert it if it does not exist.
         """
-        statement = UPDATE if self.exists else INSERT
-        statement %= {
-            'variable_value': variable_value,
-            'variable_name': self.variable_name,
-            'created_datetime':
-            datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
-            'modified_datetime':
-            datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        cursor = self.dbh.cursor()
-        cursor.execute(statement)
+        execute(
+            self.dbh, UPDATE if self.exists else INSERT, {
+                'variable_value': str(variable_value),
+                'variable_name': self.variable_name,
+                'created_datetime':
+                datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+                'modified_datetime':
+                datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+            })
         if commit:
             self.dbh.commit()
+        if self.cache is not None:
+            self.cache.invalidate(self.variable_name)
         self.select()
 
     insert = upsert
 
     update = upsert
+
+    def _apply(self, merge, fallback, variable_value, commit=False,
+               **params):
+        """
+        Runs the conditional merge, or the fallback statements in order until
+        one changes a row, and updates the local values when applied.
+        """
+        now = datetime.utcnow().strftime(DATETIME_FORMAT)
+        params.update({
+            'variable_name': self.variable_name,
+            'variable_value': variable_value,
+            'now': now
+        })
+        if supports_merge(self.dbh):
+            applied = execute(self.dbh, merge, params).rowcount > 0
+        else:
+            applied = self._apply_fallback(fallback, params)
+        if commit:
+            self.dbh.commit()
+        if applied:
+            if not self._exists:
+                self.created_datetime = now
+            self.variable_value = variable_value
+            self.modified_datetime = now
+            self._exists = True
+        if self.cache is not None:
+            if applied:
+                self.cache.set(self.variable_name,
+                               (self.variable_value, self.created_datetime,
+                                self.modified_datetime))
+            else:
+                # Changed by someone else.
+                self.cache.invalidate(self.variable_name)
+
+        return applied
+
+    def _apply_fallback(self, statements, params):
+        """
+        Returns True as soon as one of the statements changes a row.
+        """
+        for statement in statements:
+            if execute(self.dbh, statement, params).rowcount > 0:
+                return True
+
+        return False
+
+
+class LoadStateSet(object):
+    """
+    For working with many load state variables at once.
+    Values are read with one query on first access and written with one
+    MERGE so the cost does not grow with the number of variables.
+    Example:
+        load_states = LoadStateSet(dbh, ['VAR_A', 'VAR_B'])
+        load_states['VAR_A']  # The variable_value or None.
+        load_states.upsert({'VAR_A': '2016-10-01', 'VAR_B': '2016-10-02'})
+        load_states.upsert_all('2016-10-01', commit=True)
+    Upserts invalidate the variable_names in the LoadStateCache if given.
+    """
+
+    def __init__(self, dbh, variable_names, cache=None):
+        self.dbh = dbh
+        self.cache = cache
+        self.variable_names = list(variable_names)
+        self._rows = None
+        ensure_table(self.dbh)
+
+    def __contains__(self, variable_name):
+        """
+        Does the variable_name exist in the load_state table?
+        """
+        return variable_name in self.rows
+
+    def __getitem__(self, variable_name):
+        """
+        The variable_value or None if it does not exist.
+        """
+        if variable_name not in self.variable_names:
+            raise KeyError(variable_name)
+
+        return self.get(variable_name)
+
+    def __iter__(self):
+        return iter(self.variable_names)
+
+    def __len__(self):
+        return len(self.variable_names)
+
+    def get(self, variable_name, default=None):
+        """
+        The variable_value or default if it does not exist.
+        """
+        row = self.rows.get(variable_name)
+
+        return default if row is None else row[0]
+
+    @property
+    def rows(self):
+        """
+        Dict of variable_name to
+        (variable_value, created_datetime, modified_datetime) for the
+        variables that exist.
+        """
+        if self._rows is None:
+            self.select()
+
+        return self._rows
+
+    def select(self):
+        """
+        Sets local values to the db values.
+        """
+        self._rows = {}
+        if not self.variable_names:
+            return
+        cursor = execute(
+            self.dbh,
+            SELECT_MANY % {
+                'variable_names': self._in_list(len(self.variable_names))
+            }, self._name_params(self.variable_names))
+        for (variable_name, variable_value, created_datetime,
+             modified_datetime) in cursor.fetchall():
+            self._rows[variable_name] = (variable_value, created_datetime,
+                                         modified_datetime)
+
+    def upsert(self, values, commit=False):
+        """
+        Update the load_states for the dict of variable_name to
+        variable_value. Insert those that do not exist.
+        """
+        if not values:
+            return
+        for variable_name in values:
+            if variable_name not in self.variable_names:
+                self.variable_names.append(variable_name)
+        params = {'now': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}
+        for index, (variable_name, variable_value) in enumerate(
+                values.items()):
+            params['variable_name_%s' % index] = variable_name
+            params['variable_value_%s' % index] = str(variable_value)
+        source = ' UNION ALL '.join(
+            SOURCE_ROW % {'index': index} for index in range(len(values)))
+        if supports_merge(self.dbh):
+            execute(self.dbh, MERGE % {'source': source}, params)
+        else:
+            self._update_insert(source, params)
+        if commit:
+            self.dbh.commit()
+        self._rows = None
+        if self.cache is not None:
+            for variable_name in values:
+                self.cache.invalidate(variable_name)
+
+    def upsert_all(self, variable_value, commit=False):
+        """
+        Sets all of the variable_names to the same variable_value.
+        """
+        self.upsert(
+            dict((variable_name, variable_value)
+                 for variable_name in self.variable_names),
+            commit=commit)
+
+    def _update_insert(self, source, params):
+        """
+        UPDATE the existing then INSERT the rest when MERGE is not supported.
+        """
+        execute(
+            self.dbh, UPDATE_MANY % {
+                'source': source,
+                'variable_names': self._in_list((len(params) - 1) // 2)
+            }, params)
+        execute(self.dbh, INSERT_MANY % {'source': source}, params)
+
+    @staticmethod
+    def _in_list(count):
+        """
+        Placeholders for an IN list of count variable_names.
+        See _name_params.
+        """
+        return ', '.join('%%(variable_name_%s)s' % index
+                         for index in range(count))
+
+    @staticmethod
+    def _name_params(variable_names):
+        """
+        Params for the _in_list placeholders.
+        """
+        return dict(('variable_name_%s' % index, variable_name)
+                    for index, variable_name in enumerate(variable_names))
@@ -1,8 +1,10 @@
 """
 Non-specific utils here. To be shared for all.
 """
+import re
 import sys
 import warnings
+from functools import lru_cache
 
 
 def ignore_warnings(my_func):
@@ -20,3 +22,58 @@ def ignore_warnings(my_func):
             my_func(self, *args, **kwargs)
 
     return wrapper
+
+
+PLACEHOLDER_REGEX = re.compile(r'%\((\w+)\)s')
+
+
+def get_paramstyle(connection):
+    """
+    The paramstyle of the DB-API module the connection came from.
+    The snowflake connector sets it per connection.
+    """
+    paramstyle = getattr(connection, '_paramstyle', None)
+    if paramstyle:
+        return paramstyle
+    module_name = type(connection).__module__
+    while module_name:
+        paramstyle = getattr(sys.modules.get(module_name), 'paramstyle', None)
+        if paramstyle:
+            return paramstyle
+        module_name = module_name.rpartition('.')[0]
+
+    return 'qmark'
+
+
+@lru_cache(maxsize=256)
+def convert_placeholders(stmt, paramstyle):
+    """
+    Rewrites %(name)s placeholders for the paramstyle.
+    Returns the new statement and the param names in bind order.
+    """
+    names = tuple(PLACEHOLDER_REGEX.findall(stmt))
+    if paramstyle == 'qmark':
+        stmt = PLACEHOLDER_REGEX.sub('?', stmt)
+    elif paramstyle == 'format':
+        stmt = PLACEHOLDER_REGEX.sub('%s', stmt)
+    elif paramstyle == 'named':
+        stmt = PLACEHOLDER_REGEX.sub(r':\1', stmt)
+    elif paramstyle == 'numeric':
+        counter = iter(range(1, len(names) + 1))
+        stmt = PLACEHOLDER_REGEX.sub(
+            lambda match: ':%s' % next(counter), stmt)
+    elif paramstyle != 'pyformat':
+        raise ValueError("Unsupported paramstyle %s!" % paramstyle)
+
+    return stmt, names
+
+
+def bind(stmt, params, paramstyle):
+    """
+    Returns the statement and params ready for cursor.execute.
+    """
+    stmt, names = convert_placeholders(stmt, paramstyle)
+    if paramstyle in ('pyformat', 'named'):
+        return stmt, dict((name, params[name]) for name in names)
+
+    return stmt, tuple(params[name] for name in names)
@@ -69,3 +69,49 @@ class LoadStateBase(object):
         self.assertEqual(self.load_state.variable_value,
                          parse_date_string(INTRVL_VALUE + ' UTC').strftime(
                              '%Y-%m-%d %H:%M:%S'))
+
+    def test_advance_to(self):
+        self.load_state.delete()
+        self.assertTrue(self.load_state.advance_to('2016-09-01 10:00:00'))
+        self.assertFalse(self.load_state.advance_to('2016-08-01 10:00:00'))
+        self.assertTrue(self.load_state.advance_to('2016-10-01 10:00:00',
+                                                   commit=True))
+        self.assertEqual(self.load_state.variable_value,
+                         '2016-10-01 10:00:00')
+        modified_datetime = self.load_state.modified_datetime
+        self.assertTrue(self.load_state.advance_to('2016-10-01 10:00:00'))
+        self.assertGreaterEqual(self.load_state.modified_datetime,
+                                modified_datetime)
+        self.load_state.select()
+        self.assertEqual(self.load_state.variable_value,
+                         '2016-10-01 10:00:00')
+
+    def test_compare_and_set(self):
+        self.load_state.delete()
+        self.assertTrue(self.load_state.compare_and_set(None, VARIABLE_VALUE))
+        self.assertFalse(
+            self.load_state.compare_and_set(None, VARIBALE_NEW_VALUE))
+        self.assertFalse(
+            self.load_state.compare_and_set(VARIBALE_NEW_VALUE,
+                                            VARIBALE_NEW_VALUE))
+        self.assertTrue(
+            self.load_state.compare_and_set(VARIABLE_VALUE,
+                                            VARIBALE_NEW_VALUE, commit=True))
+        self.load_state.select()
+        self.assertEqual(self.load_state.variable_value, VARIBALE_NEW_VALUE)
+
+    def test_advance_to_non_canonical(self):
+        """
+        Values not written as '%Y-%m-%d %H:%M:%S' are compared as datetimes.
+        """
+        for current_value in ['2016-09-01T10:00:00', '2016-09-01_10',
+                              '2016-09-01 10:00:00.500000']:
+            self.load_state.upsert(current_value, commit=True)
+            self.assertFalse(
+                self.load_state.advance_to('2016-09-01 09:00:00'))
+            self.assertEqual(self.load_state.variable_value, current_value)
+            self.assertTrue(
+                self.load_state.advance_to('2016-09-01 11:00:00',
+                                           commit=True))
+            self.assertEqual(self.load_state.variable_value,
+                             '2016-09-01 11:00:00')
@@ -0,0 +1,34 @@
+import sqlite3
+import unittest
+
+from ox_dw_load_state.util import bind, get_paramstyle
+
+STMT = "SELECT 1 FROM t WHERE a = %(a)s AND b = %(b)s OR a = %(a)s"
+PARAMS = {'a': 1, 'b': 'two', 'unused': None}
+
+
+class TestBind(unittest.TestCase):
+    def test_qmark(self):
+        self.assertEqual(
+            bind(STMT, PARAMS, 'qmark'),
+            ("SELECT 1 FROM t WHERE a = ? AND b = ? OR a = ?", (1, 'two', 1)))
+
+    def test_numeric(self):
+        self.assertEqual(
+            bind(STMT, PARAMS, 'numeric')[0],
+            "SELECT 1 FROM t WHERE a = :1 AND b = :2 OR a = :3")
+
+    def test_pyformat(self):
+        self.assertEqual(
+            bind(STMT, PARAMS, 'pyformat'), (STMT, {'a': 1, 'b': 'two'}))
+
+    def test_unsupported(self):
+        self.assertRaises(ValueError, bind, STMT, PARAMS, 'unknown')
+
+    def test_get_paramstyle(self):
+        self.assertEqual(get_paramstyle(sqlite3.connect(':memory:')),
+                         'qmark')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import sqlite3
+import unittest
+
+from ox_dw_load_state import LoadState, LoadStateCache
+
+HERE = \
+    os.path.join(
+        os.path.abspath(
+            os.path.join(os.path.dirname(__file__))))
+DB_FILE = os.path.join(HERE, 'test_cache.db')
+VARIABLE_NAME = 'TEST_LOAD_STATE'
+
+
+class TestLoadStateCacheSQLITE(unittest.TestCase):
+    def setUp(self):
+        self.dbh = sqlite3.connect(DB_FILE)
+        self.cache = LoadStateCache(ttl=60)
+        LoadState(self.dbh, VARIABLE_NAME).upsert('1', commit=True)
+
+    def tearDown(self):
+        self.dbh.close()
+        if os.path.exists(DB_FILE):
+            os.remove(DB_FILE)
+
+    def test_cached_read(self):
+        LoadState(self.dbh, VARIABLE_NAME, cache=self.cache)
+        # Changed without the cache so not seen until the ttl passes.
+        LoadState(self.dbh, VARIABLE_NAME).upsert('2', commit=True)
+        self.assertEqual(
+            LoadState(self.dbh, VARIABLE_NAME,
+                      cache=self.cache).variable_value, '1')
+        self.cache.ttl = -1
+        self.assertEqual(
+            LoadState(self.dbh, VARIABLE_NAME,
+                      cache=self.cache).variable_value, '2')
+
+    def test_write_through(self):
+        load_state = LoadState(self.dbh, VARIABLE_NAME, cache=self.cache)
+        load_state.upsert('2', commit=True)
+        self.assertEqual(
+            LoadState(self.dbh, VARIABLE_NAME,
+                      cache=self.cache).variable_value, '2')
+        load_state.compare_and_set('2', '3', commit=True)
+        self.assertEqual(
+            LoadState(self.dbh, VARIABLE_NAME,
+                      cache=self.cache).variable_value, '3')
+        load_state.delete()
+        self.assertFalse(
+            LoadState(self.dbh, VARIABLE_NAME, cache=self.cache).exists)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import sqlite3
+import unittest
+
+from ox_dw_load_state import LoadState, LoadStateSet
+
+HERE = \
+    os.path.join(
+        os.path.abspath(
+            os.path.join(os.path.dirname(__file__))))
+DB_FILE = os.path.join(HERE, 'test_set.db')
+VARIABLE_NAMES = ['TEST_LOAD_STATE_A', 'TEST_LOAD_STATE_B', "TEST_'QUOTED'"]
+
+
+class TestLoadStateSetSQLITE(unittest.TestCase):
+    def setUp(self):
+        self.dbh = sqlite3.connect(DB_FILE)
+        self.load_states = LoadStateSet(self.dbh, VARIABLE_NAMES)
+
+    def tearDown(self):
+        self.dbh.close()
+        if os.path.exists(DB_FILE):
+            os.remove(DB_FILE)
+
+    def test_empty(self):
+        for variable_name in VARIABLE_NAMES:
+            self.assertIsNone(self.load_states[variable_name])
+            self.assertNotIn(variable_name, self.load_states)
+
+    def test_upsert_all(self):
+        self.load_states.upsert_all('2016-10-01 00:00:00', commit=True)
+        for variable_name in VARIABLE_NAMES:
+            self.assertEqual(self.load_states[variable_name],
+                             '2016-10-01 00:00:00')
+        self.load_states.upsert_all('2016-10-02 00:00:00', commit=True)
+        self.assertEqual(
+            LoadState(self.dbh, VARIABLE_NAMES[0]).variable_value,
+            '2016-10-02 00:00:00')
+        self.assertEqual(
+            self.dbh.cursor().execute(
+                "SELECT count(*) FROM load_state").fetchone()[0],
+            len(VARIABLE_NAMES))
+
+    def test_upsert(self):
+        LoadState(self.dbh, VARIABLE_NAMES[0]).upsert('1', commit=True)
+        self.load_states.upsert({VARIABLE_NAMES[0]: '2',
+                                 VARIABLE_NAMES[1]: '3'})
+        self.assertEqual(self.load_states[VARIABLE_NAMES[0]], '2')
+        self.assertEqual(self.load_states[VARIABLE_NAMES[1]], '3')
+        self.assertIsNone(self.load_states[VARIABLE_NAMES[2]])
+        self.assertRaises(KeyError, self.load_states.__getitem__, 'UNKNOWN')
+
+
+if __name__ == '__main__':
+    unittest.main()
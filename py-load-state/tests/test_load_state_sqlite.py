@@ -1,7 +1,12 @@
 import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
 from load_state_base import LoadStateBase, VARIABLE_NAME
 import os
 from ox_dw_load_state import LoadState
+from ox_dw_load_state import load_state as load_state_module
 import sqlite3
 
 HERE = \
@@ -20,5 +25,50 @@ class TestLoadStateSQLITE(unittest.TestCase, LoadStateBase):
             os.remove(DB_FILE)
 
 
+class TestAdvanceTo(unittest.TestCase):
+    def tearDown(self):
+        if os.path.exists(DB_FILE):
+            os.remove(DB_FILE)
+
+    def test_lost_races_bounded(self):
+        load_state = LoadState(sqlite3.connect(DB_FILE),
+                               variable_name=VARIABLE_NAME)
+        with mock.patch.object(LoadState, 'compare_and_set',
+                               return_value=False) as compare_and_set:
+            with self.assertRaises(RuntimeError):
+                load_state.advance_to('2016-09-01 10:00:00')
+        self.assertEqual(compare_and_set.call_count,
+                         load_state_module.ADVANCE_ATTEMPTS)
+
+
+class TestSupportsMerge(unittest.TestCase):
+    def tearDown(self):
+        if os.path.exists(DB_FILE):
+            os.remove(DB_FILE)
+
+    def test_from_driver(self):
+        connection = type('SnowflakeConnection', (object, ), {
+            '__module__': 'snowflake.connector.connection'})()
+        self.assertTrue(load_state_module.supports_merge(connection))
+        self.assertTrue(load_state_module.supports_merge(
+            mock.Mock(connection=connection)))
+        self.assertFalse(
+            load_state_module.supports_merge(sqlite3.connect(':memory:')))
+
+    def test_merge_error_raised(self):
+        """
+        A failing MERGE is not retried as UPDATE/INSERT.
+        """
+        load_state = LoadState(sqlite3.connect(DB_FILE),
+                               variable_name=VARIABLE_NAME)
+        load_state.upsert('a', commit=True)
+        with mock.patch.object(load_state_module, 'supports_merge',
+                               return_value=True):
+            with self.assertRaises(sqlite3.OperationalError):
+                load_state.compare_and_set('a', 'b')
+        load_state.select()
+        self.assertEqual(load_state.variable_value, 'a')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,7 +1,8 @@
 """
 All of our common classes and functions.
 """
-from .logger import get_etl_logger
+from .latency import print_latency_report
+from .logger import JSON, JsonFormatter, get_etl_logger, log_timed
 from .settings import (
     LOG_DIRECTORY,
     LOG_DATE_FORMAT,
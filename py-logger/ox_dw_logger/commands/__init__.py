@@ -1,4 +1,8 @@
 """
 All of our common VARS, Classes and functions.
 """
-from .log_parser import etl_logs_email_report, etl_logs_print_report
+from .log_parser import (
+    etl_logs_email_report,
+    etl_logs_print_latency_report,
+    etl_logs_print_report
+)
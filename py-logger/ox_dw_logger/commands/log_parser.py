@@ -3,7 +3,8 @@ Command line functions here.
 """
 import argparse
 import textwrap
-from ..log_parser import TAGS, email_report, print_report
+from ..latency import print_latency_report
+from ..log_parser import PROCESSES, TAGS, email_report, print_report
 from ..settings import ENV
 
 
@@ -31,13 +32,21 @@ def etl_logs_email_report():
         help=textwrap.dedent("""
             Who to send the email to? Defaults to %s"""
                              % ENV.get('CHECK_ERROR_EMAIL_RECIPIENTS')))
+    parser.add_argument(
+        '--processes',
+        default=PROCESSES,
+        type=int,
+        help=textwrap.dedent("""
+            Parse the log files in this many worker processes.
+            0 uses every core. Default is %s.""" % PROCESSES))
 
     options = parser.parse_args()
 
     email_report(
         options.tag,
         options.email,
-        log_files=options.log_files)
+        log_files=options.log_files,
+        processes=options.processes)
 
 
 def etl_logs_print_report():
@@ -71,11 +80,54 @@ def etl_logs_print_report():
         help=textwrap.dedent("""
             Output in HTML?
             Default will be a pretty ascii table output."""))
+    parser.add_argument(
+        '--processes',
+        default=PROCESSES,
+        type=int,
+        help=textwrap.dedent("""
+            Parse the log files in this many worker processes.
+            0 uses every core. Default is %s.""" % PROCESSES))
 
     options = parser.parse_args()
 
     print_report(
         options.tag,
+        options.log_files,
+        hours=options.hours,
+        html=options.html,
+        processes=options.processes)
+
+
+def etl_logs_print_latency_report():
+    """
+    Prints table to stdout of the p50/p95/max seconds each job and step took
+    and the seconds since each last finished over the last n hours.
+    """
+    parser = argparse.ArgumentParser(
+        description=etl_logs_print_latency_report.__doc__)
+    parser.add_argument(
+        'log_files',
+        nargs='*',
+        help=textwrap.dedent("""
+            List of log files to parse.
+            Default looks for all *.log files recursively in the log_root."""))
+    parser.add_argument(
+        '--hours',
+        default=24,
+        type=int,
+        help=textwrap.dedent("""
+            How many hours back to report on?
+            Default is 24."""))
+    parser.add_argument(
+        '--html',
+        action="store_true",
+        help=textwrap.dedent("""
+            Output in HTML?
+            Default will be a pretty ascii table output."""))
+
+    options = parser.parse_args()
+
+    print_latency_report(
         options.log_files,
         hours=options.hours,
         html=options.html)
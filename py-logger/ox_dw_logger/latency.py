@@ -0,0 +1,156 @@
+"""
+For reporting etl latency from the start and finish lines in the etl logs.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+import math
+import os
+import re
+from prettytable import PrettyTable
+from .log_parser import (
+    NO_NEW_DATA, TABLE_WRAPPER, TEXT_WRAPPER,
+    LogParser, get_logs, inline_style, parse_log_date
+)
+from .settings import LOG_DATE_REGEX, LOG_DIRECTORY
+
+Latency = namedtuple('Latency',
+                     ['job', 'step', 'count', 'p50_seconds', 'p95_seconds',
+                      'max_seconds', 'last_finished', 'lag_seconds'])
+NAME = 'etl_latency'
+DOWNLOAD = 'download'  # Step of the START/FINISH: DatasetSerial(...) lines
+# Only the INFO start and finish lines are kept in the local db.
+HEAD_REGEX = \
+    r'%s (INFO): (?:\[[^\]]*\] )?' \
+    r'((?:START|FINISH): DatasetSerial\(.*|(?:Starting|Finished) .*)' % \
+    LOG_DATE_REGEX
+STEP_REGEX = re.compile(
+    r'(?P<event>START|FINISH): DatasetSerial\((?P<serial>[^)]*)\)|'
+    r'(?P<verb>Starting|Finished) (?P<step>[^\s.]+(?:\.[^\s.]+)*)'
+    r'(?: in (?P<elapsed>\d+(?:\.\d+)?) (?P<unit>seconds|ms))?')
+
+
+def get_latencies(job, rows, now=None):
+    """
+    Returns a Latency per step of the job from the LogRows of start and
+    finish messages.
+    START/FINISH: DatasetSerial(...) are the download step paired on serial.
+    Starting/Finished use the elapsed time logged if any else the time since
+    the step was started.
+    :param job: Name of the job the rows were logged by.
+    :param rows: LogRows from the parser.
+    :param now: UTC time to measure the lag since the last finish from.
+    """
+    if now is None:
+        now = datetime.utcnow()
+    started = {}
+    durations = {}
+    finished = {}
+    for row in sorted(rows, key=lambda log_row: str(log_row.transaction_time)):
+        matcher = STEP_REGEX.match(row.message)
+        if not matcher:
+            continue
+        timestamp = parse_log_date(row.transaction_time)
+        if matcher.group('event'):
+            step = DOWNLOAD
+            key = (step, matcher.group('serial'))
+            is_start = matcher.group('event') == 'START'
+        else:
+            step = matcher.group('step')
+            key = (step, None)
+            is_start = matcher.group('verb') == 'Starting'
+        if is_start:
+            started[key] = timestamp
+            continue
+        finished[step] = max(timestamp, finished.get(step, timestamp))
+        start = started.pop(key, None)
+        if matcher.group('elapsed') is not None:
+            seconds = float(matcher.group('elapsed'))
+            if matcher.group('unit') == 'ms':
+                seconds /= 1000
+        elif start is not None:
+            seconds = (timestamp - start).total_seconds()
+        else:
+            continue
+        durations.setdefault(step, []).append(seconds)
+
+    latencies = []
+    for step in sorted(finished):
+        seconds = sorted(durations.get(step, []))
+        latencies.append(Latency(
+            job, step, len(seconds),
+            percentile(seconds, 50), percentile(seconds, 95),
+            seconds[-1] if seconds else None,
+            finished[step], (now - finished[step]).total_seconds()))
+
+    return latencies
+
+
+def get_latency_report(log_files=None, hours=24, path=LOG_DIRECTORY):
+    """
+    This will return both the html and the text bodies for the latency
+    report of the last hours.
+    """
+    now = datetime.utcnow()  # The etl_logger logs in UTC.
+    since = (now - timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
+    table = get_latency_table(log_files or get_logs(path), since, now)
+    if table.rowcount == 0:
+        text = "%s since %s." % (NO_NEW_DATA, since)
+        return text, text
+    title = "ETL latency since %s" % since
+
+    return (
+        TEXT_WRAPPER % (title, table.get_string()),
+        inline_style(TABLE_WRAPPER % (title, table.get_html_string(
+            attributes={'name': NAME, 'border': 1, 'valign': 'top'}))))
+
+
+def get_latency_table(log_files, since=None, now=None):
+    """
+    Returns a table of the Latency of each job and step in the log files.
+    The job is the log file name without the extension.
+    """
+    table = PrettyTable()
+    table.field_names = list(Latency._fields)
+    table.align = 'l'
+    table.header = True
+    table.format = True
+    for log_file in log_files:
+        parser = LogParser(
+            log_file, tag='INFO', name=NAME, since=since,
+            head_regex=HEAD_REGEX)
+        parser.store_new()
+        job = os.path.splitext(os.path.basename(log_file))[0]
+        for latency in get_latencies(job, parser, now):
+            table.add_row([
+                round(value, 3) if isinstance(value, float) else value
+                for value in latency
+            ])
+
+    return table
+
+
+def percentile(values, percent):
+    """
+    Nearest rank percentile of the sorted values.
+    """
+    if not values:
+        return None
+
+    return values[max(0, int(math.ceil(percent / 100.0 * len(values))) - 1)]
+
+
+def print_latency_report(log_files=None, hours=24, html=False,
+                         path=LOG_DIRECTORY):
+    """
+    Outputs to the console the p50/p95/max seconds of each job and step and
+    the seconds since each last finished.
+    :param log_files: List of log files.
+    :param hours: How many hours back to report on.
+    :param html: Print out html?
+    :param path: If log_files is None then where to look for log files?
+    """
+    text, html_body = get_latency_report(log_files, hours=hours, path=path)
+    if html:
+        print(html_body)
+    else:
+        print(text)
@@ -4,6 +4,9 @@ For parsing etl logs.
 from collections import namedtuple
 from datetime import datetime, timedelta
 from glob import glob
+import json
+from multiprocessing import Pool
+import mmap
 import os
 import re
 import smtplib
@@ -16,12 +19,16 @@ from prettytable import PrettyTable
 from dateutil.parser import parse as date_parse
 from .settings import (
     LOG_DIRECTORY, LOCAL_OUTPUT,
-    LOG_DATE_REGEX, ENV, HOSTNAME
+    LOG_DATE_FORMAT, LOG_DATE_REGEX, ENV, HOSTNAME
 )
 
 LogRow = namedtuple('LogRow',
                     ['log_file', 'transaction_time', 'tag', 'message'])
 MAX_HOURS = 168
+LOGS_TABLE_DAY_FORMAT = '%Y%m%d'  # Suffix of the day bucketed log tables
+# Worker processes parsing log files. 1 parses them one after another and
+# 0 uses every core.
+PROCESSES = int(ENV.get('LOG_PARSER_PROCESSES', 1))
 NAME = 'etl_log_parser'
 NO_NEW_DATA = 'No new data'
 TAGS = ['ERROR', 'CRITICAL']
@@ -39,13 +46,15 @@ def email_report(
         tag,
         email=None,
         log_files=None,
-        path=LOG_DIRECTORY):
+        path=LOG_DIRECTORY,
+        processes=PROCESSES):
     """
     Given list of log files and a single tag will email any new messages.
     """
     if email is None:
         email = ENV['CHECK_ERROR_EMAIL_RECIPIENTS']
-    text, html_body = get_reports(tag, log_files=log_files, path=path)
+    text, html_body = get_reports(
+        tag, log_files=log_files, path=path, processes=processes)
     if text.startswith(NO_NEW_DATA):
         sys.stderr.write("%s\n" % text)
         return
@@ -70,13 +79,15 @@ def get_logs(path=LOG_DIRECTORY):
             yield log_file
 
 
-def get_reports(tag, log_files=None, since=None, path=LOG_DIRECTORY):
+def get_reports(tag, log_files=None, since=None, path=LOG_DIRECTORY,
+                processes=PROCESSES):
     """
     This will return both the html and the text bodies for your report.
     """
     text = ''
     html = ''
-    for log_file, table in get_tables(tag, log_files or get_logs(path), since):
+    for log_file, table in get_tables(
+            tag, log_files or get_logs(path), since, processes=processes):
         if table.rowcount == 0:
             continue
         text += TEXT_WRAPPER % (log_file, table.get_string())
@@ -89,59 +100,168 @@ def get_reports(tag, log_files=None, since=None, path=LOG_DIRECTORY):
         text = "%s since %s." % (NO_NEW_DATA, since)
         html = text
     else:
-        # Gmail doesn't recognize the <style> tag or external css source
-        # So here we are applying inline style.
-        html = re.sub(r'>\n?\s+<', '><', html)
-        html = \
-            re.sub(
-                '<tr',
-                '<tr style="background: #FFF; font-family: monospace; color:'
-                ' black;"',
-                html)
-        one = 'background: #FFF'
-        two = 'background: #CCC'
-        html = \
-            re.sub(
-                r'(%(one)s(?:(?!%(one)s).)*)%(one)s((?:(?!%(one)s).)*)' % {
-                    'one': one},
-                r'\1%s\2' % two, html)
-        html = \
-            re.sub(r'td style="', 'td style="font-family: monospace; ', html)
-        html = re.sub('><', '>\n<', html)
+        html = inline_style(html)
 
     return text, html
 
 
+def inline_style(html):
+    """
+    Gmail doesn't recognize the <style> tag or external css source
+    So here we are applying inline style to the html tables.
+    """
+    html = re.sub(r'>\n?\s+<', '><', html)
+    html = \
+        re.sub(
+            '<tr',
+            '<tr style="background: #FFF; font-family: monospace; color:'
+            ' black;"',
+            html)
+    one = 'background: #FFF'
+    two = 'background: #CCC'
+    html = \
+        re.sub(
+            r'(%(one)s(?:(?!%(one)s).)*)%(one)s((?:(?!%(one)s).)*)' % {
+                'one': one},
+            r'\1%s\2' % two, html)
+    html = re.sub(r'td style="', 'td style="font-family: monospace; ', html)
+
+    return re.sub('><', '>\n<', html)
+
+
 def get_table(tag, log_file, since=None):
     """
     Returns all of the rows for a table for a single tag and log_file.
     """
-    table = PrettyTable()
-    table.field_names = ['transaction_time', 'tag', 'message']
-    table.align = 'l'
-    table.header = True
-    table.format = True
     parser = LogParser(log_file, tag=tag, since=since)
     parser.store_new()
-    for row in parser:
-        table.add_row([row.transaction_time, row.tag, row.message])
 
-    return table
+    return _get_table(parser)
 
 
-def get_tables(tag, log_files=None, since=None):
+def get_tables(tag, log_files=None, since=None, processes=PROCESSES):
     """
     yields table objects for later printing.
     Will attempt to use skip_bytes stored for each log.
     :param tag: Which tag do you want to report on? See log levels.
     :param log_files: List of log files.
     :param since: Time stamp of how far to get rows for.
+    :param processes: Parse the log files in a pool of this many worker
+        processes with this process storing what they return. 0 uses every
+        core and 1 parses one log file after another.
     """
+    if processes == 1:
+        for log_file in log_files:
+            yield log_file, get_table(tag, log_file, since=since)
+        return
+
+    # All parsers share one connection so this process is the only writer.
+    parsers = []
+    local_db = None
     for log_file in log_files:
-        yield log_file, get_table(tag, log_file, since=since)
+        parser = LogParser(log_file, tag=tag, since=since, local_db=local_db)
+        local_db = parser.local_db
+        parsers.append(parser)
+    if not parsers:
+        return
+    pool = Pool(processes or None)
+    try:
+        results = pool.imap(
+            _parse_log, [parser.parse_args() for parser in parsers])
+        for parser, (rows, position) in zip(parsers, results):
+            parser.store(rows, position, commit=False)
+        local_db.commit()
+    finally:
+        pool.close()
+        pool.join()
+    for parser in parsers:
+        yield parser.log_file, _get_table(parser)
+
+
+def from_json_line(line):
+    """
+    Lines of a log_format=JSON entry as the default LOG_FORMAT writes them,
+    [time] level: message then any exception, so the same regexes parse both.
+    Anything that is not a JSON entry is returned as is.
+    :return: Tuple of lines.
+    """
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return (line, )
+    if not isinstance(entry, dict) or 'time' not in entry or \
+            'level' not in entry:
+        return (line, )
+    text = '[%s] %s: %s\n' % (entry['time'], entry['level'],
+                               entry.get('message'))
+    if entry.get('exception'):
+        text += entry['exception'] + '\n'
+
+    return tuple(text.splitlines(True))
+
+
+def parse_log(log_file, tag, since, skip_bytes, log_date_regex, head_regex):
+    """
+    Memory maps the log file and parses the messages for the tag after
+    skip_bytes that are newer than since.
+    Entries written with log_format=JSON are parsed the same as text lines.
+    Does not touch the local db so it can run in a worker process.
+    :return: List of LogRow and the position to skip to next time.
+    """
+    since = parse_log_date(since)
+    log_date_pattern = re.compile(log_date_regex)
+    head_pattern = re.compile(head_regex)
+    rows = []
+    timestamp = None
+    message = None
+    with open(log_file, 'rb') as log:
+        size = os.fstat(log.fileno()).st_size
+        if size <= skip_bytes:
+            return rows, skip_bytes
+        mapped = mmap.mmap(log.fileno(), size, access=mmap.ACCESS_READ)
+        try:
+            mapped.seek(skip_bytes)
+            for line in iter(mapped.readline, b''):
+                line = line.decode('utf-8', 'replace')
+                lines = from_json_line(line) if line.startswith('{') else \
+                    (line, )
+                for line in lines:
+                    if log_date_pattern.match(line):
+                        if message is not None:
+                            rows.append(
+                                LogRow(log_file, timestamp, tag, message))
+                            message = None
+                        matcher = head_pattern.match(line)
+                        if matcher:
+                            timestamp = parse_log_date(matcher.group(1))
+                            if timestamp > since:
+                                message = matcher.group(3)
+                    elif message is not None:
+                        message += line
+            position = mapped.tell()
+        finally:
+            mapped.close()
+    if message is not None:
+        rows.append(LogRow(log_file, timestamp, tag, message))
+
+    return rows, position
+
+
+def parse_log_date(value, date_format=LOG_DATE_FORMAT):
+    """
+    Parses timestamps written in the fixed LOG_DATE_FORMAT without guessing.
+    Falls back to dateutil for anything else, like a custom log_date_regex.
+    """
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.strptime(value, date_format)
+    except ValueError:
+        return date_parse(value)
 
 
-def print_report(tag, log_files=None, hours=1, html=False, path=LOG_DIRECTORY):
+def print_report(tag, log_files=None, hours=1, html=False, path=LOG_DIRECTORY,
+                 processes=PROCESSES):
     """
     Given list of log files and a single tag will output to the console the
     messages.
@@ -150,18 +270,38 @@ def print_report(tag, log_files=None, hours=1, html=False, path=LOG_DIRECTORY):
     :param hours: How many hours back to report on.
     :param html: Print out html?
     :param path: If log_files is None then where to look for log files?
+    :param processes: Worker processes parsing the log files. See get_tables.
     """
     since = (
         datetime.now() - timedelta(hours=hours)
     ).strftime('%Y-%m-%d %H:%M:%S')
-    text, html_body = \
-        get_reports(tag, log_files=log_files, since=since, path=path)
+    text, html_body = get_reports(
+        tag, log_files=log_files, since=since, path=path, processes=processes)
     if html:
         print(html_body)
     else:
         print(text)
 
 
+def _get_table(parser):
+    """
+    Table of the stored rows for the parser.
+    """
+    table = PrettyTable()
+    table.field_names = ['transaction_time', 'tag', 'message']
+    table.align = 'l'
+    table.header = True
+    table.format = True
+    for row in parser:
+        table.add_row([row.transaction_time, row.tag, row.message])
+
+    return table
+
+
+def _parse_log(args):
+    return parse_log(*args)
+
+
 class LogParser(object):
     """
     Used for parsing out log lines of a certain tag back to a certain range.
@@ -187,6 +327,7 @@ class LogParser(object):
             r'%s (%s): (.*)' % (self.log_date_regex, self.tag)
         self._local_db = local_db
         self._log_time = None
+        self._log_date_pattern = re.compile(self._log_date_regex)
         self.local_db_file = \
             os.path.join(LOCAL_OUTPUT, '.'.join([self.name, 'db']))
         self._init_local_db()
@@ -255,9 +396,11 @@ class LogParser(object):
                 # the first line of the log_file.
                 with open(self.log_file, 'r') as log_file:
                     for line in log_file:
-                        matcher = re.match(self.log_date_regex, line)
+                        if line.startswith('{'):
+                            line = from_json_line(line)[0]
+                        matcher = self._log_date_pattern.match(line)
                         if matcher:
-                            self._log_time = date_parse(matcher.group(1))
+                            self._log_time = parse_log_date(matcher.group(1))
                             return self._log_time
 
             self._log_time = datetime.now()
@@ -290,18 +433,25 @@ class LogParser(object):
 
     def cleanup(self, max_hours=MAX_HOURS):
         """
-        Remove log data from the local_db older than the MAX_HOURS.
+        Drops the day tables of log data from the local_db older than the
+        MAX_HOURS instead of deleting rows so the cost stays flat.
         """
         transaction_time = self.since
         if transaction_time is None:
             transaction_time = (
                 datetime.now() - timedelta(hours=max_hours)
             ).strftime('%Y-%m-%d %H:%M:%S')
-        self.local_db.execute("""
-            DELETE FROM %s_logs WHERE transaction_time < ?
-        """ % self.name, [transaction_time])
-        self.local_db.execute('VACUUM')
+        oldest = parse_log_date(transaction_time).strftime(
+            LOGS_TABLE_DAY_FORMAT)
+        expired = [table for table in self._day_tables()
+                   if table.rsplit('_', 1)[1] < oldest]
+        if not expired:
+            return
+        for table in expired:
+            self.local_db.execute("DROP TABLE %s" % table)
+        self._create_logs_view()
         self.local_db.commit()
+        self.local_db.execute('PRAGMA incremental_vacuum')
 
     def get_since(self, max_hours=MAX_HOURS):
         """
@@ -367,10 +517,11 @@ class LogParser(object):
                                   [self.log_file, self.log_time, self.tag])
         self.local_db.commit()
 
-    def set_skip_bytes(self, skip_bytes):
+    def set_skip_bytes(self, skip_bytes, commit=True):
         """
         Sets the skip_bytes for the log_file/log_time.
         :param skip_bytes: What to set to in the db.
+        :param commit: Commit now or leave it to the caller?
         """
         self.local_db.execute("""
             UPDATE %s_position
@@ -387,32 +538,127 @@ class LogParser(object):
              WHERE (Select Changes() = 0)""" % self.name,
                               [self.log_file, self.log_time, self.tag,
                                skip_bytes])
-        self.local_db.commit()
+        if commit:
+            self.local_db.commit()
+
+    def parse_args(self):
+        """
+        Arguments to parse_log for the new messages in this log file.
+        """
+        since = self.since
+        if since is None:
+            since = self.get_since()
+
+        return (self.log_file, self.tag, since, self.get_skip_bytes(),
+                self.log_date_regex, self.head_regex)
+
+    def store(self, rows, position, commit=True):
+        """
+        Adds the parsed rows to the day tables in the local db along with the
+        new position in a single transaction.
+        :param rows: LogRow list from parse_log.
+        :param position: Where to start parsing next time.
+        :param commit: Commit now or leave it to the caller?
+        """
+        days = {}
+        for row in rows:
+            days.setdefault(
+                row.transaction_time.strftime(LOGS_TABLE_DAY_FORMAT), []
+            ).append([self.log_file, self.log_time, row.transaction_time,
+                      row.tag, msgpack.packb(row.message)])
+        for day, day_rows in sorted(days.items()):
+            self.local_db.executemany("""
+                INSERT INTO
+                %s(log_file, log_time, transaction_time, tag, message)
+                VALUES(?, ?, ?, ?, ?)""" % self._create_day_table(day),
+                                      day_rows)
+        self.set_skip_bytes(position, commit=commit)
 
     def store_new(self):
         """
         Parses the logs from the last position and adds to the local db.
         """
-        for row in self._new_rows():
+        self.store(*parse_log(*self.parse_args()))
+
+    def _create_day_table(self, day):
+        """
+        Creates if needed the log table for the day, in the
+        LOGS_TABLE_DAY_FORMAT, and adds it to the %s_logs view.
+        :return: The table name.
+        """
+        table = '%s_logs_%s' % (self.name, day)
+        if not self._exists(table):
             self.local_db.execute("""
-                INSERT INTO
-                %s_logs(log_file, log_time, transaction_time, tag, message)
-                VALUES(?, ?, ?, ?, ?)""" % self.name,
-                                  [self.log_file, self.log_time,
-                                   row.transaction_time,
-                                   row.tag, msgpack.packb(row.message)])
-            self.local_db.commit()
+                CREATE TABLE %s(
+                    log_file TEXT NOT NULL,
+                    log_time FLOAT NOT NULL,
+                    transaction_time TEXT NOT NULL,
+                    tag TEXT NOT NULL,
+                    message BLOB)""" % table)
+            self.local_db.execute("""
+                CREATE INDEX %s_idx
+                    ON %s(log_file, log_time, tag, transaction_time)"""
+                                  % (table, table))
+            self._create_logs_view()
+
+        return table
+
+    def _create_logs_view(self):
+        """
+        The %s_logs view reads the day tables as one.
+        """
+        selects = [
+            "SELECT log_file, log_time, transaction_time, tag, message "
+            "FROM %s" % table for table in self._day_tables()
+        ] or ["SELECT NULL AS log_file, NULL AS log_time, "
+              "NULL AS transaction_time, NULL AS tag, NULL AS message "
+              "WHERE 0"]
+        self.local_db.execute("DROP VIEW IF EXISTS %s_logs" % self.name)
+        self.local_db.execute("CREATE VIEW %s_logs AS %s" % (
+            self.name, " UNION ALL ".join(selects)))
+
+    def _day_tables(self):
+        """
+        Names of the day tables of log data oldest first.
+        """
+        return [row[0] for row in self.local_db.execute("""
+            SELECT name
+              FROM sqlite_master
+             WHERE type = 'table'
+               AND name GLOB ?
+             ORDER BY name""", ['%s_logs_[0-9]*' % self.name])]
+
+    def _exists(self, name, object_type='table'):
+        """
+        Is there a table or view of this name in the local db?
+        """
+        for _ in self.local_db.execute("""
+                SELECT 1
+                  FROM sqlite_master
+                 WHERE type = ? AND name = ?""", [object_type, name]):
+            return True
+
+        return False
 
     def _init_local_db(self):
         """
         Create all of the tables needed for this named parser.
         """
+        # auto_vacuum only takes on a new db and lets cleanup give back the
+        # pages of dropped day tables without a full VACUUM.
+        self.local_db.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        self.local_db.execute('PRAGMA journal_mode = WAL')
+        self.local_db.execute('PRAGMA synchronous = NORMAL')
         self.local_db.execute("""
             CREATE TABLE IF NOT EXISTS %s_email(
                 log_file TEXT NOT NULL,
                 log_time REAL NOT NULL,
                 transaction_time TEXT NOT NULL,
                 tag TEXT NOT NULL)""" % self.name)
+        self.local_db.execute("""
+            CREATE INDEX IF NOT EXISTS %s_email_idx
+                ON %s_email(log_file, log_time, tag)"""
+                              % (self.name, self.name))
         self.local_db.execute("""
             CREATE TABLE IF NOT EXISTS %s_position(
                 log_file TEXT NOT NULL,
@@ -420,45 +666,36 @@ class LogParser(object):
                 tag TEXT NOT NULL,
                 skip_bytes INT NOT NULL DEFAULT 0)""" % self.name)
         self.local_db.execute("""
-            CREATE TABLE IF NOT EXISTS %s_logs(
-                log_file TEXT NOT NULL,
-                log_time FLOAT NOT NULL,
-                transaction_time TEXT NOT NULL,
-                tag TEXT NOT NULL,
-                message BLOB)""" % self.name)
+            CREATE INDEX IF NOT EXISTS %s_position_idx
+                ON %s_position(log_file, log_time, tag)"""
+                              % (self.name, self.name))
+        if self._exists('%s_logs' % self.name):
+            self._split_logs_table()
+        elif not self._exists('%s_logs' % self.name, 'view'):
+            self._create_logs_view()
         self.local_db.commit()
 
-    def _new_rows(self):
+    def _split_logs_table(self):
         """
-        Opens the log file and yields LogRow object for matching tag.
+        Moves the rows of the single %s_logs table from before the day
+        tables into them.
         """
-        since = self.since
-        if since is None:
-            since = self.get_since()
-        since = date_parse(since)
-        try:
-            with open(self.log_file, 'r') as log_file:
-                timestamp = None
-                message = None
-                log_file.seek(self.get_skip_bytes())
-                for line in log_file:
-                    if re.match(self.log_date_regex, line):
-                        if message is not None:
-                            yield LogRow(self.log_file, timestamp, self.tag,
-                                         message)
-                            message = None
-                        matcher = re.match(self.head_regex, line)
-                        if matcher:
-                            timestamp = date_parse(matcher.group(1))
-                            if timestamp > since:
-                                message = matcher.group(3)
-                    elif message is not None:
-                        message += line
-                if message is not None:
-                    yield LogRow(self.log_file, timestamp, self.tag, message)
-                self.set_skip_bytes(log_file.tell())
-        except Exception:
-            raise
+        legacy = '%s_logs_legacy' % self.name
+        self.local_db.execute(
+            "ALTER TABLE %s_logs RENAME TO %s" % (self.name, legacy))
+        day = "strftime('%s', transaction_time)" % LOGS_TABLE_DAY_FORMAT
+        days = [row[0] for row in self.local_db.execute(
+            "SELECT DISTINCT %s FROM %s WHERE %s IS NOT NULL"
+            % (day, legacy, day))]
+        for value in days:
+            self.local_db.execute("""
+                INSERT INTO %s
+                SELECT log_file, log_time, transaction_time, tag, message
+                  FROM %s
+                 WHERE %s = ?""" % (self._create_day_table(value), legacy,
+                                    day), [value])
+        self.local_db.execute("DROP TABLE %s" % legacy)
+        self._create_logs_view()
 
     def _rows(self):
         """
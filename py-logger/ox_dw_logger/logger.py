@@ -1,10 +1,14 @@
 """
 This is the recommended logger to use to ensure consistency in the way we log.
 """
+import atexit
+import json
 import logging
 import logging.handlers
 import os
+import queue
 import time
+from contextlib import contextmanager
 from .settings import (LOG_DIRECTORY, LOG_DATE_FORMAT, ENV)
 
 LOG_LEVEL = getattr(logging, ENV.get('LOG_LEVEL', 'ERROR'))  # Default ERROR
@@ -12,8 +16,153 @@ LOG_FORMAT = '[%(asctime)s] %(levelname)s: %(message)s'
 LOG_FORMAT_DEBUG = \
     '[%(asctime)s] %(levelname)s: [%(module)s:%(name)s.%(funcName)s:%(' \
     'lineno)d] %(message)s'
+JSON = 'json'  # log_format for JSON lines
+JSON_FIELDS = ('job', 'feed', 'serial', 'step', 'elapsed_ms')
 MAX_BYTES = 100000000
 BACKUP_COUNT = 5
+LOG_ASYNC = ENV.get('LOG_ASYNC', False)
+QUEUE_SIZE = 10000
+DROP = 'drop'
+BLOCK = 'block'
+
+
+# Attributes of every LogRecord. Anything else was passed in extra.
+RECORD_ATTRIBUTES = frozenset(
+    logging.LogRecord('', 0, '', 0, '', None, None).__dict__) | \
+    frozenset(['message', 'asctime'])
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line with time, level, logger, message and the
+    JSON_FIELDS(null when not given) plus anything else passed in extra.
+    Example:
+        logger.info("Loaded", extra={'job': job_name, 'serial': serial})
+    """
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for field in JSON_FIELDS:
+            entry[field] = None
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+
+        return json.dumps(entry, default=str)
+
+
+@contextmanager
+def log_timed(logger, step, level=logging.INFO, **fields):
+    """
+    Logs the start and finish of the step with elapsed_ms and the fields as
+    extra, which are JSON fields with log_format=JSON.
+    Yields the fields dict so more can be added along the way.
+    Logs at ERROR with the exception if the block fails.
+    Example:
+        with log_timed(logger, 'copy_into', job=job_name) as fields:
+            fields['rowcount'] = dbh.execute(stmt)
+    """
+    fields['step'] = step
+    logger.log(level, "Starting %s", step, extra=dict(fields))
+    start = time.time()
+    try:
+        yield fields
+    except Exception:
+        fields['elapsed_ms'] = int((time.time() - start) * 1000)
+        logger.exception("Failed %s after %s ms", step, fields['elapsed_ms'],
+                         extra=dict(fields))
+        raise
+    fields['elapsed_ms'] = int((time.time() - start) * 1000)
+    logger.log(level, "Finished %s in %s ms", step, fields['elapsed_ms'],
+               extra=dict(fields))
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on a bounded queue written by a background QueueListener so
+    the caller never waits on disk writes or rotation.
+    When the queue is full records below WARNING are dropped and counted
+    with the DROP overflow policy. Everything else waits for room.
+    A forked child has no listener thread so it writes straight to the file.
+    """
+
+    def __init__(self, log_queue, target, overflow=DROP):
+        super(AsyncQueueHandler, self).__init__(log_queue)
+        self.target = target
+        self.listener = None
+        self.overflow = overflow
+        self.queued = 0
+        self.dropped = 0
+        self.pid = os.getpid()
+
+    @property
+    def baseFilename(self):
+        """
+        Same as the file handler written to.
+        """
+        return self.target.baseFilename
+
+    def emit(self, record):
+        if os.getpid() != self.pid:
+            if record.levelno >= self.target.level:
+                self.target.handle(record)
+            return
+        super(AsyncQueueHandler, self).emit(record)
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.overflow == DROP and record.levelno < logging.WARNING:
+                self.dropped += 1
+                return
+            self.queue.put(record)
+        self.queued += 1
+
+
+class AsyncQueueListener(logging.handlers.QueueListener):
+    """
+    Writes the queued records then reports any that were dropped on stop.
+    """
+
+    def __init__(self, queue_handler):
+        super(AsyncQueueListener, self).__init__(
+            queue_handler.queue, queue_handler.target,
+            respect_handler_level=True)
+        self.queue_handler = queue_handler
+        queue_handler.listener = self
+
+    def enqueue_sentinel(self):
+        # Wait for room rather than fail when the queue is full.
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        """
+        Flushes the queue and stops the thread. Safe to call more than once.
+        Does nothing in a forked child as the thread is the parent's.
+        """
+        if self._thread is None or os.getpid() != self.queue_handler.pid:
+            return
+        super(AsyncQueueListener, self).stop()
+        if self.queue_handler.dropped:
+            target = self.queue_handler.target
+            target.handle(
+                logging.LogRecord(
+                    self.queue_handler.name, logging.WARNING, __file__, 0,
+                    "Dropped %s of %s log records as the queue was full.",
+                    (self.queue_handler.dropped,
+                     self.queue_handler.dropped + self.queue_handler.queued),
+                    None, func='stop'))
+        self.queue_handler.target.flush()
 
 
 def get_etl_logger(log_name='etl_logger',
@@ -22,12 +171,20 @@ def get_etl_logger(log_name='etl_logger',
                    log_level=LOG_LEVEL,
                    log_date_format=LOG_DATE_FORMAT,
                    max_bytes=MAX_BYTES,
-                   backup_count=BACKUP_COUNT):
+                   backup_count=BACKUP_COUNT,
+                   async_=LOG_ASYNC,
+                   queue_size=QUEUE_SIZE,
+                   overflow=DROP):
     """
     Returns a logger at the specified/default location in the specified
     or default format.
     Also note that this will return any named logger that already
     exists despite any options.
+    log_format: JSON writes JSON lines with JsonFormatter.
+    async_: Write from a background thread. Default is LOG_ASYNC in env.yaml.
+        queue_size: Max records waiting to be written.
+        overflow: DROP records below WARNING when the queue is full or BLOCK.
+        The queue is flushed on exit.
     """
     if log_name in logging.Logger.manager.loggerDict.keys():
         return logging.Logger.manager.loggerDict.get(log_name)
@@ -41,7 +198,10 @@ def get_etl_logger(log_name='etl_logger',
     if log_format is None:
         log_format = \
             LOG_FORMAT_DEBUG if log_level == logging.DEBUG else LOG_FORMAT
-    formatter = logging.Formatter(log_format, datefmt=log_date_format)
+    if log_format == JSON:
+        formatter = JsonFormatter(datefmt=log_date_format)
+    else:
+        formatter = logging.Formatter(log_format, datefmt=log_date_format)
     formatter.converter = time.gmtime
 
     # Initialize the logger
@@ -56,6 +216,15 @@ def get_etl_logger(log_name='etl_logger',
         logging.handlers.RotatingFileHandler(
             log_file, maxBytes=max_bytes, backupCount=backup_count)
     rotating_file_handler.setFormatter(formatter)
-    logger.addHandler(rotating_file_handler)
+    if async_:
+        queue_handler = AsyncQueueHandler(
+            queue.Queue(queue_size), rotating_file_handler, overflow=overflow)
+        queue_handler.set_name(log_name)
+        listener = AsyncQueueListener(queue_handler)
+        listener.start()
+        atexit.register(listener.stop)
+        logger.addHandler(queue_handler)
+    else:
+        logger.addHandler(rotating_file_handler)
 
     return logger
@@ -21,7 +21,9 @@ setup(
     entry_points={
         'console_scripts': [
             'etl_logs_print_report=ox_dw_logger.commands:etl_logs_print_report',
-            'etl_logs_email_report=ox_dw_logger.commands:etl_logs_email_report'
+            'etl_logs_email_report=ox_dw_logger.commands:etl_logs_email_report',
+            'etl_logs_print_latency_report='
+            'ox_dw_logger.commands:etl_logs_print_latency_report'
         ]
     },
     classifiers=[
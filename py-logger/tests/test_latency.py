@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+import ox_dw_logger
+from ox_dw_logger.latency import (
+    NAME, get_latencies, get_latency_table, percentile
+)
+from ox_dw_logger.log_parser import LogRow
+
+LOCAL_DB_FILE = os.path.join(ox_dw_logger.LOCAL_OUTPUT, '.'.join([NAME, 'db']))
+LOG = """[2020-01-01 00:00:00] INFO: Starting upload.
+[2020-01-01 00:00:10] INFO: START: DatasetSerial(1) downloading from uri
+[2020-01-01 00:00:20] ERROR: Something else
+[2020-01-01 00:00:40] INFO: FINISH: DatasetSerial(1) downloaded from uri
+[2020-01-01 00:00:41] INFO: START: DatasetSerial(2) downloading from uri
+[2020-01-01 00:00:51] INFO: FINISH: DatasetSerial(2) downloaded from uri
+[2020-01-01 00:01:00] INFO: Finished upload.
+[2020-01-01 00:01:01] INFO: Starting copy_into
+[2020-01-01 00:01:03] INFO: Finished copy_into in 1500 ms
+"""
+NOW = datetime(2020, 1, 1, 0, 2)
+
+
+def get_rows(log_file='job.log'):
+    rows = []
+    for line in LOG.splitlines():
+        rows.append(LogRow(log_file, line[1:20], 'INFO', line[28:]))
+
+    return rows
+
+
+class TestLatency(unittest.TestCase):
+
+    def test_get_latencies(self):
+        latencies = {
+            latency.step: latency
+            for latency in get_latencies('job', get_rows(), NOW)}
+        self.assertEqual(sorted(latencies), ['copy_into', 'download',
+                                             'upload'])
+        download = latencies['download']
+        self.assertEqual(download.count, 2)
+        self.assertEqual(download.p50_seconds, 10)
+        self.assertEqual(download.max_seconds, 30)
+        self.assertEqual(download.lag_seconds, 69)
+        self.assertEqual(latencies['upload'].max_seconds, 60)
+        self.assertEqual(latencies['copy_into'].max_seconds, 1.5)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile([], 95), None)
+
+    def test_get_latency_table(self):
+        log_file = tempfile.mktemp(suffix='.log')
+        with open(log_file, 'w') as log:
+            log.write(LOG)
+        try:
+            table = get_latency_table(
+                [log_file], since='2019-12-31 00:00:00', now=NOW)
+        finally:
+            os.remove(log_file)
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(LOCAL_DB_FILE + suffix):
+                    os.remove(LOCAL_DB_FILE + suffix)
+        self.assertEqual(table.rowcount, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
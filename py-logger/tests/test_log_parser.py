@@ -2,12 +2,21 @@ from mock import Mock
 import unittest
 import os
 import smtplib
+import sqlite3
+import tempfile
 import ox_dw_logger
 from ox_dw_logger import (
+    JSON,
+    LOG_DATE_REGEX,
     email_report,
+    get_etl_logger,
+    log_timed,
     print_report
 )
-from ox_dw_logger.log_parser import NAME
+from ox_dw_logger.latency import HEAD_REGEX, get_latencies
+from ox_dw_logger.log_parser import (
+    NAME, LogParser, get_tables, parse_log, parse_log_date
+)
 
 print = Mock()
 smtplib.SMTP = Mock()
@@ -20,15 +29,19 @@ LOG_FILE = os.path.join(HERE, 'test_etl.log')
 LOCAL_DB_FILE = os.path.join(ox_dw_logger.LOCAL_OUTPUT, '.'.join([NAME, 'db']))
 
 
+def remove_db(local_db_file):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(local_db_file + suffix):
+            os.remove(local_db_file + suffix)
+
+
 class TestEtlLogParser(unittest.TestCase):
 
     def setUp(self):
-        if os.path.exists(LOCAL_DB_FILE):
-            os.remove(LOCAL_DB_FILE)
+        remove_db(LOCAL_DB_FILE)
 
     def tearDown(self):
-        if os.path.exists(LOCAL_DB_FILE):
-            os.remove(LOCAL_DB_FILE)
+        remove_db(LOCAL_DB_FILE)
 
     def test_print_report(self):
         self.assertEqual(print_report('ERROR', path=HERE), None)
@@ -37,5 +50,149 @@ class TestEtlLogParser(unittest.TestCase):
         self.assertEqual(email_report('ERROR', path=HERE), None)
 
 
+class TestEtlLogParserStoreNew(unittest.TestCase):
+    name = 'test_store_new'
+
+    def setUp(self):
+        self.log_file = tempfile.mktemp(suffix='.log')
+        self.local_db_file = \
+            os.path.join(ox_dw_logger.LOCAL_OUTPUT, self.name + '.db')
+        self.cleanup = [self.log_file]
+        self.write(
+            "[2020-01-01 00:00:00] INFO: Starting\n"
+            "[2020-01-01 00:00:01] ERROR: First\n"
+            "Traceback line\n"
+            "[2020-01-01 00:00:02] ERROR: Second\n")
+
+    def tearDown(self):
+        for path in self.cleanup:
+            if os.path.exists(path):
+                os.remove(path)
+        remove_db(self.local_db_file)
+        remove_db(LOCAL_DB_FILE)
+
+    def write(self, text):
+        with open(self.log_file, 'a') as log_file:
+            log_file.write(text)
+
+    def store_new(self):
+        parser = LogParser(
+            self.log_file, name=self.name, since='2019-12-31 00:00:00')
+        parser.store_new()
+        return [row[0] for row in parser.local_db.execute(
+            "SELECT transaction_time FROM %s_logs ORDER BY 1" % self.name)]
+
+    def test_store_new(self):
+        self.assertEqual(
+            self.store_new(), ['2020-01-01 00:00:01', '2020-01-01 00:00:02'])
+        self.write("[2020-01-01 00:00:03] ERROR: Third\n")
+        self.assertEqual(
+            self.store_new(),
+            ['2020-01-01 00:00:01', '2020-01-01 00:00:02',
+             '2020-01-01 00:00:03'])
+        self.assertEqual(
+            self.store_new(),
+            ['2020-01-01 00:00:01', '2020-01-01 00:00:02',
+             '2020-01-01 00:00:03'])
+
+    def test_cleanup_drops_days(self):
+        self.write("[2020-01-02 00:00:00] ERROR: Next day\n")
+        self.assertEqual(len(self.store_new()), 3)
+        parser = LogParser(
+            self.log_file, name=self.name, since='2020-01-02 00:00:00')
+        self.assertEqual(parser._day_tables(), [
+            self.name + '_logs_20200101', self.name + '_logs_20200102'])
+        parser.cleanup()
+        self.assertEqual(
+            parser._day_tables(), [self.name + '_logs_20200102'])
+        self.assertEqual(parser.local_db.execute(
+            "SELECT count(*) FROM %s_logs" % self.name).fetchone()[0], 1)
+
+    def test_split_logs_table(self):
+        local_db = sqlite3.connect(self.local_db_file)
+        local_db.execute("""
+            CREATE TABLE %s_logs(
+                log_file TEXT NOT NULL,
+                log_time FLOAT NOT NULL,
+                transaction_time TEXT NOT NULL,
+                tag TEXT NOT NULL,
+                message BLOB)""" % self.name)
+        local_db.executemany(
+            "INSERT INTO %s_logs VALUES(?, 0, ?, 'ERROR', NULL)" % self.name,
+            [[self.log_file, '2020-01-01 00:00:01'],
+             [self.log_file, '2020-01-03 00:00:01']])
+        local_db.commit()
+        local_db.close()
+        parser = LogParser(
+            self.log_file, name=self.name, since='2019-12-31 00:00:00')
+        self.assertEqual(parser._day_tables(), [
+            self.name + '_logs_20200101', self.name + '_logs_20200103'])
+        self.assertEqual(parser.local_db.execute(
+            "SELECT count(*) FROM %s_logs" % self.name).fetchone()[0], 2)
+
+    def test_get_tables_processes(self):
+        log_files = [self.log_file, tempfile.mktemp(suffix='.log')]
+        with open(log_files[1], 'w') as log_file:
+            log_file.write("[2020-01-01 00:00:04] ERROR: Other\n")
+        self.cleanup.append(log_files[1])
+        tables = dict(get_tables(
+            'ERROR', log_files, since='2019-12-31 00:00:00', processes=2))
+        self.assertEqual(tables[self.log_file].rowcount, 2)
+        self.assertIn('Traceback line', tables[self.log_file].get_string())
+        self.assertEqual(tables[log_files[1]].rowcount, 1)
+        self.assertIn('Other', tables[log_files[1]].get_string())
+
+    def test_parse_log_date(self):
+        self.assertEqual(parse_log_date('2020-01-02 03:04:05'),
+                         parse_log_date('2020-01-02T03:04:05'))
+
+
+class TestEtlLogParserJson(unittest.TestCase):
+    """
+    Logs written with log_format=JSON are parsed like the text format.
+    """
+
+    def setUp(self):
+        self.log_directory = tempfile.mkdtemp()
+        self.logger = get_etl_logger(
+            'JsonParsed_%s' % self._testMethodName,
+            log_directory=self.log_directory, log_format=JSON,
+            log_level='INFO')
+        self.log_file = self.logger.handlers[0].baseFilename
+
+    def tearDown(self):
+        for handler in self.logger.handlers:
+            handler.close()
+        os.remove(self.log_file)
+        os.rmdir(self.log_directory)
+
+    def parse(self, tag, head_regex):
+        self.logger.handlers[0].flush()
+        return parse_log(self.log_file, tag, '2000-01-01 00:00:00', 0,
+                         LOG_DATE_REGEX, head_regex)[0]
+
+    def test_errors(self):
+        self.logger.info("Not an error")
+        try:
+            raise ValueError('Bad')
+        except ValueError:
+            self.logger.exception("First")
+        self.logger.error("Second")
+        rows = self.parse('ERROR', r'%s (ERROR): (.*)' % LOG_DATE_REGEX)
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(rows[0].message.startswith('First'))
+        self.assertIn('ValueError: Bad', rows[0].message)
+        self.assertEqual(rows[1].message, 'Second')
+        self.assertEqual(LogParser(self.log_file).log_time,
+                         rows[0].transaction_time)
+
+    def test_latencies(self):
+        with log_timed(self.logger, 'copy_into', job='job'):
+            pass
+        latency, = get_latencies('job', self.parse('INFO', HEAD_REGEX))
+        self.assertEqual((latency.step, latency.count),
+                         ('copy_into', 1))
+
+
 if __name__ == '__main__':
     unittest.main()
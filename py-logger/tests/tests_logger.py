@@ -1,8 +1,10 @@
+import json
 import logging
 import unittest
 import os
+import time
 
-from ox_dw_logger import get_etl_logger, LOG_DIRECTORY
+from ox_dw_logger import JSON, get_etl_logger, log_timed, LOG_DIRECTORY
 
 SIMPLE_LOG_NAME = 'SimpleLogger'
 NEW_LOG_NAME = 'NewLogger'
@@ -57,5 +59,97 @@ class TestEtlLoggerNewWithOptions(unittest.TestCase):
         )
 
 
+class TestEtlLoggerAsync(unittest.TestCase):
+    def setUp(self):
+        self.logger = \
+            get_etl_logger(
+                log_name='AsyncLogger_%s' % self._testMethodName,
+                log_directory=NEW_LOG_DIR,
+                log_level=NEW_LOG_LEVEL, async_=True, queue_size=10)
+
+    def tearDown(self):
+        if os.path.exists(self.logger.handlers[0].baseFilename):
+            os.remove(self.logger.handlers[0].baseFilename)
+
+    def test_flush_and_drop(self):
+        for index in range(1000):
+            self.logger.debug("Message %s", index)
+        self.logger.error("Never dropped")
+        handler = self.logger.handlers[0]
+        handler.listener.stop()
+        with open(handler.baseFilename) as in_file:
+            lines = in_file.read().splitlines()
+        self.assertEqual(handler.queued + handler.dropped, 1001)
+        self.assertEqual(len(lines), handler.queued + bool(handler.dropped))
+        self.assertTrue(any('Never dropped' in line for line in lines))
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "Needs os.fork")
+    def test_forked_child(self):
+        """
+        A forked child has no listener so it must write without blocking.
+        """
+        self.logger.info("From parent")
+        child_pid = os.fork()
+        if child_pid == 0:
+            try:
+                for index in range(100):
+                    self.logger.error("From child %s", index)
+            finally:
+                os._exit(0)
+        deadline = time.time() + 10
+        while not os.waitpid(child_pid, os.WNOHANG)[0]:
+            if time.time() > deadline:
+                os.kill(child_pid, 9)
+                os.waitpid(child_pid, 0)
+                self.fail("Forked child blocked on the log queue.")
+            time.sleep(0.01)
+        handler = self.logger.handlers[0]
+        handler.listener.stop()
+        with open(handler.baseFilename) as in_file:
+            lines = in_file.read().splitlines()
+        self.assertEqual(
+            len([line for line in lines if 'From child' in line]), 100)
+        self.assertTrue(any('From parent' in line for line in lines))
+
+
+class TestEtlLoggerJson(unittest.TestCase):
+    def setUp(self):
+        self.logger = \
+            get_etl_logger(
+                log_name='JsonLogger_%s' % self._testMethodName,
+                log_directory=NEW_LOG_DIR,
+                log_format=JSON, log_level='INFO')
+
+    def tearDown(self):
+        if os.path.exists(self.logger.handlers[0].baseFilename):
+            os.remove(self.logger.handlers[0].baseFilename)
+
+    def get_entries(self):
+        self.logger.handlers[0].flush()
+        with open(self.logger.handlers[0].baseFilename) as in_file:
+            return [json.loads(line) for line in in_file]
+
+    def test_log_timed(self):
+        with log_timed(self.logger, 'load', job='my_job', serial=1) as fields:
+            fields['rowcount'] = 10
+        start, finish = self.get_entries()
+        self.assertEqual(start['message'], 'Starting load')
+        self.assertIsNone(start['elapsed_ms'])
+        self.assertEqual(finish['level'], 'INFO')
+        self.assertEqual(
+            (finish['job'], finish['serial'], finish['step'],
+             finish['rowcount'], finish['feed']),
+            ('my_job', 1, 'load', 10, None))
+        self.assertGreaterEqual(finish['elapsed_ms'], 0)
+
+    def test_log_timed_error(self):
+        with self.assertRaises(ValueError):
+            with log_timed(self.logger, 'load'):
+                raise ValueError('Bad')
+        failed = self.get_entries()[-1]
+        self.assertEqual(failed['level'], 'ERROR')
+        self.assertIn('ValueError: Bad', failed['exception'])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark of download_file against a local http server.
+Reports MB/s of wall time and MB per cpu second of this process, i.e. per
+core, for the old iter_content(1024) loop and download_file at each chunk
+size.
+Usage: python benchmarks/download_chunk_size.py [size_mb] [chunk sizes...]
+"""
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+from multiprocessing import Process, Queue
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from ox_dw_odfi_client import PartFile, download_file, get_session
+
+MB = 1048576
+
+
+def serve(data, port_queue):
+    """
+    Serves data on any path in a process of its own so its cpu time is not
+    counted.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def iter_content_1024(config, part_file):
+    """
+    The download loop before DOWNLOAD_CHUNK_SIZE.
+    """
+    response = get_session(config).get(part_file.url, stream=True)
+    response.raise_for_status()
+    md5 = hashlib.md5()
+    with open(part_file.file_name, 'wb') as out_file:
+        for block in response.iter_content(1024):
+            md5.update(block)
+            out_file.write(block)
+
+    return part_file.check(md5.hexdigest(),
+                           os.path.getsize(part_file.file_name))
+
+
+def measure(name, function, config, part_file):
+    start, start_cpu = time.time(), time.process_time()
+    function(config, part_file)
+    wall, cpu = time.time() - start, time.process_time() - start_cpu
+    size_mb = part_file.data_size / float(MB)
+    print("%-30s %8.1f MB/s %8.1f MB/cpu-s" % (
+        name, size_mb / wall, size_mb / cpu))
+    for suffix in ('', '.verified'):
+        if os.path.exists(part_file.file_name + suffix):
+            os.remove(part_file.file_name + suffix)
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    chunk_sizes = [int(size) for size in sys.argv[2:]] or \
+        [1024, 65536, 131072, MB]
+    data = os.urandom(size_mb * MB)
+    port_queue = Queue()
+    server = Process(target=serve, args=(data, port_queue))
+    server.daemon = True
+    server.start()
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        config = {'ODFI_HOST': 'http://127.0.0.1:%d' % port_queue.get()}
+        part_file = PartFile(
+            config['ODFI_HOST'] + '/000-001.txt.gz',
+            os.path.join(tmp_dir, '000-001.txt.gz'), 0, len(data), '000', 1,
+            'GZIP', hashlib.md5(data).hexdigest(), 'Benchmark', 1)
+        del data
+        measure('iter_content(1024)', iter_content_1024, config, part_file)
+        for chunk_size in chunk_sizes:
+            measure('DOWNLOAD_CHUNK_SIZE=%d' % chunk_size, download_file,
+                    dict(config, DOWNLOAD_CHUNK_SIZE=chunk_size), part_file)
+    finally:
+        shutil.rmtree(tmp_dir)
+        server.terminate()
+
+
+if __name__ == '__main__':
+    main()
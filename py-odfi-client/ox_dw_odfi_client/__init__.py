@@ -2,12 +2,15 @@
 All importable items are in here for easier imports.
 """
 from .dataset import DataSet
-from .download import download_file, get_xml, get_xml_meta
+from .download import (download_file, get_session, get_xml, get_xml_meta,
+                       iter_xml_items)
 from .exceptions import (DataSizeMismatchException, MD5MismatchException,
                          MissingMetaFile, NoDataSetException)
+from .executor import DownloadExecutor, DownloadResult, get_executor
 from .feed import Feed
 from .feeds import Feeds
 from .files import PartFile, SchemaFile
+from .parsers import LxmlParser, XmltodictParser, get_parser
 from .readable_interval import (
     get_format_by_freq, get_frequency, get_interval, get_interval_format,
     get_next_readable_interval, readable_interval_datetime,
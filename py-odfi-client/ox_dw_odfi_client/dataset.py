@@ -3,14 +3,16 @@ This is where most of the work occurs for reading from ODFI and downloading
 files.
 """
 import os
-from multiprocessing import Pool
+from datetime import datetime
 from shutil import rmtree
-from .download import download_file, get_download_dir, get_xml_meta
+from .download import PARTIAL_SUFFIX, get_download_dir, get_xml_meta
 from .exceptions import DataSizeMismatchException, MD5MismatchException
+from .executor import get_executor
 from .files import PartFile, SchemaFile
-from .readable_interval import (get_interval, get_next_readable_interval,
-                                readable_interval_datetime)
-from .settings import CACHE_META_DATA, MAX_DOWNLOADERS
+from .readable_interval import (FREQUENCIES_BY_FORMAT, INTERVAL_BY_FREQUENCY,
+                                get_interval_format,
+                                get_next_readable_interval)
+from .settings import CACHE_META_DATA
 
 
 class DataSet(object):
@@ -18,30 +20,72 @@ class DataSet(object):
     This is an object representing a single feeds datasets.
     """
 
-    def __init__(self, config, feed_name, serial, uri=None):
+    def __init__(self, config, feed_name, serial, uri=None, listing=None):
+        """
+        Nothing is read or fetched until needed.
+        :param listing: The entry for this dataset from a datasets query if
+                        any to save loading the meta for the fields in it.
+        """
         self.config = config
         self.feed_name = feed_name
         self.serial = serial
         self.uri = uri
+        self.listing = listing or {}
         self.download_dir = get_download_dir(
             self.config, feed_name=self.feed_name, serial=self.serial)
-        self.meta = get_xml_meta(
-            self.config,
-            get_download_dir(
-                self.config, feed_name=self.feed_name, serial=self.serial),
-            name='meta.xml',
-            url=self.uri).get('dataset')
-        self.schema = get_xml_meta(
-            self.config,
-            get_download_dir(
-                self.config, feed_name=self.feed_name, serial=self.serial),
-            name='schema.xml',
-            url=self.meta['schema']['@locator']).get('partition_schema')
-        self.readable_interval = readable_interval_datetime(
-            self.meta['readableInterval'])
-        self.next_readable_interval = get_next_readable_interval(
-            readable_interval_datetime(self.meta['readableInterval']),
-            get_interval(self.meta['readableInterval']))
+        self._meta = None
+        self._schema = None
+        self._readable_interval = None
+        self._next_readable_interval = None
+
+    @property
+    def meta(self):
+        """
+        The dataset meta.xml as a dict.
+        :raises MissingMetaFile: When not cached and there is no uri.
+        """
+        if self._meta is None:
+            self._meta = get_xml_meta(
+                self.config,
+                self.download_dir,
+                name='meta.xml',
+                url=self.uri).get('dataset')
+
+        return self._meta
+
+    @property
+    def next_readable_interval(self):
+        """
+        The readable_interval after this one as a datetime.
+        """
+        if self._next_readable_interval is None:
+            self._set_readable_intervals()
+
+        return self._next_readable_interval
+
+    @property
+    def readable_interval(self):
+        """
+        The readableInterval as a datetime.
+        """
+        if self._readable_interval is None:
+            self._set_readable_intervals()
+
+        return self._readable_interval
+
+    @property
+    def schema(self):
+        """
+        The partition_schema of the schema.xml as a dict.
+        """
+        if self._schema is None:
+            self._schema = get_xml_meta(
+                self.config,
+                self.download_dir,
+                name='schema.xml',
+                url=self.meta['schema']['@locator']).get('partition_schema')
+
+        return self._schema
 
     @property
     def has_part_files(self):
@@ -78,26 +122,35 @@ class DataSet(object):
             try:
                 return self.is_download_complete
             except (IOError, DataSizeMismatchException, MD5MismatchException):
-                if not os.path.exists(self.download_dir):
-                    os.makedirs(self.download_dir)
-                pool = Pool(processes=self.config.get('MAX_DOWNLOADERS',
-                                                      MAX_DOWNLOADERS))
-                for file_obj in self.get_files():
-                    pool.apply_async(
-                        download_file, args=[self.config, file_obj])
-                pool.close()
-                pool.join()
+                for result in self.download():
+                    if result.error is not None:
+                        raise result.error
                 return self.is_download_complete
         else:
             return False
 
+    def download(self):
+        """
+        Downloads the part files and schema file with the executor shared by
+        all datasets.
+        :return list: DownloadResult for each file.
+        """
+        if not os.path.exists(self.download_dir):
+            os.makedirs(self.download_dir)
+
+        return get_executor(self.config).download(
+            self.config, self.get_files())
+
     def clear_part_files(self):
         """
         Remove only the downloaded datasets.
         """
         for part_file in self.get_part_files():
-            if os.path.exists(part_file.file_name):
-                os.remove(part_file.file_name)
+            for file_name in (part_file.file_name,
+                              part_file.file_name + PARTIAL_SUFFIX,
+                              part_file.verified_file_name):
+                if os.path.exists(file_name):
+                    os.remove(file_name)
 
     def clear_download(self):
         """
@@ -144,3 +197,16 @@ class DataSet(object):
                           os.path.join(self.download_dir, 'schema.xml'),
                           int(self.meta['schema']['@version']),
                           self.meta['schema']['@name'], self.serial)
+
+    def _set_readable_intervals(self):
+        """
+        Works out both readable intervals from the one format lookup.
+        """
+        readable_interval = self.listing.get('readableInterval') or \
+            self.meta['readableInterval']
+        interval_format = get_interval_format(readable_interval)
+        self._readable_interval = \
+            datetime.strptime(readable_interval, interval_format)
+        self._next_readable_interval = get_next_readable_interval(
+            self._readable_interval,
+            INTERVAL_BY_FREQUENCY[FREQUENCIES_BY_FORMAT[interval_format]])
@@ -1,37 +1,182 @@
 """
 Utilities for managing downloads.
 """
+import hashlib
 import os
-from xml.parsers.expat import ExpatError
+import threading
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import warnings
 import xmltodict
 from retrying import retry
-from .exceptions import MissingMetaFile
-from .settings import (CACHE_META_DATA, DEFAULT_DATA_DIR, MAX_ATTEMPTS,
-                       WAIT_BETWEEN_ATTEMPTS, PROXIES)
+from .exceptions import (DataSizeMismatchException, MD5MismatchException,
+                         MissingMetaFile)
+from .files import PartFile
+from .parsers import get_parser
+from .settings import (CACHE_META_DATA, DEFAULT_DATA_DIR, DOWNLOAD_CHUNK_SIZE,
+                       HTTP_BACKOFF_FACTOR, HTTP_RETRIES, MAX_ATTEMPTS,
+                       MAX_DOWNLOADERS, META_CACHE_SIZE, WAIT_BETWEEN_ATTEMPTS,
+                       PROXIES)
 warnings.filterwarnings('ignore', 'Unverified HTTPS request')
 
+PARTIAL_SUFFIX = '.partial'
+PARTIAL_CONTENT = 206
+RANGE_NOT_SATISFIABLE = 416
+
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+class LRUCache(object):
+    """
+    Thread safe least recently used cache holding up to max_size items.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def clear(self):
+        """
+        Empties the cache.
+        """
+        with self._lock:
+            self._items.clear()
+
+    def get(self, key):
+        """
+        :return: The item or None.
+        """
+        with self._lock:
+            if key not in self._items:
+                return None
+            value = self._items.pop(key)
+            self._items[key] = value
+
+            return value
+
+    def set(self, key, value):
+        """
+        Adds the item dropping the least recently used past max_size.
+        """
+        if self.max_size < 1:
+            return
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+# Parsed xml files keyed on (path, mtime, size) so a rewritten file is
+# parsed again. The documents are shared so treat them as read only.
+META_CACHE = LRUCache(META_CACHE_SIZE)
+
 
 @retry(stop_max_attempt_number=MAX_ATTEMPTS, wait_fixed=WAIT_BETWEEN_ATTEMPTS)
 def download_file(config, file_obj):
     """
     Download a file from url to file_name.
+    Writes to file_name.partial first resuming what an earlier attempt left
+    with a Range request when the server supports it. Only once it is valid
+    is it renamed to file_name. If it is not the partial file is removed so
+    the next attempt fetches the whole file.
+    Part files are hashed and counted as they stream in and get the
+    verified sidecar so is_ready need not read them again.
     :return boolean:
+    :raises IOError, DataSizeMismatchException, MD5MismatchException:
     """
-    response = requests.get(
+    partial_obj = file_obj._replace(
+        file_name=file_obj.file_name + PARTIAL_SUFFIX)
+    offset = 0
+    if os.path.exists(partial_obj.file_name):
+        offset = os.path.getsize(partial_obj.file_name)
+    response = get_session(config).get(
         file_obj.url,
         stream=True,
-        auth=(config.get('ODFI_USER'), config.get('ODFI_PASS')),
+        headers={'Range': 'bytes=%d-' % offset} if offset else None,
         proxies=config.get('PROXIES', PROXIES),
         verify=False)
-    response.raise_for_status()
+    md5 = hashlib.md5()
+    try:
+        if offset and response.status_code == RANGE_NOT_SATISFIABLE:
+            # Nothing left to fetch so the partial file must be complete.
+            data_size = _hash_file(partial_obj.file_name, md5)
+        else:
+            response.raise_for_status()
+            mode = 'wb'
+            data_size = 0
+            if offset and response.status_code == PARTIAL_CONTENT:
+                if not response.headers.get('Content-Range', '').startswith(
+                        'bytes %d-' % offset):
+                    os.remove(partial_obj.file_name)
+                    raise IOError(
+                        "Unexpected Content-Range %s resuming %s from %d" % (
+                            response.headers.get('Content-Range'),
+                            file_obj.url, offset))
+                mode = 'ab'
+                data_size = _hash_file(partial_obj.file_name, md5)
+            with open(partial_obj.file_name, mode) as out_file:
+                for block in response.iter_content(
+                        config.get('DOWNLOAD_CHUNK_SIZE',
+                                   DOWNLOAD_CHUNK_SIZE)):
+                    md5.update(block)
+                    data_size += len(block)
+                    out_file.write(block)
+    finally:
+        response.close()
+
+    if not isinstance(file_obj, PartFile):
+        os.rename(partial_obj.file_name, file_obj.file_name)
+        return file_obj.is_ready
+    try:
+        partial_obj.check(md5.hexdigest(), data_size)
+    except (DataSizeMismatchException, MD5MismatchException):
+        os.remove(partial_obj.file_name)
+        raise
+    os.rename(partial_obj.file_name, file_obj.file_name)
+    file_obj.set_verified()
+
+    return True
+
+
+def _hash_file(file_name, md5):
+    """
+    Adds what is already in the file to the md5.
+    :return int: Bytes read.
+    """
+    data_size = 0
+    with open(file_name, 'rb') as in_file:
+        for block in iter(lambda: in_file.read(65536), b''):
+            md5.update(block)
+            data_size += len(block)
+
+    return data_size
+
 
-    with open(file_obj.file_name, 'wb') as out_file:
-        for block in response.iter_content(1024):
-            out_file.write(block)
+def _read_xml(xml_file, parser):
+    """
+    Parses the xml file unless it is in the META_CACHE unchanged.
+    :return dict:
+    """
+    file_stat = os.stat(xml_file)
+    key = (os.path.abspath(xml_file), file_stat.st_mtime, file_stat.st_size)
+    doc = META_CACHE.get(key)
+    if doc is None:
+        with open(xml_file, 'rb') as in_file:
+            doc = parser.parse(in_file)
+        META_CACHE.set(key, doc)
 
-    return file_obj.is_ready
+    return doc
 
 
 def get_download_dir(config, feed_name=None, serial=None):
@@ -48,9 +193,42 @@ def get_download_dir(config, feed_name=None, serial=None):
     return os.path.join(*items)
 
 
+def get_session(config):
+    """
+    Keep-alive session shared by every request for the ODFI config so
+    connections are reused instead of handshaking on each xml or part file.
+    There is one per process as pooled connections cannot cross a fork.
+    The pool holds MAX_DOWNLOADERS connections per host.
+    :param config: ODFI config.
+    :return requests.Session:
+    """
+    key = (os.getpid(), config.get('ODFI_HOST'), config.get('ODFI_USER'),
+           config.get('ODFI_PASS'),
+           config.get('MAX_DOWNLOADERS', MAX_DOWNLOADERS),
+           config.get('HTTP_RETRIES', HTTP_RETRIES))
+    with _SESSIONS_LOCK:
+        if key not in _SESSIONS:
+            session = requests.Session()
+            session.auth = (config.get('ODFI_USER'), config.get('ODFI_PASS'))
+            adapter = HTTPAdapter(
+                pool_maxsize=config.get('MAX_DOWNLOADERS', MAX_DOWNLOADERS),
+                max_retries=Retry(
+                    total=config.get('HTTP_RETRIES', HTTP_RETRIES),
+                    backoff_factor=HTTP_BACKOFF_FACTOR,
+                    status_forcelist=(502, 503, 504),
+                    raise_on_status=False))
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _SESSIONS[key] = session
+
+        return _SESSIONS[key]
+
+
 def get_xml_meta(config, download_dir, name='meta.xml', url=None, params=None):
     """
     Will look for the cache file first and return that as dict.
+    Parsed cache files are kept in the META_CACHE in memory until they
+    change so the returned dict is shared and must not be modified.
     If it doesn't exist then it will query ODFI and write the results to
     the cache file.
     :param config: ODFI config.
@@ -60,10 +238,10 @@ def get_xml_meta(config, download_dir, name='meta.xml', url=None, params=None):
     :return dict: XML same as what is in the cache file.
     """
     xml_file = os.path.join(download_dir, name)
+    parser = get_parser(config)
     try:
-        with open(xml_file, 'r') as in_file:
-            return xmltodict.parse(in_file.read())
-    except IOError:
+        return _read_xml(xml_file, parser)
+    except (IOError, OSError):
         if url is not None:
             doc = get_xml(config, url, params=params)
             if config.get('CACHE_META_DATA', CACHE_META_DATA):
@@ -74,7 +252,7 @@ def get_xml_meta(config, download_dir, name='meta.xml', url=None, params=None):
             return doc
         else:
             raise MissingMetaFile(xml_file)
-    except ExpatError:
+    except parser.errors:
         # Something wrong with the meta.xml so let's replace it.
         if os.path.exists(xml_file):
             os.remove(xml_file)
@@ -89,12 +267,45 @@ def get_xml(config, url, params=None):
     :param params: For query string arguments.
     :return dict: XML pulled from url to dict.
     """
-    response = requests.get(
+    response = _get_xml_response(config, url, params=params)
+    try:
+        return get_parser(config).parse(response.raw)
+    finally:
+        response.close()
+
+
+def iter_xml_items(config, url, tag, params=None):
+    """
+    Yields the elements with the tag under the root of the xml as dicts the
+    same as get_xml would have them.
+    With the lxml parser each one is yielded as soon as it has streamed in.
+    Only the request is retried as items may already have been yielded.
+    :param config: ODFI config.
+    :param url: ODFI Url of the xml file.
+    :param tag: Tag of the items e.g. dataset in datasets.
+    :param params: For query string arguments.
+    :return generator: dict
+    """
+    response = retry(
+        stop_max_attempt_number=MAX_ATTEMPTS,
+        wait_fixed=WAIT_BETWEEN_ATTEMPTS)(_get_xml_response)(
+            config, url, params=params)
+    try:
+        for item in get_parser(config).iter_items(response.raw, tag):
+            yield item
+    finally:
+        response.close()
+
+
+def _get_xml_response(config, url, params=None):
+    response = get_session(config).get(
         url,
         params=params,
-        auth=(config.get('ODFI_USER'), config.get('ODFI_PASS')),
         proxies=config.get('PROXIES', PROXIES),
+        stream=True,
         verify=False)
     response.raise_for_status()
+    # The parsers read the body as it comes in so it must be decompressed.
+    response.raw.decode_content = True
 
-    return xmltodict.parse(response.text)
+    return response
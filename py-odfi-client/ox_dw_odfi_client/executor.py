@@ -0,0 +1,148 @@
+"""
+Thread pool for downloading part files shared across datasets and feeds.
+"""
+import os
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as futures_wait
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse
+from .download import download_file
+from .settings import MAX_DOWNLOADERS, MAX_DOWNLOADERS_PER_HOST
+
+_EXECUTORS = {}
+_EXECUTORS_LOCK = threading.Lock()
+
+DownloadResult = namedtuple('DownloadResult',
+                            ['file_obj', 'is_ready', 'error'])
+
+
+class DownloadExecutor(object):
+    """
+    Downloads files in a long lived pool of threads since the work is all
+    I/O. MAX_DOWNLOADERS is the limit across everything submitted and
+    MAX_DOWNLOADERS_PER_HOST the limit for any one host.
+    Files wait in a queue per host and only go to the pool when their host
+    has a free slot so a busy host never holds threads other hosts could use.
+    """
+
+    def __init__(self, max_downloaders=MAX_DOWNLOADERS,
+                 max_per_host=MAX_DOWNLOADERS_PER_HOST):
+        if max_downloaders < 1 or max_per_host < 1:
+            raise ValueError(
+                "MAX_DOWNLOADERS and MAX_DOWNLOADERS_PER_HOST must be at "
+                "least 1!")
+        self.max_downloaders = max_downloaders
+        self.max_per_host = max_per_host
+        self._hosts = {}
+        self._futures = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_downloaders)
+        self._shutdown = False
+
+    def download(self, config, file_objs):
+        """
+        Downloads the files and waits for all of them.
+        :param config: ODFI config.
+        :param file_objs: PartFiles and SchemaFiles.
+        :return list: DownloadResult of each file in the same order with
+                      the exception raised if any.
+        """
+        futures = [(file_obj, self.submit(config, file_obj))
+                   for file_obj in file_objs]
+        results = []
+        for file_obj, future in futures:
+            try:
+                results.append(DownloadResult(file_obj, future.result(), None))
+            except Exception as error:
+                results.append(DownloadResult(file_obj, False, error))
+
+        return results
+
+    def shutdown(self, wait=True):
+        """
+        Stops the threads once the submitted downloads are done.
+        Without wait the downloads still queued for a host are cancelled.
+        """
+        cancelled = []
+        with self._lock:
+            self._shutdown = True
+            if not wait:
+                for queue in self._hosts.values():
+                    cancelled.extend(
+                        future for _, _, future in queue['files'])
+                    queue['files'].clear()
+            futures = list(self._futures)
+        # Outside of _lock as cancel runs the done callbacks.
+        for future in cancelled:
+            future.cancel()
+        if wait:
+            futures_wait(futures)
+        self._pool.shutdown(wait=wait)
+
+    def submit(self, config, file_obj):
+        """
+        Queues the download of the file.
+        :param config: ODFI config.
+        :param file_obj: PartFile or SchemaFile.
+        :return Future: Of the download_file result.
+        """
+        future = Future()
+        host = urlparse(file_obj.url).netloc
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit after shutdown!")
+            self._futures.add(future)
+            queue = self._hosts.setdefault(
+                host, {'running': 0, 'files': deque()})
+            queue['files'].append((config, file_obj, future))
+            self._schedule(host)
+        future.add_done_callback(self._discard)
+
+        return future
+
+    def _discard(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def _download(self, host, config, file_obj, future):
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(download_file(config, file_obj))
+                except Exception as error:
+                    future.set_exception(error)
+        finally:
+            with self._lock:
+                self._hosts[host]['running'] -= 1
+                self._schedule(host)
+
+    def _schedule(self, host):
+        """
+        Sends the host's queued files to the pool while it has free slots.
+        Must be called holding _lock.
+        """
+        queue = self._hosts[host]
+        while queue['files'] and queue['running'] < self.max_per_host:
+            config, file_obj, future = queue['files'].popleft()
+            queue['running'] += 1
+            self._pool.submit(self._download, host, config, file_obj, future)
+
+
+def get_executor(config):
+    """
+    The DownloadExecutor shared by every dataset with the same limits in
+    this process.
+    :param config: ODFI config.
+    :return DownloadExecutor:
+    """
+    key = (os.getpid(), config.get('MAX_DOWNLOADERS', MAX_DOWNLOADERS),
+           config.get('MAX_DOWNLOADERS_PER_HOST', MAX_DOWNLOADERS_PER_HOST))
+    with _EXECUTORS_LOCK:
+        if key not in _EXECUTORS:
+            _EXECUTORS[key] = DownloadExecutor(*key[1:])
+
+        return _EXECUTORS[key]
@@ -2,16 +2,23 @@
 With this Feed object you can work with data sets.
 """
 import os
-from operator import itemgetter
+from operator import attrgetter
 try:
     from collections import OrderedDict
 except ImportError:
     from ordereddict import OrderedDict
 from .dataset import DataSet
-from .download import get_xml, get_xml_meta, get_download_dir
+from .download import get_xml_meta, get_download_dir, iter_xml_items
 from .exceptions import MissingMetaFile, NoDataSetException
+from .readable_interval import readable_interval_datetime
 from .settings import QUERY_REST_PATH, DEFAULT_ODFI_VERSION, DEFAULT_SORT_KEY
 
+# DataSet sort keys that can be read off the datasets listing.
+LISTING_SORT_KEYS = {
+    'readable_interval': ('readableInterval', readable_interval_datetime),
+    'serial': ('serial', int)
+}
+
 
 class Feed(object):
     """
@@ -54,14 +61,18 @@ class Feed(object):
         :param str: Serial of the dataset
         :return Dataset:
         """
+        dataset = DataSet(self.config, self.name, serial)
         try:
-            return DataSet(self.config, self.name, serial)
+            if dataset.meta is not None:
+                return dataset
         except MissingMetaFile:
-            return next(
-                self.get_datasets({
-                    'since_serial': str(int(serial) - 1),
-                    'max': 1
-                }))
+            pass
+
+        return next(
+            self.get_datasets({
+                'since_serial': str(int(serial) - 1),
+                'max': 1
+            }))
 
     def get_datasets(self, args=None, sort_key=DEFAULT_SORT_KEY):
         """
@@ -76,17 +87,18 @@ class Feed(object):
         if not isinstance(doc['dataset'], list):
             doc['dataset'] = [doc['dataset']]
 
-        def _get_key(dataset):
-            return getattr(dataset, sort_key)
-
-        for dataset in sorted(
-            [
-                DataSet(self.config, self.name,
-                        int(dataset['serial']), dataset['@uri'])
-                for dataset in doc['dataset']
-            ],
-                key=_get_key):
-            yield dataset
+        # Sort on the listing when it has the field so no DataSet is made
+        # until it is yielded.
+        field, convert = LISTING_SORT_KEYS.get(sort_key, (None, None))
+        if all(field in entry for entry in doc['dataset']):
+            for entry in sorted(doc['dataset'],
+                                key=lambda entry: convert(entry[field])):
+                yield self._get_dataset(entry)
+        else:
+            for dataset in sorted(
+                    [self._get_dataset(entry) for entry in doc['dataset']],
+                    key=attrgetter(sort_key)):
+                yield dataset
 
     def get_datasets_since_serial(self, serial, **args):
         """
@@ -102,6 +114,17 @@ class Feed(object):
         for dataset in self.get_datasets(args=kwargs, sort_key=sort_key):
             yield dataset
 
+    def iter_datasets(self, args=None):
+        """
+        Yields DataSets in the order of the listing as each streams in
+        rather than once the whole listing has been read and sorted.
+        :param args: dict()
+        :return generator: DataSet
+        """
+        for entry in iter_xml_items(self.config, self.query_url, 'dataset',
+                                    params=self._get_params(args)):
+            yield self._get_dataset(entry)
+
     def get_min_dataset(self, readable_interval_str):
         """
         Return the minimum dataset needed to cover all readable_intervals
@@ -117,16 +140,30 @@ class Feed(object):
                     'start': readable_interval_str
                 }).get('dataset', {}) if doc.get('serial') is not None) - 1)
 
+    def _get_dataset(self, entry):
+        """
+        :param entry: A dataset from the datasets listing.
+        :return DataSet:
+        """
+        return DataSet(self.config, self.name, int(entry['serial']),
+                       entry['@uri'], listing=entry)
+
     def _get_dataset_doc(self, args=None):
         """
         :param args: dict
-        :return dict: Document of datasets
+        :return dict: Document of datasets with dataset always a list.
         """
+        params = self._get_params(args)
+        datasets = list(iter_xml_items(self.config, self.query_url, 'dataset',
+                                       params=params))
+        if datasets:
+            return {'dataset': datasets}
+        else:
+            raise NoDataSetException(self.query_url, params)
+
+    def _get_params(self, args=None):
         params = dict(self.default_args)
         if args is not None:
             params.update(args)
-        doc = get_xml(self.config, self.query_url, params=params)['datasets']
-        if 'dataset' in doc:
-            return doc
-        else:
-            raise NoDataSetException(self.query_url, params)
+
+        return params
@@ -10,6 +10,9 @@ import hashlib
 from collections import namedtuple
 from .exceptions import DataSizeMismatchException, MD5MismatchException
 
+# Sidecar with the digest and size of a part file verified since written.
+VERIFIED_SUFFIX = '.verified'
+
 
 class PartFile(
         namedtuple('PartFile', [
@@ -58,13 +61,73 @@ class PartFile(
         """
         Is file ready for upload?
         Only checks if url protocol in (http, https, ftp)
+        Trusts the verified sidecar when the file has not changed since and
+        otherwise rehashes the file.
         :return boolean:
         """
         if urlparse(self.url).scheme.startswith(('http', 'ftp')):
-            return all([self.is_correct_md5_sum, self.is_correct_size])
+            return self.is_verified or self.verify()
         else:
             return True
 
+    @property
+    def is_verified(self):
+        """
+        Was the file verified since it was last written?
+        Only reads the sidecar and stats the file.
+        :return boolean:
+        """
+        try:
+            file_stat = os.stat(self.file_name)
+            verified_stat = os.stat(self.verified_file_name)
+            with open(self.verified_file_name, 'r') as in_file:
+                digest, data_size = in_file.read().split()
+        except (IOError, OSError, ValueError):
+            return False
+
+        return \
+            digest == self.digest and \
+            int(data_size) == self.data_size == file_stat.st_size and \
+            verified_stat.st_mtime >= file_stat.st_mtime
+
+    @property
+    def verified_file_name(self):
+        """
+        The sidecar written once the file is verified.
+        """
+        return self.file_name + VERIFIED_SUFFIX
+
+    def check(self, digest, data_size):
+        """
+        Checks the md5 and size worked out for the file.
+        :return boolean: When True
+        :raises MD5MismatchException, DataSizeMismatchException:
+        """
+        if self.digest != digest:
+            raise MD5MismatchException(self, digest)
+        if self.data_size != data_size:
+            raise DataSizeMismatchException(self, data_size)
+
+        return True
+
+    def set_verified(self):
+        """
+        Writes the verified sidecar for the file.
+        """
+        with open(self.verified_file_name, 'w') as out_file:
+            out_file.write('%s %d\n' % (self.digest, self.data_size))
+
+    def verify(self):
+        """
+        Rehashes the whole file and writes the verified sidecar if correct.
+        :return boolean: When True
+        :raises MD5MismatchException, DataSizeMismatchException:
+        """
+        if all([self.is_correct_md5_sum, self.is_correct_size]):
+            self.set_verified()
+
+        return True
+
 
 class SchemaFile(
         namedtuple('SchemaFile',
@@ -0,0 +1,149 @@
+"""
+Parsers of the ODFI xml into the same dicts xmltodict makes.
+lxml is optional and opted into with XML_PARSER. With it the datasets
+listing is read element by element off the http stream instead of as one
+document.
+"""
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+from xml.parsers.expat import ExpatError
+import xmltodict
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+from .settings import XML_PARSER
+
+
+class XmltodictParser(object):
+    """
+    Parses the whole document with xmltodict.
+    """
+    name = 'xmltodict'
+    errors = (ExpatError,)
+
+    def iter_items(self, stream, tag):
+        """
+        Yields the dict of each element with the tag under the root.
+        :param stream: File like object or string of the xml.
+        :param tag: Tag of the items e.g. dataset in datasets.
+        :return generator: dict
+        """
+        doc = next(iter(self.parse(stream).values()))
+        items = doc.get(tag, []) if isinstance(doc, dict) else []
+        if not isinstance(items, list):
+            items = [items]
+        for item in items:
+            yield item
+
+    def parse(self, stream):
+        """
+        :param stream: File like object or string of the xml.
+        :return dict: Of the root tag to the document.
+        """
+        return xmltodict.parse(stream)
+
+
+class LxmlParser(object):
+    """
+    Parses with lxml building the same dicts as xmltodict from the elements.
+    Namespaced tags and attributes are not mapped to xmltodict's prefix:name
+    and come out as {uri}name. The ODFI xml has no namespaces.
+    """
+    name = 'lxml'
+    errors = (ExpatError,) if etree is None else (etree.XMLSyntaxError,)
+
+    def iter_items(self, stream, tag):
+        """
+        Yields the dict of each element with the tag under the root as soon
+        as the element has been read.
+        Elements already yielded are freed so memory stays flat however
+        long the document is.
+        :param stream: File like object of the xml.
+        :param tag: Tag of the items e.g. dataset in datasets.
+        :return generator: dict
+        """
+        depth = 0
+        for event, element in etree.iterparse(
+                stream, events=('start', 'end'), resolve_entities=False):
+            if event == 'start':
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 1:
+                if element.tag == tag:
+                    yield _element_to_dict(element)
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+
+    def parse(self, stream):
+        """
+        :param stream: File like object or string of the xml.
+        :return dict: Of the root tag to the document.
+        """
+        if isinstance(stream, (bytes, str)):
+            root = etree.fromstring(stream, _get_lxml_parser())
+        else:
+            root = etree.parse(stream, _get_lxml_parser()).getroot()
+
+        return OrderedDict([(root.tag, _element_to_dict(root))])
+
+
+PARSERS = {
+    XmltodictParser.name: XmltodictParser(),
+    LxmlParser.name: LxmlParser()
+}
+
+
+def _element_to_dict(element):
+    """
+    Same as xmltodict: attributes as @name, repeated children as a list,
+    text as #text or the value itself when there is nothing else and None
+    for an empty element.
+    """
+    doc = OrderedDict(
+        ('@' + name, value) for name, value in element.attrib.items())
+    text = [element.text or '']
+    for child in element:
+        if not isinstance(child.tag, str):
+            # Comments and processing instructions.
+            text.append(child.tail or '')
+            continue
+        value = _element_to_dict(child)
+        if child.tag not in doc:
+            doc[child.tag] = value
+        elif isinstance(doc[child.tag], list):
+            doc[child.tag].append(value)
+        else:
+            doc[child.tag] = [doc[child.tag], value]
+        text.append(child.tail or '')
+    text = ''.join(text).strip()
+    if not doc:
+        return text or None
+    if text:
+        doc['#text'] = text
+
+    return doc
+
+
+def _get_lxml_parser():
+    return etree.XMLParser(resolve_entities=False)
+
+
+def get_parser(config):
+    """
+    XML_PARSER of the config, xmltodict by default.
+    :param config: ODFI config.
+    :return XmltodictParser|LxmlParser:
+    """
+    name = config.get('XML_PARSER', XML_PARSER)
+    if name not in PARSERS:
+        raise ValueError("XML_PARSER must be one of %s not %s!" % (
+            ', '.join(sorted(PARSERS)), name))
+    if name == LxmlParser.name and etree is None:
+        raise ValueError("XML_PARSER is lxml but lxml is not installed!")
+
+    return PARSERS[name]
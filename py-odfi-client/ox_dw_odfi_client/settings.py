@@ -17,12 +17,22 @@ DEFAULT_SORT_KEY = 'readable_interval'
 
 # Maximum default con-current downloaders
 MAX_DOWNLOADERS = 10
+MAX_DOWNLOADERS_PER_HOST = 10
 
 # Downloads
 CACHE_META_DATA = False
+# Parsed meta.xml/schema.xml documents kept in memory per process.
+META_CACHE_SIZE = 1024
 DEFAULT_DATA_DIR = 'odfi'
+DOWNLOAD_CHUNK_SIZE = 131072  # bytes read per iteration of a download
 MAX_ATTEMPTS = 5
 WAIT_BETWEEN_ATTEMPTS = 2000  # ms
+# Quick retries of dropped connections and 502/503/504 by the http session
+# before MAX_ATTEMPTS kicks in.
+HTTP_RETRIES = 2
+HTTP_BACKOFF_FACTOR = 0.5
+# xmltodict or lxml(pip install ox_dw_odfi_client[lxml]) for the ODFI xml.
+XML_PARSER = 'xmltodict'
 
 # By default do not use proxies
 PROXIES = {
@@ -15,6 +15,10 @@ if sys.version_info < (2, 7):
         'argparse': '>=1.2.1',
         'ordereddict': '>=1.1'
     })
+if sys.version_info < (3, 2):
+    INSTALL_REQUIRES.update({
+        'futures': '>=3.0.5,<4'
+    })
 
 
 setup(
@@ -26,6 +30,7 @@ setup(
     author_email='dw-scrum-team@openx.com',
     packages=find_packages(),
     install_requires=["%s%s" % (k, v) for k, v in INSTALL_REQUIRES.items()],
+    extras_require={'lxml': ['lxml>=3.4.0']},
     classifiers=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',
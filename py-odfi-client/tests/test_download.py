@@ -0,0 +1,289 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from ox_dw_odfi_client import (DownloadExecutor, MD5MismatchException,
+                               MissingMetaFile, PartFile, SchemaFile,
+                               download_file, get_session, get_xml_meta)
+from ox_dw_odfi_client.download import META_CACHE, PARTIAL_SUFFIX, LRUCache
+from ox_dw_odfi_client.parsers import etree
+
+DATA = b''.join(b'%06d\n' % line for line in range(10000))
+REQUESTS = []
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """
+    Serves DATA honoring Range: bytes=n- like ODFI.
+    """
+
+    def do_GET(self):
+        REQUESTS.append(self.headers.get('Range'))
+        matcher = re.match(r'bytes=(\d+)-', self.headers.get('Range') or '')
+        if matcher:
+            start = int(matcher.group(1))
+            if start >= len(DATA):
+                self.send_response(416)
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes %d-%d/%d' % (
+                start, len(DATA) - 1, len(DATA)))
+        else:
+            start = 0
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(DATA) - start))
+        self.end_headers()
+        self.wfile.write(DATA[start:])
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDownloadFile(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(('127.0.0.1', 0), RangeHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        del REQUESTS[:]
+        self.tmp_dir = tempfile.mkdtemp()
+        self.config = {
+            'ODFI_HOST': 'http://127.0.0.1:%d' % self.server.server_port,
+            'ODFI_USER': 'user',
+            'ODFI_PASS': 'pass'
+        }
+        self.part_file = self.get_part_file(hashlib.md5(DATA).hexdigest())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def get_part_file(self, digest):
+        return PartFile(
+            self.config['ODFI_HOST'] + '/000-001.txt.gz',
+            os.path.join(self.tmp_dir, '000-001.txt.gz'), 10000, len(DATA),
+            '000', 1, 'GZIP', digest, 'Feed', 1)
+
+    def write_partial(self, data):
+        with open(self.part_file.file_name + PARTIAL_SUFFIX, 'wb') as out:
+            out.write(data)
+
+    def assert_downloaded(self):
+        with open(self.part_file.file_name, 'rb') as in_file:
+            self.assertEqual(in_file.read(), DATA)
+        self.assertFalse(
+            os.path.exists(self.part_file.file_name + PARTIAL_SUFFIX))
+
+    def test_download_file(self):
+        self.assertTrue(download_file(self.config, self.part_file))
+        self.assert_downloaded()
+        self.assertEqual(REQUESTS, [None])
+
+    def test_resume_partial(self):
+        self.write_partial(DATA[:1000])
+        self.assertTrue(download_file(self.config, self.part_file))
+        self.assert_downloaded()
+        self.assertEqual(REQUESTS, ['bytes=1000-'])
+
+    def test_partial_already_complete(self):
+        self.write_partial(DATA)
+        self.assertTrue(download_file(self.config, self.part_file))
+        self.assert_downloaded()
+
+    def test_bad_partial_refetched(self):
+        self.write_partial(b'x' * 1000)
+        self.assertTrue(download_file(self.config, self.part_file))
+        self.assert_downloaded()
+        self.assertEqual(REQUESTS, ['bytes=1000-', None])
+
+    def test_verified_sidecar(self):
+        """
+        is_ready trusts the sidecar until the file changes after it.
+        """
+        self.assertTrue(download_file(self.config, self.part_file))
+        self.assertTrue(self.part_file.is_verified)
+        file_stat = os.stat(self.part_file.file_name)
+        with open(self.part_file.file_name, 'r+b') as out_file:
+            out_file.write(b'x')
+        os.utime(self.part_file.file_name,
+                 (file_stat.st_atime, file_stat.st_mtime))
+        self.assertTrue(self.part_file.is_ready)
+        with self.assertRaises(MD5MismatchException):
+            self.part_file.verify()
+        os.utime(self.part_file.file_name,
+                 (file_stat.st_atime, file_stat.st_mtime + 10))
+        self.assertFalse(self.part_file.is_verified)
+        with self.assertRaises(MD5MismatchException):
+            self.part_file.is_ready
+
+    def test_md5_mismatch_removes_partial(self):
+        part_file = self.get_part_file('0' * 32)
+        with self.assertRaises(MD5MismatchException):
+            download_file.__wrapped__(self.config, part_file)
+        self.assertFalse(os.path.exists(part_file.file_name))
+        self.assertFalse(
+            os.path.exists(part_file.file_name + PARTIAL_SUFFIX))
+        self.assertFalse(os.path.exists(part_file.verified_file_name))
+
+
+class TestMetaCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.meta_file = os.path.join(self.tmp_dir, 'meta.xml')
+        self.write('<feed><frequency>HOURLY</frequency></feed>')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, xml):
+        with open(self.meta_file, 'w') as out_file:
+            out_file.write(xml)
+
+    def test_get_xml_meta_cached(self):
+        doc = get_xml_meta({}, self.tmp_dir)
+        self.assertIs(get_xml_meta({}, self.tmp_dir), doc)
+        self.write('<feed><frequency>DAILY</frequency></feed>')
+        file_stat = os.stat(self.meta_file)
+        os.utime(self.meta_file, (file_stat.st_atime, file_stat.st_mtime + 1))
+        self.assertEqual(
+            get_xml_meta({}, self.tmp_dir)['feed']['frequency'], 'DAILY')
+        self.assertTrue(len(META_CACHE) <= META_CACHE.max_size)
+
+    def test_malformed_meta_removed(self):
+        """
+        Parse errors of whichever parser is configured replace the file.
+        """
+        for parser in ['xmltodict'] + ([] if etree is None else ['lxml']):
+            self.write('HELLO')
+            with self.assertRaises(MissingMetaFile):
+                get_xml_meta({'XML_PARSER': parser}, self.tmp_dir)
+            self.assertFalse(os.path.exists(self.meta_file))
+
+    def test_lru_cache(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(len(cache), 2)
+
+
+class TestSession(unittest.TestCase):
+
+    def setUp(self):
+        self.config = {
+            'ODFI_HOST': 'http://odfi',
+            'ODFI_USER': 'user',
+            'ODFI_PASS': 'pass'
+        }
+
+    def test_get_session(self):
+        """
+        One keep-alive session per config with the pool sized to
+        MAX_DOWNLOADERS.
+        """
+        session = get_session(self.config)
+        self.assertIs(session, get_session(dict(self.config)))
+        self.assertIsNot(session,
+                         get_session(dict(self.config, ODFI_USER='x')))
+        self.assertEqual(session.auth, ('user', 'pass'))
+        adapter = get_session(dict(self.config, MAX_DOWNLOADERS=3)) \
+            .get_adapter(self.config['ODFI_HOST'])
+        self.assertEqual(adapter._pool_maxsize, 3)
+
+
+class TestDownloadExecutor(unittest.TestCase):
+
+    def test_download_executor(self):
+        """
+        Per file results and errors with no more than MAX_DOWNLOADERS_PER_HOST
+        downloading from a host at once.
+        """
+        lock = threading.Lock()
+        running = {'now': 0, 'max': 0}
+
+        def download_file(config, file_obj):
+            with lock:
+                running['now'] += 1
+                running['max'] = max(running['max'], running['now'])
+            time.sleep(0.05)
+            with lock:
+                running['now'] -= 1
+            if file_obj.name == 'bad':
+                raise IOError(file_obj.url)
+            return True
+
+        file_objs = [
+            SchemaFile('http://odfi/schema.xml', 'schema.xml', '1', name,
+                       '1234')
+            for name in ['good', 'bad', 'good', 'good']]
+        executor = DownloadExecutor(max_downloaders=4, max_per_host=2)
+        with mock.patch('ox_dw_odfi_client.executor.download_file',
+                        download_file):
+            results = executor.download({}, file_objs)
+        executor.shutdown()
+        self.assertEqual([result.file_obj for result in results], file_objs)
+        self.assertEqual([result.is_ready for result in results],
+                         [True, False, True, True])
+        self.assertTrue(isinstance(results[1].error, IOError))
+        self.assertEqual(running['max'], 2)
+
+    def test_busy_host_does_not_block_others(self):
+        """
+        Files for a host at MAX_DOWNLOADERS_PER_HOST wait without taking
+        threads that another host could use.
+        """
+        release = threading.Event()
+
+        def download_file(config, file_obj):
+            if file_obj.url.startswith('http://busy/'):
+                release.wait(5)
+            return True
+
+        executor = DownloadExecutor(max_downloaders=2, max_per_host=1)
+        with mock.patch('ox_dw_odfi_client.executor.download_file',
+                        download_file):
+            busy = [
+                executor.submit({}, SchemaFile(
+                    'http://busy/%s.xml' % index, 'schema.xml', '1',
+                    'busy', '1234'))
+                for index in range(3)]
+            other = executor.submit({}, SchemaFile(
+                'http://other/schema.xml', 'schema.xml', '1', 'other',
+                '1234'))
+            try:
+                self.assertTrue(other.result(timeout=1))
+                self.assertFalse(any(future.done() for future in busy))
+            finally:
+                release.set()
+            self.assertEqual([future.result(timeout=5) for future in busy],
+                             [True, True, True])
+        executor.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
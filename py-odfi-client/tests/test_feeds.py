@@ -2,6 +2,10 @@ import os
 from datetime import datetime
 from shutil import rmtree
 import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
 from ox_dw_odfi_client import (
     DataSet, DataSizeMismatchException, MD5MismatchException, MissingMetaFile,
     NoDataSetException, Feed, Feeds, SchemaFile, download_file, get_xml_meta,
@@ -179,5 +183,46 @@ class TestFeeds(unittest.TestCase):
             pass
 
 
+class TestDataSets(unittest.TestCase):
+    """
+    From the cached meta in tests/data without ODFI.
+    """
+
+    def test_dataset_lazy(self):
+        """
+        Nothing is loaded until used.
+        """
+        dataset = DataSet(CONFIG, NOT_READY, TEST_SERIAL, uri='http://nowhere')
+        self.assertIsNone(dataset._meta)
+        self.assertEqual(dataset.readable_interval, datetime(2017, 8, 29, 19))
+        self.assertEqual(dataset.next_readable_interval,
+                         datetime(2017, 8, 29, 20))
+        self.assertEqual(dataset.meta['serial'], '1969')
+        self.assertIsNone(dataset._schema)
+
+    def test_get_datasets_sorted_on_listing(self):
+        """
+        Sorts on the listing without loading any dataset meta.
+        """
+        feed = Feed(CONFIG, NOT_READY, 'http://nowhere')
+        listing = {'dataset': [
+            {'@uri': 'http://nowhere/%s' % serial, 'serial': serial,
+             'readableInterval': readable_interval}
+            for serial, readable_interval in
+            [('3', '2017-08-29_18'), ('1', '2017-08-29_20'),
+             ('2', '2017-08-29_19')]]}
+        with mock.patch.object(feed, '_get_dataset_doc',
+                               return_value=listing):
+            datasets = list(feed.get_datasets())
+            self.assertEqual([dataset.serial for dataset in datasets],
+                             [3, 2, 1])
+            self.assertEqual(
+                [dataset.serial
+                 for dataset in feed.get_datasets(sort_key='serial')],
+                [1, 2, 3])
+        self.assertEqual([dataset._meta for dataset in datasets],
+                         [None, None, None])
+
+
 if __name__ == '__main__':
     unittest.main()
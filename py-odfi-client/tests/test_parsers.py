@@ -0,0 +1,75 @@
+import io
+import os
+import unittest
+import xmltodict
+from ox_dw_odfi_client import LxmlParser, XmltodictParser, get_parser
+from ox_dw_odfi_client.parsers import etree
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+META_XML = os.path.join(HERE, 'data', 'NotReady', '1234', 'meta.xml')
+DATASETS_XML = b"""<?xml version="1.0" encoding="utf-8"?>
+<datasets count="2">
+  <dataset uri="http://nowhere/1"><serial>1</serial>
+    <readableInterval>2017-08-29_19</readableInterval>
+  </dataset>
+  <!-- comment -->
+  <dataset uri="http://nowhere/2"><serial>2</serial><empty/>
+    <readableInterval>2017-08-29_20</readableInterval>
+  </dataset>
+</datasets>
+"""
+
+
+class TestParsers(unittest.TestCase):
+
+    def test_xmltodict_iter_items(self):
+        parser = XmltodictParser()
+        items = list(parser.iter_items(io.BytesIO(DATASETS_XML), 'dataset'))
+        self.assertEqual([item['serial'] for item in items], ['1', '2'])
+        self.assertEqual(items[0]['@uri'], 'http://nowhere/1')
+        single = b'<datasets><dataset><serial>1</serial></dataset></datasets>'
+        self.assertEqual(
+            list(parser.iter_items(io.BytesIO(single), 'dataset')),
+            [{'serial': '1'}])
+        self.assertEqual(
+            list(parser.iter_items(io.BytesIO(b'<datasets/>'), 'dataset')),
+            [])
+
+    def test_get_parser(self):
+        self.assertEqual(get_parser({'XML_PARSER': 'xmltodict'}).name,
+                         'xmltodict')
+        self.assertEqual(get_parser({}).name, 'xmltodict')
+        with self.assertRaises(ValueError):
+            get_parser({'XML_PARSER': 'sax'})
+
+    @unittest.skipIf(etree is not None, "lxml is installed")
+    def test_get_parser_no_lxml(self):
+        with self.assertRaises(ValueError):
+            get_parser({'XML_PARSER': 'lxml'})
+
+    @unittest.skipIf(etree is None, "lxml is not installed")
+    def test_lxml_same_as_xmltodict(self):
+        parser = LxmlParser()
+        with open(META_XML, 'rb') as in_file:
+            xml = in_file.read()
+        self.assertEqual(parser.parse(io.BytesIO(xml)), xmltodict.parse(xml))
+        self.assertEqual(parser.parse(DATASETS_XML),
+                         xmltodict.parse(DATASETS_XML))
+        self.assertEqual(
+            list(parser.iter_items(io.BytesIO(DATASETS_XML), 'dataset')),
+            list(XmltodictParser().iter_items(DATASETS_XML, 'dataset')))
+
+    @unittest.skipIf(etree is None, "lxml is not installed")
+    def test_lxml_iter_items_streams(self):
+        """
+        The first dataset is yielded before the rest of the xml is read.
+        """
+        stream = io.BytesIO(DATASETS_XML + b' ' * 1048576)
+        items = LxmlParser().iter_items(stream, 'dataset')
+        self.assertEqual(next(items)['serial'], '1')
+        self.assertTrue(stream.tell() < len(stream.getvalue()))
+        self.assertEqual([item['serial'] for item in items], ['2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ Common function for download and upload.
 import logging
 import sys
 from pid import PidFile
+from ox_dw_db import is_transient
 from ox_dw_logger import get_etl_logger
 from ox_dw_odfi_client import (NoDataSetException, DataSizeMismatchException,
                                MD5MismatchException)
@@ -52,10 +53,40 @@ def _loader(name, job_name, classname, options, dbh):
         job.logger.warning(error)
         return False
     except (IOError, DataSizeMismatchException, MD5MismatchException) as error:
+        # ConnectionError and TimeoutError are IOErrors on Python 3.
+        if is_transient(error):
+            raise
         job.logger.warning(
             "Partfiles are corrupt or missing! JOB_NAME:%s; "
             "FEED_NAME:%s; READABLE_INTERVAL:%s; ODFI not ready. %s", job.name,
             job.feed_name, job.load_state.variable_value, error)
         return False
     except Exception as error:
+        if is_transient(error):
+            raise
         job.logger.error("Unhandled exception: %s", str(error))
+
+
+def _loop(name, job_name, classname, options, dbh):
+    """
+    Calls _loader until there is nothing more to do.
+    A dropped session reconnects with backoff and carries on from the
+    load_state instead of ending the run.
+    """
+    attempt = 0
+    while True:
+        try:
+            if not _loader(name, job_name, classname, options, dbh):
+                return
+            attempt = 0
+        except Exception as error:
+            if not is_transient(error):
+                raise
+            attempt += 1
+            logger = get_logger(name, debug=options.debug)
+            logger.warning("Transient database error: %s", str(error))
+            if not dbh.recover(attempt):
+                logger.error("Giving up after %s attempt(s): %s", attempt,
+                             str(error))
+                return
+            logger.info("Reconnected. Attempt %s.", attempt + 1)
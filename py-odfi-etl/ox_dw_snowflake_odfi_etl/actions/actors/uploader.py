@@ -4,7 +4,7 @@ Runs the load steps defined in the jobs yaml.
 import os
 from datetime import datetime
 from ox_dw_odfi_client import readable_interval_datetime
-from ox_dw_load_state import LoadState
+from ox_dw_load_state import LoadState, LoadStateSet
 from ._loader_base import _LoaderBase
 from ...common.content_topics import load_content_topics
 from ...common.exceptions import BreakCheckError, JobNotFoundException
@@ -360,11 +360,15 @@ class Uploader(_LoaderBase):
                 dataset.meta['readableInterval'])
             self.job.logger.info("DATASET %s(%s) is loaded", variable_value,
                                  dataset.serial)
-            self.job.load_state.upsert(variable_value)
-            # If any, then set the AUXILIARY_LOAD_STATE_VARS
-            for variable_name in self.job.config.get(
-                    'AUXILIARY_LOAD_STATE_VARS', []):
-                LoadState(self.job.dbh, variable_name).upsert(variable_value)
+            if not self.job.load_state.advance_to(variable_value):
+                self.job.logger.warning(
+                    "%s is already at or past %s", self.job.load_state.variable_name,
+                    variable_value)
+            # If any, then set the AUXILIARY_LOAD_STATE_VARS in one MERGE
+            LoadStateSet(
+                self.job.dbh,
+                self.job.config.get('AUXILIARY_LOAD_STATE_VARS', [])
+            ).upsert_all(variable_value)
         else:
             # Increment grid_fact_reload_version load state variable
             LoadState(self.job.dbh, GRID_FACT_RELOAD_VERSION).increment_by_seq(
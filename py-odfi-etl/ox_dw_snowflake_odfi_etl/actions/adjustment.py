@@ -2,7 +2,7 @@
 Upload/ELT a particular job. Job will use load_state and odfi_etl_status
  tables to determine what to run for.
 """
-from ._base import acquire_lock, _loader
+from ._base import acquire_lock, _loop
 from .actors.adjustmenter import Adjustmenter
 
 OPTIONS = ["job_name", "debug"]
@@ -17,5 +17,4 @@ def adjustment(options, dbh):
     name = '_'.join([options.job_name, 'adjustment'])
     acquire_lock(name)
     # Loop until no more.
-    while _loader(name, options.job_name, Adjustmenter, options, dbh):
-        pass
+    _loop(name, options.job_name, Adjustmenter, options, dbh)
@@ -1,7 +1,7 @@
 """
 Download available partfiles for a given job name.
 """
-from ._base import acquire_lock, _loader
+from ._base import acquire_lock, _loop
 from .actors.downloader import Downloader
 
 OPTIONS = ["job_name", "debug"]
@@ -14,5 +14,4 @@ def download(options, dbh):
     name = '_'.join([options.job_name, 'downloader'])
     acquire_lock(name)
     # Loop until no more.
-    while _loader(name, options.job_name, Downloader, options, dbh):
-        pass
+    _loop(name, options.job_name, Downloader, options, dbh)
@@ -33,7 +33,7 @@ Download available partfiles for a given job name.
 #
 # odfi_etl rollup -j ox_transaction_sum_and_domain_hourly
 
-from ._base import acquire_lock, _loader
+from ._base import acquire_lock, _loop
 from .actors.rolluper import Rolluper
 
 OPTIONS = ["job_name", "debug", "rollup_name","rollup_start_date","rollup_end_date","rollup_interval_type","preview_rollup_queue","run_rollup_queue"]
@@ -45,6 +45,5 @@ def rollup(options, dbh):
     name = '_'.join([options.job_name, 'rolluper'])
     acquire_lock(name)
     # Loop until no more.
-    while _loader(name, options.job_name, Rolluper, options, dbh):
-        pass
+    _loop(name, options.job_name, Rolluper, options, dbh)
 
@@ -4,7 +4,7 @@ Command line functions defined here.
 import importlib
 import sys
 import pid
-from ox_dw_db import OXDB
+from ox_dw_db import pooled
 from .argparse import get_parsers
 from .common.exceptions import JobNotFoundException
 
@@ -24,12 +24,12 @@ def main():
 
     # Make the action call
     try:
-        with OXDB('SNOWFLAKE') as dbh:
+        with pooled('SNOWFLAKE') as dbh:
             getattr(
                 importlib.import_module(
                     '.actions.%s' % options.action[0],
                     package='ox_dw_snowflake_odfi_etl'),
-                options.action[0])(action_options, dbh.connection)
+                options.action[0])(action_options, dbh)
     except pid.PidFileAlreadyLockedError as exception:
         sys.stderr.write("PidLock found! %s; Exiting..." % str(exception))
     except JobNotFoundException as exc:
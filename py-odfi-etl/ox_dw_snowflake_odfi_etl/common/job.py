@@ -6,7 +6,7 @@ from ox_dw_load_state import LoadState
 from ox_dw_odfi_client import (Feeds, get_format_by_freq,
                                get_next_readable_interval_by_freq)
 from .exceptions import JobNotFoundException
-from .settings import get_conf, ODFI_CONF
+from .settings import get_conf, LOAD_STATE_CACHE, ODFI_CONF
 
 
 class Job(object):
@@ -16,16 +16,17 @@ class Job(object):
     :param name: Job Name
     :param dbh: database connection
     :param logger: logger object to use
+    :param cache: LoadStateCache to read the load_state through
     """
 
-    def __init__(self, name, dbh, logger, options=None):
+    def __init__(self, name, dbh, logger, options=None, cache=None):
         self.name = name
         self.dbh = dbh
         self.logger = logger
         self.config = get_conf(self.name)
         self.feed = Feeds(ODFI_CONF)[self.feed_name]
         self.load_state = LoadState(
-            self.dbh, variable_name=self.config['LOAD_STATE_VAR'])
+            self.dbh, variable_name=self.config['LOAD_STATE_VAR'], cache=cache)
         self.options = options
         self._depends_on = None
 
@@ -34,10 +35,11 @@ class Job(object):
     def depends_on(self):
         """
         Returns a list of dependencies as Job objects.
+        Their load_state is read through the LOAD_STATE_CACHE if configured.
         """
         if self._depends_on is None:
             self._depends_on = [
-                Job(job_name, self.dbh, self.logger)
+                Job(job_name, self.dbh, self.logger, cache=LOAD_STATE_CACHE)
                 for job_name in self.config.get('DEPENDS_ON', [])
             ]
 
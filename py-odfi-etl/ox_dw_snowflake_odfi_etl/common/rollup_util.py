@@ -4,6 +4,7 @@ import subprocess
 from itertools import repeat, chain
 from .settings import APP_CONF_ROOT,  get_conf,APP_ROOT
 
+from ox_dw_db import execute_many
 from ox_dw_load_state import LoadState
 CONFIG = get_conf('rollup', APP_CONF_ROOT)
 JOB_ENV_FILE = os.path.join(APP_ROOT, 'conf', 'env.yaml')
@@ -89,10 +90,10 @@ class RollupJob(object):
         db.cursor().execute(rollup_config['ROLLUP_DROP_LOAD_TABLE'])
         db.cursor().execute(rollup_config['ROLLUP_CREATE_LOAD_TABLE'])
 
-        load_sql = rollup_config['ROLLUP_LOAD_TABLE']
-        for job in jobs:
-            db.cursor().execute(load_sql,
-                                (job.rollup_type, job.rollup_time_name, job.instance_rollup_date, job.last_hour))
+        # One bulk bind per batch instead of a round trip per job.
+        execute_many(db, rollup_config['ROLLUP_LOAD_TABLE'],
+                     [(job.rollup_type, job.rollup_time_name, job.instance_rollup_date, job.last_hour)
+                      for job in jobs])
 
         # Merge new rollup rows into the table, commit,  and remove the
         # uploaded file
@@ -4,6 +4,7 @@ Common constants and definitions here.
 import os
 import sys
 import yaml
+from ox_dw_load_state import LoadStateCache
 
 APP_NAME = 'odfi_etl'
 try:
@@ -72,3 +73,6 @@ STAGE_NAME = '_'.join([
     ENV['DB_CONNECTIONS']['SNOWFLAKE']['KWARGS'].get('schema', 'test'),
     'odfi_etl_stage'
 ])
+# Opt in. Seconds to cache the load_state of DEPENDS_ON jobs between checks.
+LOAD_STATE_CACHE = LoadStateCache(ENV['LOAD_STATE_CACHE_TTL']) \
+    if ENV.get('LOAD_STATE_CACHE_TTL') else None
@@ -8,10 +8,10 @@ INSTALL_REQUIRES = {
     'python-dateutil': '>=2.5.3,<3',
     'pid': '>=2.1.1',
     'retrying': '>=1.3.3,<2',
-    'snowflake-connector-python': '>=1.5.1,<2',
-    'ox-dw-db': '>=0.0.5',
+    'snowflake-connector-python': '>=2.5.0,<3',
+    'ox-dw-db': '>=0.0.6',
     'ox-dw-logger': '>=0.0.1',
-    'ox-dw-load-state': '>=0.0.1',
+    'ox-dw-load-state': '>=0.0.5',
     'ox-dw-odfi-client': '>=0.0.4'
 }
 if sys.version_info < (2, 7):
@@ -19,6 +19,9 @@ STATEMENTS:
     - CREATE LOCAL TEMPORARY TABLE %(temp_table)s(col1 int, col2 varchar)
       ON COMMIT PRESERVE ROWS
     - INSERT INTO %(temp_table)s SELECT ...
+    # A nested list is run concurrently. Only for independent statements.
+    - - INSERT INTO %(other_table)s SELECT ...
+      - INSERT INTO %(another_table)s SELECT ...
     - COMMIT
 VARIABLES:  # Optional. For variable substitution in your STATEMENTS.
     this: that
@@ -4,7 +4,7 @@ Runs a series of statements against the configured dw_name.
 import csv
 import sys
 import pid
-from ox_dw_db import OXDB
+from ox_dw_db import OXDB, iter_batches
 from ox_dw_logger import get_etl_logger
 from ox_dw_load_state import LoadState
 from .settings import DEFAULT_FIELD_SEP, APP_NAME, LOCK_ROOT
@@ -14,6 +14,9 @@ def run(config):
     """
     Required in the config are:
         STATEMENTS: Ordered list of SQL statements to run.
+            An item that is itself a list is a group of independent
+            statements that are submitted together and waited on before
+            moving to the next item.
     Optional:
         DW_NAME: Data warehouse name.
         Required either in config file or sql_runner argument, -d (--dw_name).
@@ -45,6 +48,16 @@ def run(config):
                         config['VARIABLES'][key], = \
                             oxdb.get_executed_cursor(val).fetchone()
                 for index, statement in enumerate(config.get('STATEMENTS'), start=1):
+                    if isinstance(statement, list):
+                        # Independent statements overlap on the warehouse.
+                        handles = []
+                        for stmt in statement:
+                            stmt %= config.get('VARIABLES')
+                            logger.info("STATEMENT(%s/%s) SUBMIT %s;", index, size, stmt)
+                            handles.append(oxdb.submit(stmt))
+                        oxdb.wait(handles)
+                        logger.info("STATEMENT(%s/%s) %s statements completed.", index, size, len(handles))
+                        continue
                     statement %= config.get('VARIABLES')
                     logger.info("STATEMENT(%s/%s) %s;", index, size, statement)
                     cursor = oxdb.get_executed_cursor(statement)
@@ -55,8 +68,8 @@ def run(config):
                                 delimiter=config.get('FIELD_SEP', DEFAULT_FIELD_SEP))
                         if config.get('HEADERS', False):
                             writer.writerow(col[0] for col in cursor.description)
-                        for row in cursor:
-                            writer.writerow(row)
+                        for rows in iter_batches(cursor):
+                            writer.writerows(rows)
                     else:
                         cursor.execute(statement)
                 if config.get('LOAD_STATE_VAR') is not None:
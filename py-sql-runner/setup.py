@@ -13,7 +13,7 @@ setup(
     author_email='dw-scrum-team@openx.com',
     packages=find_packages(),
     install_requires=[
-        'ox_dw_db>=0.0.3',
+        'ox_dw_db>=0.0.6',
         'ox_dw_load_state>=0.0.2',
         'ox_dw_logger>=0.0.1'
     ],